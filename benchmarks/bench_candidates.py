@@ -0,0 +1,75 @@
+"""Compare evaluate_candidates with one dry run per response.
+
+Run with ``uv run python benchmarks/bench_candidates.py``.
+"""
+
+import time
+
+from search_replace import (
+    ApplyError,
+    MemoryStorage,
+    apply_edits,
+    evaluate_candidates,
+    parse_edit_blocks,
+)
+
+
+def generated_file(name: str, num_lines: int) -> str:
+    return "".join(
+        f"    {name}_{index} = compute({index})\n" for index in range(num_lines)
+    )
+
+
+def candidate(names: list[str], seed: int) -> str:
+    blocks = []
+    for number, name in enumerate(names):
+        line = (seed * 7919 + number * 104729) % 50_000
+        original = f"    {name}_{line} = compute({line})\n"
+        if seed % 4 == 3 and not number:
+            # One sample in four misquotes a line, so it only matches fuzzily.
+            original = f"    {name}_{line} = compte({line})\n"
+        updated = original.replace("compute", "compute_fast")
+        blocks.append(
+            f"{name}.py\n```python\n<<<<<<< SEARCH\n{original}=======\n"
+            f"{updated}>>>>>>> REPLACE\n```\n"
+        )
+    return "\n".join(blocks)
+
+
+def one_dry_run_each(files: dict[str, str], responses: list[str]) -> list[int]:
+    matched = []
+    for response in responses:
+        edits = parse_edit_blocks(response).edits
+        try:
+            result = apply_edits(edits, "/", dry_run=True, storage=MemoryStorage(files))
+        except ApplyError as exc:
+            matched.append(len(exc.passed))
+        else:
+            matched.append(len(result.matches))
+    return matched
+
+
+def main() -> None:
+    names = [f"module_{number}" for number in range(4)]
+    files = {f"{name}.py": generated_file(name, 50_000) for name in names}
+    for samples in (4, 8):
+        responses = [candidate(names, seed) for seed in range(samples)]
+
+        began = time.perf_counter()
+        legacy = one_dry_run_each(files, responses)
+        legacy_time = time.perf_counter() - began
+
+        began = time.perf_counter()
+        results = evaluate_candidates(responses, "/", storage=MemoryStorage(files))
+        new_time = time.perf_counter() - began
+
+        assert sorted(result.matched for result in results) == sorted(legacy)
+        print(
+            f"{samples} responses x {len(files)} files | one dry run each"
+            f" {legacy_time:7.3f} s | shared snapshot {new_time:7.3f} s"
+            f" | speedup {legacy_time / new_time:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Compare the single-pass ``...`` elision engine with the original one.
+
+Run with ``uv run python benchmarks/bench_dotdotdots.py``.
+"""
+
+import re
+import time
+from pathlib import Path
+
+from search_replace.apply import try_dotdotdots
+
+
+def legacy_dotdotdots(whole: str, part: str, replace: str) -> str | None:
+    dots_re = re.compile(r"(^\s*\.\.\.\n)", re.MULTILINE | re.DOTALL)
+
+    part_pieces = re.split(dots_re, part)
+    replace_pieces = re.split(dots_re, replace)
+
+    if len(part_pieces) != len(replace_pieces):
+        raise ValueError("Unpaired ... in SEARCH/REPLACE block")
+
+    if len(part_pieces) == 1:
+        return None
+
+    all_dots_match = all(
+        part_pieces[i] == replace_pieces[i] for i in range(1, len(part_pieces), 2)
+    )
+    if not all_dots_match:
+        raise ValueError("Unmatched ... in SEARCH/REPLACE block")
+
+    part_pieces = [part_pieces[i] for i in range(0, len(part_pieces), 2)]
+    replace_pieces = [replace_pieces[i] for i in range(0, len(replace_pieces), 2)]
+
+    for part_piece, replace_piece in zip(part_pieces, replace_pieces):
+        if not part_piece and not replace_piece:
+            continue
+
+        if not part_piece and replace_piece:
+            if not whole.endswith("\n"):
+                whole += "\n"
+            whole += replace_piece
+            continue
+
+        if whole.count(part_piece) == 0:
+            raise ValueError
+        if whole.count(part_piece) > 1:
+            raise ValueError
+
+        whole = whole.replace(part_piece, replace_piece, 1)
+
+    return whole
+
+
+def source_lines(repeat: int) -> list[str]:
+    package = Path(__file__).resolve().parent.parent / "search_replace"
+    lines: list[str] = []
+    for _ in range(repeat):
+        for path in sorted(package.glob("*.py")):
+            for line in path.read_text(encoding="utf-8").splitlines():
+                # Number every line so that the pieces stay unique across copies.
+                lines.append(f"{line}  # {len(lines):07d}\n")
+    return lines
+
+
+def main() -> None:
+    for repeat, pieces in ((1, 10), (10, 40)):
+        lines = source_lines(repeat)
+        whole = "".join(lines)
+        step = len(lines) // pieces
+        part_pieces = [lines[i * step] for i in range(pieces)]
+        replace_pieces = [piece.replace("#", "# edited") for piece in part_pieces]
+        part = "...\n".join(part_pieces)
+        replace = "...\n".join(replace_pieces)
+
+        began = time.perf_counter()
+        legacy = legacy_dotdotdots(whole, part, replace)
+        legacy_time = time.perf_counter() - began
+
+        began = time.perf_counter()
+        match = try_dotdotdots(whole, part, replace)
+        result = match.apply(whole) if match else None
+        new_time = time.perf_counter() - began
+
+        assert result == legacy
+        print(
+            f"{len(lines):>6} lines, {pieces:>2} pieces | original {legacy_time:7.4f} s"
+            f" | single pass {new_time:7.4f} s"
+            f" | speedup {legacy_time / new_time:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Compare the indexed exact matcher with the original sliding-window scan.
+
+Run with ``uv run python benchmarks/bench_exact_match.py``.
+"""
+
+import random
+import time
+
+from search_replace.apply import perfect_replace
+from search_replace.document import Document, LineIndex
+
+
+def legacy_perfect_replace(
+    whole_lines: list[str], part_lines: list[str], replace_lines: list[str]
+) -> str | None:
+    part_tup = tuple(part_lines)
+    part_len = len(part_lines)
+
+    for index in range(len(whole_lines) - part_len + 1):
+        whole_tup = tuple(whole_lines[index : index + part_len])
+        if part_tup == whole_tup:
+            result = (
+                whole_lines[:index] + replace_lines + whole_lines[index + part_len :]
+            )
+            return "".join(result)
+
+    return None
+
+
+def generated_file(num_lines: int) -> list[str]:
+    rng = random.Random(0)
+    lines = []
+    for index in range(num_lines):
+        indent = "    " * rng.randint(0, 3)
+        if index % 7 == 0:
+            lines.append("\n")
+        else:
+            lines.append(f"{indent}value_{rng.randint(0, 5000)} = compute({index})\n")
+    return lines
+
+
+def best_of(repeat: int, func, *args) -> float:  # type: ignore[no-untyped-def]
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    edits = 10
+    for num_lines in (5_000, 50_000, 200_000):
+        whole_lines = generated_file(num_lines)
+        start = int(num_lines * 0.9)
+        part_lines = whole_lines[start : start + 30]
+        missing_lines = part_lines[:-1] + ["not in the file\n"]
+        replace_lines = ["replaced\n"]
+
+        document = Document("".join(whole_lines))
+        for part in (part_lines, missing_lines):
+            expected = legacy_perfect_replace(whole_lines, part, replace_lines)
+            match = perfect_replace(
+                document.lines, part, replace_lines, document.line_index
+            )
+            actual = match.apply(document.text) if match else None
+            assert actual == expected
+
+        scan_hit = best_of(
+            3, legacy_perfect_replace, whole_lines, part_lines, replace_lines
+        )
+        scan_miss = best_of(
+            3, legacy_perfect_replace, whole_lines, missing_lines, replace_lines
+        )
+        build = best_of(3, lambda: LineIndex(document.lines))
+        lookup = best_of(3, lambda: document.line_index.find(part_lines))
+
+        print(
+            f"{num_lines:>7} lines | scan hit {scan_hit * 1000:7.2f} ms"
+            f" | scan miss {scan_miss * 1000:7.2f} ms"
+            f" | index build {build * 1000:7.2f} ms"
+            f" | lookup {lookup * 1_000_000:5.1f} us"
+            f" | {edits} lookups on one index vs {edits} scans:"
+            f" {scan_hit * edits / (build + lookup * edits):5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
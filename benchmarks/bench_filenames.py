@@ -0,0 +1,74 @@
+"""Compare parsing with a prebuilt FilenameIndex against the linear lookups.
+
+Run with ``uv run python benchmarks/bench_filenames.py``.
+"""
+
+import difflib
+import random
+import time
+from pathlib import Path
+
+from search_replace import FilenameIndex, parse_edit_blocks
+
+
+def legacy_lookup(fname: str, valid_fnames: list[str]) -> str | None:
+    if fname in valid_fnames:
+        return fname
+    for valid_name in valid_fnames:
+        if fname == Path(valid_name).name:
+            return valid_name
+    close_matches = difflib.get_close_matches(fname, valid_fnames, n=1, cutoff=0.8)
+    return close_matches[0] if close_matches else None
+
+
+def make_fnames(count: int) -> list[str]:
+    rng = random.Random(0)
+    words = ["api", "core", "utils", "models", "views", "tests", "client", "server"]
+    return [
+        "/".join(rng.choice(words) for _ in range(rng.randint(1, 4)))
+        + f"/module_{index}.py"
+        for index in range(count)
+    ]
+
+
+def main() -> None:
+    valid_fnames = make_fnames(40_000)
+    # Basename hits, near misses and unknown names, as they show up in responses.
+    queries = [Path(name).name for name in valid_fnames[:: 4_000]]
+    queries += [name.replace("module", "modul") for name in valid_fnames[:: 8_000]]
+    queries += ["brand_new_file.py"] * 5
+
+    began = time.perf_counter()
+    legacy = [legacy_lookup(query, valid_fnames) for query in queries]
+    legacy_time = time.perf_counter() - began
+
+    began = time.perf_counter()
+    index = FilenameIndex(valid_fnames)
+    build_time = time.perf_counter() - began
+    began = time.perf_counter()
+    indexed = [
+        query
+        if query in index
+        else index.by_basename(query) or index.close_match(query)
+        for query in queries
+    ]
+    lookup_time = time.perf_counter() - began
+
+    assert indexed == legacy
+    print(
+        f"{len(queries)} lookups over {len(valid_fnames)} names | linear"
+        f" {legacy_time:7.3f} s | index build {build_time:6.3f} s, lookups"
+        f" {lookup_time:7.3f} s"
+    )
+
+    response = "".join(
+        f"{query}\n```\n<<<<<<< SEARCH\na\n=======\nb\n>>>>>>> REPLACE\n```\n"
+        for query in queries
+    )
+    began = time.perf_counter()
+    parse_edit_blocks(response, valid_fnames=index)
+    print(f"parse with prebuilt index {time.perf_counter() - began:7.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Compare the pruned fuzzy matcher with the original exhaustive scan.
+
+Run with ``uv run python benchmarks/bench_fuzzy_match.py``.
+"""
+
+import math
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+
+from search_replace.fuzzy import find_closest_chunk
+
+
+def legacy_closest_chunk(
+    whole_lines: list[str], part: str, part_lines: list[str]
+) -> tuple[int, int, float]:
+    max_similarity = 0.0
+    most_similar_chunk_start = -1
+    most_similar_chunk_end = -1
+
+    scale = 0.1
+    min_len = math.floor(len(part_lines) * (1 - scale))
+    max_len = math.ceil(len(part_lines) * (1 + scale))
+
+    for length in range(min_len, max_len):
+        for i in range(len(whole_lines) - length + 1):
+            chunk = "".join(whole_lines[i : i + length])
+            similarity = SequenceMatcher(None, chunk, part).ratio()
+            if similarity > max_similarity and similarity:
+                max_similarity = similarity
+                most_similar_chunk_start = i
+                most_similar_chunk_end = i + length
+
+    return most_similar_chunk_start, most_similar_chunk_end, max_similarity
+
+
+def source_lines(repeat: int) -> list[str]:
+    package = Path(__file__).resolve().parent.parent / "search_replace"
+    lines: list[str] = []
+    for _ in range(repeat):
+        for path in sorted(package.glob("*.py")):
+            lines.extend(path.read_text(encoding="utf-8").splitlines(keepends=True))
+    return lines
+
+
+def main() -> None:
+    for repeat in (1, 3):
+        whole_lines = source_lines(repeat)
+        start = len(whole_lines) // 2
+        part_lines = [
+            line.replace("self", "this") for line in whole_lines[start : start + 20]
+        ]
+        part = "".join(part_lines)
+
+        began = time.perf_counter()
+        legacy = legacy_closest_chunk(whole_lines, part, part_lines)
+        legacy_time = time.perf_counter() - began
+
+        began = time.perf_counter()
+        closest = find_closest_chunk(whole_lines, part, part_lines)
+        new_time = time.perf_counter() - began
+
+        assert (closest.start, closest.end, closest.similarity) == legacy
+        print(
+            f"{len(whole_lines):>6} lines | exhaustive {legacy_time:7.3f} s"
+            f" | pruned {new_time:7.3f} s ({closest.scored} scored,"
+            f" {closest.pruned} pruned) | speedup {legacy_time / new_time:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
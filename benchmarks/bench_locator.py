@@ -0,0 +1,65 @@
+"""Compare single-pass block location with one window scan per block.
+
+Run with ``uv run python benchmarks/bench_locator.py``.
+"""
+
+import random
+import time
+from pathlib import Path
+
+from search_replace.document import Document, prep
+from search_replace.locator import locate_blocks
+
+
+def legacy_locate(content: str, originals: list[str]) -> list[tuple[int, ...]]:
+    lines = prep(content)[1]
+    stripped = [line.lstrip() for line in lines]
+    found = []
+    for original in originals:
+        part = [line.lstrip() for line in prep(original)[1]]
+        found.append(
+            tuple(
+                i
+                for i in range(len(lines) - len(part) + 1)
+                if stripped[i : i + len(part)] == part
+            )
+        )
+    return found
+
+
+def source_text(repeat: int) -> str:
+    package = Path(__file__).resolve().parent.parent / "search_replace"
+    texts = [path.read_text(encoding="utf-8") for path in sorted(package.glob("*.py"))]
+    return "".join(texts * repeat)
+
+
+def main() -> None:
+    rng = random.Random(0)
+    for repeat, blocks in ((1, 20), (5, 40)):
+        content = source_text(repeat)
+        lines = prep(content)[1]
+        originals = []
+        for _ in range(blocks):
+            start = rng.randrange(len(lines) - 8)
+            originals.append(
+                "".join(line.lstrip() for line in lines[start : start + 8])
+            )
+
+        began = time.perf_counter()
+        legacy = legacy_locate(content, originals)
+        legacy_time = time.perf_counter() - began
+
+        began = time.perf_counter()
+        locations = locate_blocks(Document(content), originals)
+        new_time = time.perf_counter() - began
+
+        assert [location.normalized for location in locations] == legacy
+        print(
+            f"{len(lines):>6} lines, {blocks} blocks | per-block scans"
+            f" {legacy_time:7.3f} s | single pass {new_time:7.3f} s"
+            f" | speedup {legacy_time / new_time:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""Report parse_many throughput over the chat-history fixture's messages.
+
+Run with ``uv run python benchmarks/bench_parse_many.py [workers ...]``.
+"""
+
+import re
+import sys
+from pathlib import Path
+
+from search_replace import ParseStats, parse_many
+
+FIXTURE = Path(__file__).resolve().parent.parent / "tests" / "fixtures" / "chat-history.md"
+
+
+def main() -> None:
+    text = FIXTURE.read_text(encoding="utf-8")
+    messages = re.split(r"^(?=#### |> )", text, flags=re.MULTILINE) * 10
+    for workers in [int(arg) for arg in sys.argv[1:]] or [1, 2, 4]:
+        stats = ParseStats()
+        for _ in parse_many(messages, workers=workers, chunksize=256, stats=stats):
+            pass
+        print(
+            f"workers={workers} | {stats.responses} responses, {stats.blocks} blocks,"
+            f" {stats.errors} errors in {stats.elapsed:6.2f} s"
+            f" | {stats.blocks_per_second:9.0f} blocks/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
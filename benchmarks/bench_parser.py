@@ -0,0 +1,113 @@
+"""Compare the single-pass lexer with the per-line regex parser it replaced.
+
+Parses single multi-megabyte responses built from this package's own source.
+Parity with the reference parser on the chat-history fixture is covered by
+``tests/test_parity_harness.py``.
+
+Run with ``uv run python benchmarks/bench_parser.py``.
+"""
+
+import re
+import time
+from pathlib import Path
+from typing import Callable, Iterator
+
+from search_replace.parser import (
+    DIVIDER,
+    HEAD,
+    UPDATED,
+    all_fences,
+    find_filename,
+    find_original_update_blocks,
+)
+from search_replace.types import Fence
+
+FindBlocks = Callable[[str, Fence], Iterator[tuple[str, str, str]]]
+
+
+def legacy_find_blocks(content: str, fence: Fence) -> Iterator[tuple[str, str, str]]:
+    """The previous parser loop, with its ``MissingFilenameError`` handling trimmed."""
+    lines = content.splitlines(keepends=True)
+    i = 0
+    current_filename: str | None = None
+
+    head_pattern = re.compile(HEAD)
+    divider_pattern = re.compile(DIVIDER)
+    updated_pattern = re.compile(UPDATED)
+
+    while i < len(lines):
+        line = lines[i]
+
+        if head_pattern.match(line.strip()):
+            if i + 1 < len(lines) and divider_pattern.match(lines[i + 1].strip()):
+                filename = find_filename(lines[max(0, i - 3) : i], fence, None)
+            else:
+                filename = find_filename(lines[max(0, i - 3) : i], fence, None)
+            filename = filename or current_filename
+            if not filename:
+                raise ValueError("missing filename")
+            current_filename = filename
+
+            original_text: list[str] = []
+            i += 1
+            while i < len(lines) and not divider_pattern.match(lines[i].strip()):
+                original_text.append(lines[i])
+                i += 1
+            if i >= len(lines):
+                raise ValueError("expected divider")
+
+            updated_text: list[str] = []
+            i += 1
+            while i < len(lines) and not (
+                updated_pattern.match(lines[i].strip())
+                or divider_pattern.match(lines[i].strip())
+            ):
+                updated_text.append(lines[i])
+                i += 1
+            if i >= len(lines):
+                raise ValueError("expected updated")
+
+            yield filename, "".join(original_text), "".join(updated_text)
+
+        i += 1
+
+
+def synthetic_response(size: int) -> str:
+    """A single response of about ``size`` characters made of real source blocks."""
+    package = Path(__file__).resolve().parent.parent / "search_replace"
+    blocks = []
+    for path in sorted(package.glob("*.py")):
+        source = path.read_text(encoding="utf-8")
+        half = len(source) // 2
+        blocks.append(
+            f"{path.name}\n```python\n<<<<<<< SEARCH\n{source[:half]}\n=======\n"
+            f"{source[half:]}\n>>>>>>> REPLACE\n```\n\nSome prose in between.\n\n"
+        )
+    text = "".join(blocks)
+    return text * (size // len(text) + 1)
+
+
+def timed(find_blocks: FindBlocks, content: str, fence: Fence) -> tuple[int, float]:
+    began = time.perf_counter()
+    count = sum(1 for _ in find_blocks(content, fence))
+    return count, time.perf_counter() - began
+
+
+def main() -> None:
+    for size in (4_000_000, 16_000_000):
+        response = synthetic_response(size)
+        fence = all_fences[0]
+
+        legacy_count, legacy_time = timed(legacy_find_blocks, response, fence)
+        count, new_time = timed(find_original_update_blocks, response, fence)
+
+        assert count == legacy_count
+        print(
+            f"{len(response) / 1e6:5.1f} MB, {count} blocks | per-line regexes"
+            f" {legacy_time:6.3f} s | lexer {new_time:6.3f} s"
+            f" | speedup {legacy_time / new_time:4.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
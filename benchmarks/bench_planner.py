@@ -0,0 +1,66 @@
+"""Compare planned apply_edits with applying the same blocks one at a time.
+
+Run with ``uv run python benchmarks/bench_planner.py``.
+"""
+
+import time
+from pathlib import Path
+
+from search_replace import DEFAULT_FENCE, EditBlock, MemoryStorage, apply_edits
+from search_replace.apply import _ApplySession
+
+
+def generated_file(num_lines: int) -> str:
+    return "".join(
+        f"    value_{index} = compute({index})\n" for index in range(num_lines)
+    )
+
+
+def refactor_edits(num_lines: int, blocks: int) -> list[EditBlock]:
+    step = num_lines // blocks
+    edits = []
+    for block in range(blocks):
+        start = block * step
+        original = "".join(
+            f"    value_{index} = compute({index})\n"
+            for index in range(start, start + 5)
+        )
+        edits.append(
+            EditBlock("big.py", original, original.replace("compute", "compute_fast"))
+        )
+    return edits
+
+
+def one_at_a_time(files: dict[str, str], edits: list[EditBlock]) -> str:
+    storage = MemoryStorage(files)
+    session = _ApplySession("/", None, DEFAULT_FENCE, False, storage=storage)
+    for edit in edits:
+        session.apply(edit)
+    session.flush()
+    return storage.files[Path("/big.py")]
+
+
+def main() -> None:
+    for num_lines, blocks in ((10_000, 10), (100_000, 40)):
+        files = {"big.py": generated_file(num_lines)}
+        edits = refactor_edits(num_lines, blocks)
+
+        began = time.perf_counter()
+        legacy = one_at_a_time(files, edits)
+        legacy_time = time.perf_counter() - began
+
+        began = time.perf_counter()
+        storage = MemoryStorage(files)
+        result = apply_edits(edits, root="/", storage=storage)
+        new_time = time.perf_counter() - began
+
+        assert storage.files[Path("/big.py")] == legacy
+        assert result.stats.planned_edits == blocks
+        print(
+            f"{num_lines:>7} lines, {blocks} blocks | one at a time {legacy_time:7.3f} s"
+            f" | planned {new_time:7.3f} s | speedup {legacy_time / new_time:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Compare a dry run's DiffPreview with re-diffing the files with difflib.
+
+Run with ``uv run python benchmarks/bench_preview.py``.
+"""
+
+import difflib
+import time
+
+from search_replace import EditBlock, MemoryStorage, apply_edits
+
+
+def generated_file(num_lines: int) -> str:
+    return "".join(
+        f"    value_{index} = compute({index})\n" for index in range(num_lines)
+    )
+
+
+def refactor_edits(num_lines: int, blocks: int) -> list[EditBlock]:
+    step = num_lines // blocks
+    edits = []
+    for block in range(blocks):
+        start = block * step
+        original = "".join(
+            f"    value_{index} = compute({index})\n"
+            for index in range(start, start + 5)
+        )
+        edits.append(
+            EditBlock("big.py", original, original.replace("compute", "compute_fast"))
+        )
+    return edits
+
+
+def full_diff(original: str, edits: list[EditBlock]) -> str:
+    updated = original
+    for edit in edits:
+        updated = updated.replace(edit.original, edit.updated, 1)
+    return "".join(
+        difflib.unified_diff(
+            original.splitlines(keepends=True),
+            updated.splitlines(keepends=True),
+            "a/big.py",
+            "b/big.py",
+        )
+    )
+
+
+def main() -> None:
+    for num_lines, blocks in ((10_000, 10), (100_000, 40)):
+        files = {"big.py": generated_file(num_lines)}
+        edits = refactor_edits(num_lines, blocks)
+        result = apply_edits(
+            edits, root="/", storage=MemoryStorage(files), dry_run=True
+        )
+        assert result.preview is not None
+
+        began = time.perf_counter()
+        legacy = full_diff(files["big.py"], edits)
+        legacy_time = time.perf_counter() - began
+
+        began = time.perf_counter()
+        preview = str(result.preview)
+        new_time = time.perf_counter() - began
+
+        assert preview == legacy
+        print(
+            f"{num_lines:>7} lines, {blocks} blocks | difflib {legacy_time:7.3f} s"
+            f" | preview {new_time:7.3f} s | speedup {legacy_time / new_time:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
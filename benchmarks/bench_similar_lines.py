@@ -0,0 +1,88 @@
+"""Compare the seeded "did you mean" search with the original full scan.
+
+Run with ``uv run python benchmarks/bench_similar_lines.py``.
+"""
+
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+
+from search_replace.fuzzy import find_similar_lines
+
+
+def legacy_similar_lines(
+    search_lines: str, content_lines: str, threshold: float = 0.6
+) -> str:
+    search_lines_list = search_lines.splitlines()
+    content_lines_list = content_lines.splitlines()
+
+    best_ratio = 0.0
+    best_match = None
+    best_match_i = -1
+
+    for i in range(len(content_lines_list) - len(search_lines_list) + 1):
+        chunk = content_lines_list[i : i + len(search_lines_list)]
+        ratio = SequenceMatcher(None, search_lines_list, chunk).ratio()
+        if ratio > best_ratio:
+            best_ratio = ratio
+            best_match = chunk
+            best_match_i = i
+
+    if best_ratio < threshold or best_match is None:
+        return ""
+
+    if (
+        best_match
+        and search_lines_list
+        and best_match[0] == search_lines_list[0]
+        and best_match[-1] == search_lines_list[-1]
+    ):
+        return "\n".join(best_match)
+
+    context_lines = 5
+    best_match_end = min(
+        len(content_lines_list), best_match_i + len(search_lines_list) + context_lines
+    )
+    best_match_i = max(0, best_match_i - context_lines)
+
+    best = content_lines_list[best_match_i:best_match_end]
+    return "\n".join(best)
+
+
+def source_lines(repeat: int) -> list[str]:
+    package = Path(__file__).resolve().parent.parent / "search_replace"
+    lines: list[str] = []
+    for _ in range(repeat):
+        for path in sorted(package.glob("*.py")):
+            lines.extend(path.read_text(encoding="utf-8").splitlines())
+    return lines
+
+
+def main() -> None:
+    for repeat in (1, 5):
+        lines = source_lines(repeat)
+        start = len(lines) // 2
+        search = lines[start : start + 20]
+        # Drift a few lines so the block no longer matches exactly.
+        for offset in (3, 9, 15):
+            search[offset] += "  # changed"
+        search_text = "\n".join(search)
+        content = "\n".join(lines)
+
+        began = time.perf_counter()
+        legacy = legacy_similar_lines(search_text, content)
+        legacy_time = time.perf_counter() - began
+
+        began = time.perf_counter()
+        result = find_similar_lines(search_text, content)
+        new_time = time.perf_counter() - began
+
+        assert result == legacy
+        print(
+            f"{len(lines):>6} lines | full scan {legacy_time:7.3f} s"
+            f" | seeded {new_time:7.3f} s | speedup {legacy_time / new_time:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,99 @@
-from .apply import apply_diff, apply_edits
+from .apply import apply_diff, apply_edits, apply_stream, apply_stream_async
+from .batch import ParseOutcome, ParseStats, parse_jsonl, parse_many
+from .cache import FileCache
+from .candidates import CandidateResult, evaluate_candidates
 from .errors import (
     ApplyError,
+    BudgetExceededError,
     MissingFilenameError,
     ParseError,
     PathEscapeError,
     SearchReplaceError,
 )
-from .parser import all_fences, find_original_update_blocks, parse_edit_blocks
+from .filenames import FilenameIndex
+from .locator import BlockLocation, BlockLocator, locate_blocks
+from .parser import (
+    StreamingBlockParser,
+    all_fences,
+    detect_fence,
+    find_original_update_blocks,
+    iter_edit_blocks,
+    parse_edit_block_spans,
+    parse_edit_blocks,
+)
+from .preview import DiffHunk, DiffPreview
 from .prompts import (
     EditBlockFencedPrompts,
     FewShotExampleMessages,
     get_example_messages,
     render_system_prompt,
 )
-from .types import ApplyResult, DEFAULT_FENCE, EditBlock, Fence, ParseResult
+from .repo_index import RepoIndex
+from .storage import LocalStorage, MemoryStorage, Storage
+from .types import (
+    ApplyResult,
+    ApplyStats,
+    BlockResult,
+    DEFAULT_FENCE,
+    EditBlock,
+    EditBlockLike,
+    EditBlockView,
+    Fence,
+    FenceOption,
+    Hunk,
+    Match,
+    ParseResult,
+)
 
 __all__ = [
     "ApplyError",
     "ApplyResult",
+    "ApplyStats",
     "apply_diff",
     "apply_edits",
+    "apply_stream",
+    "apply_stream_async",
     "all_fences",
+    "detect_fence",
+    "DiffHunk",
+    "DiffPreview",
+    "BlockLocation",
+    "BlockLocator",
+    "BlockResult",
+    "BudgetExceededError",
+    "CandidateResult",
     "DEFAULT_FENCE",
     "EditBlock",
+    "EditBlockLike",
+    "EditBlockView",
     "EditBlockFencedPrompts",
+    "evaluate_candidates",
     "Fence",
+    "FenceOption",
     "FewShotExampleMessages",
+    "FileCache",
+    "FilenameIndex",
+    "Hunk",
+    "LocalStorage",
+    "MemoryStorage",
     "find_original_update_blocks",
     "get_example_messages",
+    "iter_edit_blocks",
+    "locate_blocks",
+    "Match",
     "MissingFilenameError",
     "parse_edit_blocks",
+    "parse_edit_block_spans",
+    "parse_jsonl",
+    "parse_many",
+    "ParseOutcome",
     "ParseError",
     "PathEscapeError",
     "ParseResult",
+    "ParseStats",
     "render_system_prompt",
+    "RepoIndex",
     "SearchReplaceError",
+    "Storage",
+    "StreamingBlockParser",
 ]
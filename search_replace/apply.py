@@ -1,93 +1,161 @@
+import asyncio
 import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Sequence
+from typing import AsyncIterable, Callable, Iterable, Iterator, Mapping, Sequence
 
-from .errors import ApplyError, ParseError, PathEscapeError
+from .budget import Deadline
+from .cache import FileCache
+from .document import Document, LineIndex, NormalizedLines, prep
+from .errors import ApplyError, BudgetExceededError, ParseError, PathEscapeError
 from .fuzzy import find_similar_lines, replace_closest_edit_distance
-from .parser import parse_edit_blocks
-from .types import DEFAULT_FENCE, ApplyResult, EditBlock, Fence
-
-
-def prep(content: str) -> tuple[str, list[str]]:
-    if content and not content.endswith("\n"):
-        content += "\n"
-    lines = content.splitlines(keepends=True)
-    return content, lines
+from .locator import BlockLocation, BlockLocator
+from .parser import StreamingBlockParser, detect_fence, parse_edit_blocks
+from .planner import FilePlan
+from .preview import DiffPreview, LineEdit, match_line_edits
+from .repo_index import RepoIndex
+from .storage import LOCAL_STORAGE, Storage
+from .types import (
+    DEFAULT_FENCE,
+    ApplyResult,
+    ApplyStats,
+    BlockResult,
+    EditBlock,
+    EditBlockLike,
+    Fence,
+    FenceOption,
+    Hunk,
+    Match,
+)
 
 
 def perfect_or_whitespace(
     whole_lines: list[str],
     part_lines: list[str],
     replace_lines: list[str],
-) -> str | None:
+    document: Document | None = None,
+) -> Match | None:
     # Try for a perfect match.
-    result = perfect_replace(whole_lines, part_lines, replace_lines)
-    if result:
-        return result
+    index = document.line_index if document is not None else None
+    match = perfect_replace(whole_lines, part_lines, replace_lines, index)
+    if match and _keeps_content(match, whole_lines):
+        return match
 
     # Try being flexible about leading whitespace.
-    result = replace_part_with_missing_leading_whitespace(
-        whole_lines, part_lines, replace_lines
+    normalized = document.normalized if document is not None else None
+    match = replace_part_with_missing_leading_whitespace(
+        whole_lines, part_lines, replace_lines, normalized
     )
-    if result:
-        return result
+    if match and _keeps_content(match, whole_lines):
+        return match
 
     return None
 
 
+def _keeps_content(match: Match, whole_lines: list[str]) -> bool:
+    # A match that leaves the file empty counts as no match at all.
+    return sum(map(len, whole_lines)) + match.size_change > 0
+
+
 def perfect_replace(
-    whole_lines: list[str], part_lines: list[str], replace_lines: list[str]
-) -> str | None:
-    part_tup = tuple(part_lines)
+    whole_lines: list[str],
+    part_lines: list[str],
+    replace_lines: list[str],
+    index: LineIndex | None = None,
+) -> Match | None:
+    if index is None:
+        index = LineIndex(whole_lines)
+
+    start = index.find(part_lines)
+    if start < 0:
+        return None
+
     part_len = len(part_lines)
+    return Match.from_lines(
+        "exact", whole_lines, start, start + part_len, replace_lines
+    )
 
-    for index in range(len(whole_lines) - part_len + 1):
-        whole_tup = tuple(whole_lines[index : index + part_len])
-        if part_tup == whole_tup:
-            result = (
-                whole_lines[:index] + replace_lines + whole_lines[index + part_len :]
-            )
-            return "".join(result)
 
-    return None
+def replace_most_similar_chunk(
+    whole: str,
+    part: str,
+    replace: str,
+    document: Document | None = None,
+    deadline: Deadline | None = None,
+    fuzzy: bool = True,
+) -> str | None:
+    """Best efforts to find `part` lines in `whole` and replace them with `replace`.
+
+    Pass the ``Document`` of `whole` to reuse its line indexes across calls.
+    With a ``deadline`` the fuzzy stage raises ``BudgetExceededError`` once it
+    runs out of time instead of finishing its scan; ``fuzzy=False`` skips it.
+    """
+    if document is None:
+        document = Document(whole)
+    match = find_most_similar_chunk(document, part, replace, deadline, fuzzy)
+    if match is None:
+        return None
+    return match.apply(document.text)
+
 
+def find_most_similar_chunk(
+    document: Document,
+    part: str,
+    replace: str,
+    deadline: Deadline | None = None,
+    fuzzy: bool = True,
+    stats: ApplyStats | None = None,
+) -> Match | None:
+    """The ``Match`` that ``replace_most_similar_chunk`` would apply to ``document``.
 
-def replace_most_similar_chunk(whole: str, part: str, replace: str) -> str | None:
-    """Best efforts to find `part` lines in `whole` and replace them with `replace`."""
-    whole, whole_lines = prep(whole)
+    Fuzzy matching adds the windows it scored and pruned to ``stats``.
+    """
+    whole, whole_lines = document.text, document.lines
     part, part_lines = prep(part)
     replace, replace_lines = prep(replace)
 
-    result = perfect_or_whitespace(whole_lines, part_lines, replace_lines)
-    if result:
-        return result
+    match = perfect_or_whitespace(whole_lines, part_lines, replace_lines, document)
+    if match:
+        return match
 
     # Drop leading empty line, GPT sometimes adds them spuriously (issue #25).
     if len(part_lines) > 2 and not part_lines[0].strip():
         skip_blank_line_part_lines = part_lines[1:]
-        result = perfect_or_whitespace(
-            whole_lines, skip_blank_line_part_lines, replace_lines
+        match = perfect_or_whitespace(
+            whole_lines, skip_blank_line_part_lines, replace_lines, document
         )
-        if result:
-            return result
+        if match:
+            return match
 
     # Try to handle when it elides code with ...
     try:
-        result = try_dotdotdots(whole, part, replace)
-        if result:
-            return result
+        match = try_dotdotdots(whole, part, replace, document)
+        if match and len(whole) + match.size_change:
+            return match
     except ValueError:
         pass
 
+    if not fuzzy:
+        return None
+
     # Try fuzzy matching.
-    result = replace_closest_edit_distance(whole_lines, part, part_lines, replace_lines)
-    if result:
-        return result
+    fuzzy_deadline = deadline.for_strategy("fuzzy") if deadline else None
+    match = replace_closest_edit_distance(
+        whole_lines, part, part_lines, replace_lines, fuzzy_deadline, stats
+    )
+    if match and len(whole) + match.size_change:
+        return match
 
     return None
 
 
-def try_dotdotdots(whole: str, part: str, replace: str) -> str | None:
+dots_re = re.compile(r"(^\s*\.\.\.\n)", re.MULTILINE | re.DOTALL)
+
+
+def try_dotdotdots(
+    whole: str, part: str, replace: str, document: Document | None = None
+) -> Match | None:
     """
     See if the edit block has ... lines.
     If not, return none.
@@ -95,10 +163,12 @@ def try_dotdotdots(whole: str, part: str, replace: str) -> str | None:
     If yes, try and do a perfect edit with the ... chunks.
     If there's a mismatch or otherwise imperfect edit, raise ValueError.
 
-    If perfect edit succeeds, return the updated whole.
-    """
-    dots_re = re.compile(r"(^\s*\.\.\.\n)", re.MULTILINE | re.DOTALL)
+    If perfect edit succeeds, return its ``Match``, one hunk per piece.
 
+    Every piece is located in the original ``whole`` and must occur there
+    exactly once, without overlapping another piece. Pass the ``Document`` of
+    ``whole`` to reuse its line offsets.
+    """
     part_pieces = re.split(dots_re, part)
     replace_pieces = re.split(dots_re, replace)
 
@@ -119,37 +189,70 @@ def try_dotdotdots(whole: str, part: str, replace: str) -> str | None:
     part_pieces = [part_pieces[i] for i in range(0, len(part_pieces), 2)]
     replace_pieces = [replace_pieces[i] for i in range(0, len(replace_pieces), 2)]
 
-    pairs = zip(part_pieces, replace_pieces)
-    for part_piece, replace_piece in pairs:
-        if not part_piece and not replace_piece:
-            continue
-
-        if not part_piece and replace_piece:
-            if not whole.endswith("\n"):
-                whole += "\n"
-            whole += replace_piece
+    spans: list[tuple[int, int, str]] = []
+    appended: list[str] = []
+    for part_piece, replace_piece in zip(part_pieces, replace_pieces):
+        if not part_piece:
+            if replace_piece:
+                appended.append(replace_piece)
             continue
 
-        if whole.count(part_piece) == 0:
+        start = whole.find(part_piece)
+        if start < 0:
             raise ValueError
-        if whole.count(part_piece) > 1:
+        end = start + len(part_piece)
+        if whole.find(part_piece, end) >= 0:
             raise ValueError
+        spans.append((start, end, replace_piece))
+
+    spans.sort()
+    position = 0
+    for start, end, _ in spans:
+        if start < position:
+            raise ValueError
+        position = end
+
+    # Appended pieces go on a line of their own at the end of the result.
+    ends_with_newline = _spliced_ends_with_newline(whole, spans)
+    for replace_piece in appended:
+        if not ends_with_newline:
+            replace_piece = "\n" + replace_piece
+        spans.append((len(whole), len(whole), replace_piece))
+        ends_with_newline = replace_piece.endswith("\n")
+
+    if document is None or document.text != whole:
+        document = Document(whole)
+    hunks = tuple(
+        Hunk(start, end, *document.line_span(start, end), replace_piece)
+        for start, end, replace_piece in spans
+    )
+    return Match("dotdotdots", hunks)
 
-        whole = whole.replace(part_piece, replace_piece, 1)
 
-    return whole
+def _spliced_ends_with_newline(whole: str, spans: list[tuple[int, int, str]]) -> bool:
+    """Does ``whole`` end with a newline once the sorted ``spans`` are replaced?"""
+    position = len(whole)
+    for start, end, replacement in reversed(spans):
+        if end < position:
+            break
+        if replacement:
+            return replacement.endswith("\n")
+        position = start
+    return whole[:position].endswith("\n")
 
 
 def replace_part_with_missing_leading_whitespace(
     whole_lines: list[str],
     part_lines: list[str],
     replace_lines: list[str],
-) -> str | None:
+    normalized: NormalizedLines | None = None,
+) -> Match | None:
     # GPT often messes up leading whitespace.
     # It usually does it uniformly across the ORIG and UPD blocks.
     # Either omitting all leading whitespace, or including only some of it.
 
-    # Outdent everything in part_lines and replace_lines by the max fixed amount possible.
+    # Outdent everything in part_lines and replace_lines by the max fixed amount
+    # possible.
     leading: list[int] = [len(p) - len(p.lstrip()) for p in part_lines if p.strip()] + [
         len(p) - len(p.lstrip()) for p in replace_lines if p.strip()
     ]
@@ -162,8 +265,14 @@ def replace_part_with_missing_leading_whitespace(
 
     # Can we find an exact match not including the leading whitespace.
     num_part_lines = len(part_lines)
+    if not num_part_lines:
+        return None
 
-    for index in range(len(whole_lines) - num_part_lines + 1):
+    if normalized is None:
+        normalized = NormalizedLines(whole_lines)
+
+    # Only windows whose stripped lines agree need the indentation check.
+    for index in normalized.iter_matches(part_lines):
         add_leading = match_but_for_leading_whitespace(
             whole_lines[index : index + num_part_lines], part_lines
         )
@@ -174,10 +283,9 @@ def replace_part_with_missing_leading_whitespace(
         replace_lines = [
             add_leading + line if line.strip() else line for line in replace_lines
         ]
-        whole_lines = (
-            whole_lines[:index] + replace_lines + whole_lines[index + num_part_lines :]
+        return Match.from_lines(
+            "whitespace", whole_lines, index, index + num_part_lines, replace_lines
         )
-        return "".join(whole_lines)
 
     return None
 
@@ -207,7 +315,8 @@ def strip_quoted_wrapping(
     res: str, fname: str | None = None, fence: Fence = DEFAULT_FENCE
 ) -> str:
     """
-    Given an input string which may have extra "wrapping" around it, remove the wrapping.
+    Given an input string which may have extra "wrapping" around it, remove the
+    wrapping.
     For example:
 
     filename.ext
@@ -244,6 +353,9 @@ def do_replace(
     before_text: str,
     after_text: str,
     fence: Fence | None = None,
+    document: Document | None = None,
+    deadline: Deadline | None = None,
+    storage: Storage = LOCAL_STORAGE,
 ) -> str | None:
     local_fence = fence or DEFAULT_FENCE
     before_text = strip_quoted_wrapping(before_text, str(fname), local_fence)
@@ -251,98 +363,710 @@ def do_replace(
     path = Path(fname)
 
     # Does it want to make a new file?
-    if not path.exists() and not before_text.strip():
-        path.touch()
+    if not storage.exists(path) and not before_text.strip():
+        storage.create(path)
         content = ""
 
     if content is None:
         return None
 
-    new_content: str | None
+    return _replace_content(content, before_text, after_text, document, deadline)
+
+
+def _replace_content(
+    content: str,
+    before_text: str,
+    after_text: str,
+    document: Document | None = None,
+    deadline: Deadline | None = None,
+    fuzzy: bool = True,
+) -> str | None:
+    """The in-memory part of ``do_replace``, on already unwrapped texts."""
+    matched = _match_content(
+        content, before_text, after_text, document, deadline, fuzzy
+    )
+    if matched is None:
+        return None
+    match, text = matched
+    return match.apply(text)
+
+
+def _match_content(
+    content: str,
+    before_text: str,
+    after_text: str,
+    document: Document | None = None,
+    deadline: Deadline | None = None,
+    fuzzy: bool = True,
+    stats: ApplyStats | None = None,
+) -> tuple[Match, str] | None:
+    """Match a block against ``content``; return it and the text it applies to.
+
+    That text is ``content`` itself when the block appends, and otherwise
+    ``content`` with the final newline matching adds when it is missing.
+    """
     if not before_text.strip():
         # Append to existing file, or start a new file.
-        new_content = content + after_text
-    else:
-        new_content = replace_most_similar_chunk(content, before_text, after_text)
-
-    return new_content
+        end = len(content)
+        line = len(content.splitlines())
+        return Match("append", (Hunk(end, end, line, line, after_text),)), content
+
+    if document is None:
+        document = Document(content)
+    match = find_most_similar_chunk(
+        document, before_text, after_text, deadline, fuzzy, stats
+    )
+    if match is None:
+        return None
+    return match, document.text
 
 
 def apply_edits(
-    edits: Sequence[EditBlock],
+    edits: Sequence[EditBlockLike],
     root: str | Path,
     chat_files: Sequence[str | Path] | None = None,
     fence: Fence = DEFAULT_FENCE,
     dry_run: bool = False,
+    deadline: float | None = None,
+    budget_ms: float | None = None,
+    strategy_budgets_ms: Mapping[str, float] | None = None,
+    max_workers: int | None = None,
+    storage: Storage | None = None,
+    cache: FileCache | None = None,
+    fallback_top_k: int = 3,
+    repo_index: RepoIndex | None = None,
 ) -> ApplyResult:
-    failed: list[EditBlock] = []
-    passed: list[EditBlock] = []
-    updated_edits: list[EditBlock] = []
+    """Apply edit blocks to the files under ``root``.
+
+    Files are read and written through ``storage`` (the local disk by
+    default); pass a ``MemoryStorage`` to patch an in-memory snapshot. A
+    ``FileCache`` shared between calls skips re-reading and re-indexing files
+    that have not changed since it last saw them.
+
+    With ``dry_run`` nothing is written, and ``ApplyResult.preview`` (or
+    ``ApplyError.preview``, for the blocks that matched) holds unified diffs
+    of the changes, built from the line ranges they replaced.
+
+    Runs of blocks that match verbatim and do not depend on each other are
+    located in the file as it was before the run, all in one pass of a
+    ``BlockLocator``, and spliced in a single pass (see ``FilePlan``); the
+    first block that needs anything more is applied on its own, and planning
+    resumes after it. The outcome is the same as applying every block in
+    order. ``ApplyStats`` counts the blocks found at several places or nowhere.
+
+    With ``max_workers`` the edits of different files are matched and written
+    concurrently on a thread pool; edits to the same file still apply in order.
+    An edit that misses its own file may land in another one, so with
+    ``chat_files`` or ``repo_index`` the edits are applied one by one instead.
+
+    An edit that misses its own file is first tried against every other
+    ``chat_files`` entry without fuzzy matching. Only the ``fallback_top_k``
+    candidates sharing the most lines with its SEARCH text go on to the fuzzy
+    stage. ``ApplyResult.stats`` / ``ApplyError.stats`` count the pruning.
+    Edits that still fail are looked up in ``repo_index``, if given, and
+    applied to the first indexed file where they match exactly.
+
+    ``deadline`` (a ``time.monotonic()`` value) and/or ``budget_ms`` bound the
+    whole call, and ``strategy_budgets_ms`` bounds each run of an expensive
+    stage (``"fuzzy"`` matching, the ``"did_you_mean"`` hints). Stages that run
+    out of time stop early; edits that could not be matched because of it are
+    listed in ``ApplyError.timed_out``.
+    """
+    session = _ApplySession(
+        root,
+        chat_files,
+        fence,
+        dry_run,
+        Deadline.create(deadline, budget_ms, strategy_budgets_ms),
+        storage,
+        cache,
+        fallback_top_k,
+        repo_index,
+    )
+    try:
+        if max_workers is None:
+            session.apply_planned(edits)
+        else:
+            session.apply_parallel(edits, max_workers)
+    finally:
+        session.flush()
+    return session.finish()
 
-    root_path = Path(root)
-    fallback_files = _resolve_chat_files(root_path, chat_files)
 
-    for edit in edits:
-        path = edit.path
-        original = edit.original
-        updated = edit.updated
+class _ApplySession:
+    """Applies edits one at a time and collects the outcome for the final report.
 
-        full_path = _resolve_path(root_path, path)
-        new_content: str | None = None
+    Files are read once and edited in memory; ``flush`` writes each changed
+    file a single time, however many blocks touched it.
+    """
 
-        if full_path.exists():
-            content = full_path.read_text(encoding="utf-8")
-            new_content = do_replace(full_path, content, original, updated, fence)
-        elif not original.strip():
-            new_content = do_replace(full_path, None, original, updated, fence)
+    def __init__(
+        self,
+        root: str | Path,
+        chat_files: Sequence[str | Path] | None,
+        fence: Fence,
+        dry_run: bool,
+        deadline: Deadline | None = None,
+        storage: Storage | None = None,
+        cache: FileCache | None = None,
+        fallback_top_k: int = 3,
+        repo_index: RepoIndex | None = None,
+    ) -> None:
+        self.storage = storage or LOCAL_STORAGE
+        self.cache = cache
+        self.fallback_top_k = fallback_top_k
+        self.repo_index = repo_index
+        self.root_path = Path(root)
+        self.fallback_files = _resolve_chat_files(
+            self.root_path, chat_files, self.storage
+        )
+        self.fence = fence
+        self.dry_run = dry_run
+        self.deadline = deadline
+
+        self.failed: list[EditBlockLike] = []
+        self.timed_out: list[EditBlockLike] = []
+        self.passed: list[EditBlockLike] = []
+        self.updated_edits: list[EditBlock] = []
+        self.matches: list[Match] = []
+        self.stats = ApplyStats()
+
+        # Current in-memory content of every file read so far, and the files
+        # changed since the last flush (a dict keeps their order).
+        self._contents: dict[Path, str] = {}
+        self._dirty: dict[Path, None] = {}
+        # Line indexes of the current content, reused by later edits and
+        # fallback scans until the file changes.
+        self._documents: dict[Path, tuple[str, Document]] = {}
+        # For dry runs: every changed file's content before the call (None if
+        # the call creates it) and the line edits made to it since, in order.
+        self._originals: dict[Path, str | None] = {}
+        self._line_edits: dict[Path, list[LineEdit]] = {}
+
+    def apply(self, edit: EditBlockLike) -> BlockResult:
+        full_path = _resolve_path(self.root_path, edit.path, self.storage)
+        match, timed_out = self._apply_to(full_path, edit)
+        return self._finish_edit(edit, match, timed_out)
+
+    def apply_planned(self, edits: Sequence[EditBlockLike]) -> None:
+        """Apply ``edits`` in order, splicing runs of independent blocks at once."""
+        position = 0
+        while position < len(edits):
+            planned = self._plan(
+                ((None, edits[i]) for i in range(position, len(edits))), self.stats
+            )
+            self.stats.planned_edits += len(planned)
+            for edit, match in zip(edits[position:], planned):
+                self._finish_edit(edit, match, False)
+            position += len(planned)
+            if position < len(edits):
+                self.apply(edits[position])
+                position += 1
+
+    def _plan(
+        self, edits: Iterable[tuple[Path | None, EditBlockLike]], stats: ApplyStats
+    ) -> list[Match]:
+        """Splice the longest plannable prefix of ``edits``; return its matches.
+
+        Each edit comes with its resolved path, or None to resolve it here.
+        The blocks aimed at each file are located together by a
+        ``BlockLocator``, in one pass over the file's lines, and those found
+        more than once or nowhere are counted in ``stats``.
+        """
+        # Only edits up to the first escaping path, missing file or empty
+        # SEARCH text can be planned; each is located once it is reached.
+        prefix: list[tuple[Path, str]] = []
+        originals: dict[Path, list[str]] = {}
+        for full_path, edit in edits:
+            if full_path is None:
+                try:
+                    full_path = _resolve_path(self.root_path, edit.path, self.storage)
+                except PathEscapeError:
+                    break
+            if self._read(full_path) is None:
+                break
+            before_text = strip_quoted_wrapping(
+                edit.original, str(full_path), self.fence
+            )
+            if not before_text.strip():
+                break
+            after_text = strip_quoted_wrapping(edit.updated, str(full_path), self.fence)
+            prefix.append((full_path, after_text))
+            originals.setdefault(full_path, []).append(before_text)
+
+        plans: dict[Path, FilePlan] = {}
+        located: dict[Path, Iterator[tuple[list[str], BlockLocation]]] = {}
+        for full_path, texts in originals.items():
+            document = self._document(full_path, self._contents[full_path])
+            locator = BlockLocator(texts)
+            plans[full_path] = FilePlan(document)
+            located[full_path] = zip(locator.patterns, locator.locate(document))
+
+        planned: list[Match] = []
+        for full_path, after_text in prefix:
+            part_lines, location = next(located[full_path])
+            stats.located_blocks += 1
+            stats.ambiguous_blocks += location.ambiguous
+            stats.missing_blocks += location.missing
+            plan = plans[full_path]
+            start = location.exact[0] if location.exact else -1
+            match = plan.add(part_lines, prep(after_text)[1], start)
+            if match is None:
+                break
+            planned.append(match)
+            if self.dry_run:
+                # Only the first block sees the content before the plan.
+                before = self._contents[full_path] if len(plan) == 1 else None
+                self._record(full_path, before, match, plan.document.text)
+
+        for full_path, plan in plans.items():
+            if plan:
+                self._contents[full_path] = plan.splice()
+                self._dirty[full_path] = None
+        return planned
+
+    def apply_parallel(self, edits: Sequence[EditBlockLike], max_workers: int) -> None:
+        """Apply ``edits`` with each file's chain of edits on a worker thread.
+
+        Edits to the same file keep their relative order, so the outcome is
+        the one of applying them in order. A fallback could move an edit into
+        another file's chain, so with fallbacks the edits run sequentially.
+        An edit whose path escapes the root raises once the edits before it
+        are applied, as it would sequentially.
+        """
+        if self.fallback_files or self.repo_index is not None:
+            self.apply_planned(edits)
+            return
+
+        full_paths: list[Path] = []
+        escape: PathEscapeError | None = None
+        for edit in edits:
+            try:
+                full_paths.append(
+                    _resolve_path(self.root_path, edit.path, self.storage)
+                )
+            except PathEscapeError as exc:
+                escape = exc
+                break
+        edits = edits[: len(full_paths)]
+
+        chains: dict[Path, list[int]] = {}
+        for index, full_path in enumerate(full_paths):
+            chains.setdefault(full_path, []).append(index)
+
+        outcomes: list[tuple[Match | None, bool]] = [(None, False)] * len(edits)
+        # Each chain counts into its own stats, added up on this thread.
+        chain_stats: list[ApplyStats] = []
+
+        def run_chain(full_path: Path, indexes: list[int]) -> None:
+            stats = ApplyStats()
+            chain_stats.append(stats)
+            position = 0
+            while position < len(indexes):
+                planned = self._plan(
+                    ((full_path, edits[index]) for index in indexes[position:]),
+                    stats,
+                )
+                stats.planned_edits += len(planned)
+                for index, match in zip(indexes[position:], planned):
+                    outcomes[index] = (match, False)
+                position += len(planned)
+                if position < len(indexes):
+                    index = indexes[position]
+                    outcomes[index] = self._apply_to(
+                        full_path, edits[index], stats=stats
+                    )
+                    position += 1
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(run_chain, full_path, indexes)
+                for full_path, indexes in chains.items()
+            ]
+            try:
+                for future in futures:
+                    future.result()
+                for stats in chain_stats:
+                    self.stats.planned_edits += stats.planned_edits
+                    self.stats.located_blocks += stats.located_blocks
+                    self.stats.ambiguous_blocks += stats.ambiguous_blocks
+                    self.stats.missing_blocks += stats.missing_blocks
+                    self.stats.fuzzy_scored += stats.fuzzy_scored
+                    self.stats.fuzzy_pruned += stats.fuzzy_pruned
+                for edit, (match, timed_out) in zip(edits, outcomes):
+                    self._finish_edit(edit, match, timed_out)
+            finally:
+                self.flush(executor)
+        if escape is not None:
+            raise escape
+
+    def _apply_to(
+        self,
+        full_path: Path,
+        edit: EditBlockLike,
+        fuzzy: bool = True,
+        stats: ApplyStats | None = None,
+    ) -> tuple[Match | None, bool]:
+        """Try ``edit`` against ``full_path``; return (its match, timed out).
+
+        Matching work is counted in ``stats``, by default the session's.
+        """
+        content = self._read(full_path)
+        original = edit.original
 
-        # If the edit failed, and this is not a "create a new file" with an empty original...
+        # An empty SEARCH on a missing file creates it.
+        if content is None and original.strip():
+            return None, False
+
+        try:
+            matched = self._match(
+                full_path,
+                content or "",
+                original,
+                edit.updated,
+                fuzzy,
+                stats if stats is not None else self.stats,
+            )
+        except BudgetExceededError:
+            return None, True
+
+        if matched is None:
+            return None, False
+        match, text = matched
+        new_content = match.apply(text)
+        if not new_content:
+            return None, False
+
+        if self.dry_run:
+            self._record(full_path, content, match, text)
+        self._contents[full_path] = new_content
+        self._dirty[full_path] = None
+        return match, False
+
+    def _record(
+        self, full_path: Path, content: str | None, match: Match, text: str
+    ) -> None:
+        """Note the lines ``match`` replaces, for the dry-run preview.
+
+        ``content`` is the file just before the match, if that can differ
+        from ``text``, the content the match applies to.
+        """
+        edits = self._line_edits.get(full_path)
+        if edits is None:
+            self._originals[full_path] = content
+            edits = self._line_edits[full_path] = []
+        if content is not None and content != text:
+            # Matching added the final newline the file was missing.
+            lines = content.splitlines(keepends=True)
+            start = max(0, len(lines) - 1)
+            edits.append((start, len(lines), text.splitlines(keepends=True)[start:]))
+        edits.extend(match_line_edits(match, text))
+
+    def _finish_edit(
+        self, edit: EditBlockLike, match: Match | None, timed_out: bool
+    ) -> BlockResult:
+        path = edit.path
+
+        # If the edit failed, and this is not a "create a new file" with an empty
+        # original...
         # https://github.com/Aider-AI/aider/issues/2258
-        if not new_content and original.strip():
+        if match is None and edit.original.strip() and self.fallback_files:
             # Try patching any of the other files in the chat.
-            for candidate_file in fallback_files:
-                content = candidate_file.read_text(encoding="utf-8")
-                new_content = do_replace(
-                    candidate_file, content, original, updated, fence
-                )
-                if new_content:
-                    path = _make_relative(candidate_file, root_path)
-                    full_path = candidate_file
-                    break
+            candidate_file, match, candidate_timed_out = self._apply_fallback(edit)
+            timed_out = timed_out or candidate_timed_out
+            if candidate_file is not None:
+                path = _make_relative(candidate_file, self.root_path)
+
+        if match is None and edit.original.strip() and self.repo_index is not None:
+            # Look the SEARCH text up in the index of the whole root.
+            candidate_file, match = self._apply_from_index(edit)
+            if candidate_file is not None:
+                path = _make_relative(candidate_file, self.root_path)
+
+        updated_edit = EditBlock(
+            path=path, original=edit.original, updated=edit.updated
+        )
+        self.updated_edits.append(updated_edit)
 
-        updated_edit = EditBlock(path=path, original=original, updated=updated)
-        updated_edits.append(updated_edit)
+        if match is not None:
+            self.passed.append(edit)
+            self.matches.append(match)
+        else:
+            self.failed.append(edit)
+            if timed_out:
+                self.timed_out.append(edit)
+
+        return BlockResult(
+            edit=edit, updated_edit=updated_edit, applied=match is not None, match=match
+        )
+
+    def _apply_fallback(
+        self, edit: EditBlockLike
+    ) -> tuple[Path | None, Match | None, bool]:
+        """Apply ``edit`` to one of the chat files.
+
+        Returns (that file, its match, whether a stage timed out).
+        """
+        # The edit already ran the full cascade against its own file.
+        own_file = _resolve_path(self.root_path, edit.path, self.storage)
+        candidates = [path for path in self.fallback_files if path != own_file]
+        stats = self.stats
+        stats.fallback_edits += 1
+        stats.fallback_candidates += len(candidates)
+
+        # The exact and whitespace-tolerant strategies use the cached line
+        # indexes, so every candidate can afford them, in chat_files order.
+        for candidate_file in candidates:
+            match, _ = self._apply_to(candidate_file, edit, fuzzy=False)
+            if match is not None:
+                return candidate_file, match, False
+
+        ranked = self._rank_fallback_files(edit, candidates)[: self.fallback_top_k]
+        stats.fallback_pruned += len(candidates) - len(ranked)
+        timed_out = False
+        for candidate_file in ranked:
+            stats.fallback_fuzzy += 1
+            match, candidate_timed_out = self._apply_to(candidate_file, edit)
+            timed_out = timed_out or candidate_timed_out
+            if match is not None:
+                return candidate_file, match, timed_out
+        return None, None, timed_out
+
+    def _apply_from_index(
+        self, edit: EditBlockLike
+    ) -> tuple[Path | None, Match | None]:
+        """Apply ``edit`` to a file the repo index says holds its SEARCH lines."""
+        assert self.repo_index is not None
+        self.stats.index_lookups += 1
+        before_text = strip_quoted_wrapping(edit.original, edit.path, self.fence)
+        tried = set(self.fallback_files)
+        tried.add(_resolve_path(self.root_path, edit.path, self.storage))
+        for indexed_file in self.repo_index.find_files(before_text, exclude=tried):
+            try:
+                candidate_file = _resolve_path(
+                    self.root_path, indexed_file, self.storage
+                )
+            except PathEscapeError:
+                continue
+            if candidate_file in tried:
+                continue
+            # The index only proves the lines exist; exact matching confirms
+            # they form the block.
+            match, _ = self._apply_to(candidate_file, edit, fuzzy=False)
+            if match is not None:
+                self.stats.index_recovered += 1
+                return candidate_file, match
+        return None, None
+
+    def _rank_fallback_files(
+        self, edit: EditBlockLike, candidate_files: list[Path]
+    ) -> list[Path]:
+        """Order the existing ``candidate_files`` by how likely they hold the block.
+
+        Files containing the SEARCH text verbatim come first, then those with
+        its rarest line (the one found in the fewest candidates), then by the
+        share of its lines they contain; ties keep the chat_files order.
+        """
+        candidates: list[tuple[Path, bool, set[str], int]] = []
+        for candidate_file in candidate_files:
+            content = self._read(candidate_file)
+            if content is None:
+                continue
+            before_text = strip_quoted_wrapping(
+                edit.original, str(candidate_file), self.fence
+            )
+            _, part_lines = prep(before_text)
+            part_keys = {line.lstrip() for line in part_lines} - {""}
+            file_keys = self._document(candidate_file, content).normalized.positions
+            shared = {key for key in part_keys if key in file_keys}
+            candidates.append(
+                (candidate_file, before_text in content, shared, len(part_keys))
+            )
 
-        if new_content:
-            if not dry_run:
-                full_path.write_text(new_content, encoding="utf-8")
-            passed.append(edit)
+        frequency = Counter(key for *_, shared, _ in candidates for key in shared)
+        rarest = min(frequency, key=lambda key: (frequency[key], key), default=None)
+
+        def rank(
+            candidate: tuple[Path, bool, set[str], int],
+        ) -> tuple[bool, bool, float]:
+            _, substring, shared, total = candidate
+            overlap = len(shared) / total if total else 0.0
+            return substring, rarest in shared, overlap
+
+        # sorted() is stable in reverse too, so ties keep the chat_files order.
+        ranked = sorted(candidates, key=rank, reverse=True)
+        return [candidate[0] for candidate in ranked]
+
+    def apply_now(self, edit: EditBlockLike) -> BlockResult:
+        """Apply ``edit`` and write its file straight away."""
+        try:
+            return self.apply(edit)
+        finally:
+            self.flush()
+
+    def flush(self, executor: ThreadPoolExecutor | None = None) -> None:
+        """Write every file changed since the last flush."""
+        dirty, self._dirty = self._dirty, {}
+        if self.dry_run:
+            return
+        if executor is not None:
+            list(executor.map(self._write, dirty))
+            return
+        for path in dirty:
+            self._write(path)
+
+    def _write(self, path: Path) -> None:
+        content = self._contents[path]
+        self.storage.write(path, content)
+        if self.cache is not None:
+            cached = self._documents.get(path)
+            document = None
+            if cached is not None and cached[0] == content:
+                document = cached[1]
+            self.cache.store(path, content, self.storage.fingerprint(path), document)
+
+    def _read(self, path: Path) -> str | None:
+        if path in self._contents:
+            return self._contents[path]
+        if self.cache is not None:
+            content = self.cache.read(path, self.storage)
+            if content is None:
+                return None
+        elif not self.storage.exists(path):
+            return None
         else:
-            failed.append(edit)
+            content = self.storage.read(path)
+        self._contents[path] = content
+        return content
+
+    def _match(
+        self,
+        path: Path,
+        content: str,
+        original: str,
+        updated: str,
+        fuzzy: bool,
+        stats: ApplyStats,
+    ) -> tuple[Match, str] | None:
+        before_text = strip_quoted_wrapping(original, str(path), self.fence)
+        after_text = strip_quoted_wrapping(updated, str(path), self.fence)
+        document = None
+        if before_text.strip():
+            document = self._document(path, content)
+        return _match_content(
+            content, before_text, after_text, document, self.deadline, fuzzy, stats
+        )
 
-    if not failed:
-        return ApplyResult(updated_edits=updated_edits)
+    def _document(self, path: Path, content: str) -> Document:
+        cached = self._documents.get(path)
+        if cached is not None and cached[0] == content:
+            return cached[1]
+        document = None
+        if self.cache is not None:
+            document = self.cache.document(path, content)
+        if document is None:
+            document = Document(content)
+        self._documents[path] = (content, document)
+        return document
+
+    def finish(self) -> ApplyResult:
+        if not self.failed:
+            return ApplyResult(
+                updated_edits=self.updated_edits,
+                stats=self.stats,
+                matches=self.matches,
+                preview=self._preview(),
+            )
 
-    blocks = "block" if len(failed) == 1 else "blocks"
-    result = f"# {len(failed)} SEARCH/REPLACE {blocks} failed to match!\n"
-    for edit in failed:
-        path = edit.path
-        original = edit.original
-        updated = edit.updated
+        report = _FailureReport(self)
+        raise ApplyError(
+            message=report.render,
+            failed=self.failed,
+            passed=self.passed,
+            updated_edits=self.updated_edits,
+            timed_out=self.timed_out,
+            stats=self.stats,
+            hints=report.did_you_mean,
+            matches=self.matches,
+            preview=self._preview(),
+        )
+
+    def _preview(self) -> DiffPreview | None:
+        if not self.dry_run:
+            return None
+        paths = {
+            full_path: _make_relative(full_path, self.root_path)
+            for full_path in self._line_edits
+        }
+        return DiffPreview(
+            {paths[full_path]: self._originals[full_path] for full_path in paths},
+            {paths[full_path]: edits for full_path, edits in self._line_edits.items()},
+        )
+
+
+class _FailureReport:
+    """Builds the ``ApplyError`` message from a finished session, on demand.
 
-        full_path = _resolve_path(root_path, path)
-        content = full_path.read_text(encoding="utf-8")
+    Keeps only what the message needs, not the session's line indexes. The
+    overall deadline has passed by the time the report is read, so the "did
+    you mean" hints are bounded by the ``"did_you_mean"`` budget alone.
+    """
+
+    def __init__(self, session: _ApplySession) -> None:
+        self.failed = session.failed
+        self.passed = session.passed
+        self.fence = session.fence
+        self.dry_run = session.dry_run
+        self.root_path = session.root_path
+        self.storage = session.storage
+        self.contents = session._contents
+        budgets = session.deadline.strategy_budgets_ms if session.deadline else {}
+        self.hint_budgets = budgets if "did_you_mean" in budgets else None
+        self._hints: dict[EditBlockLike, str] = {}
+
+    def did_you_mean(self, edit: EditBlockLike) -> str:
+        if edit not in self._hints:
+            self._hints[edit] = self._find_hint(edit.original, self._content(edit))
+        return self._hints[edit]
+
+    def _content(self, edit: EditBlockLike) -> str:
+        full_path = _resolve_path(self.root_path, edit.path, self.storage)
+        return self.contents.get(full_path, "")
+
+    def _find_hint(self, original: str, content: str) -> str:
+        if self.hint_budgets is None:
+            return find_similar_lines(original, content)
+        deadline = Deadline(None, self.hint_budgets).for_strategy("did_you_mean")
+        try:
+            return find_similar_lines(original, content, deadline=deadline)
+        except BudgetExceededError:
+            return ""
+
+    def render(self) -> str:
+        failed = self.failed
+        passed = self.passed
+        fence = self.fence
+
+        blocks = "block" if len(failed) == 1 else "blocks"
+        result = f"# {len(failed)} SEARCH/REPLACE {blocks} failed to match!\n"
+        for edit in failed:
+            path = edit.path
+            original = edit.original
+            updated = edit.updated
+            content = self._content(edit)
 
-        result += f"""
+            result += f"""
 ## SearchReplaceNoExactMatch: This SEARCH block failed to exactly match lines in {path}
 <<<<<<< SEARCH
 {original}=======
 {updated}>>>>>>> REPLACE
 
 """
-        did_you_mean = find_similar_lines(original, content)
-        if did_you_mean:
-            result += f"""Did you mean to match some of these actual lines from {path}?
+            did_you_mean = self.did_you_mean(edit)
+            if did_you_mean:
+                question = "Did you mean to match some of these actual lines from"
+                question += f" {path}?"
+                result += f"""{question}
 
 {fence[0]}
 {did_you_mean}
@@ -350,41 +1074,40 @@ def apply_edits(
 
 """
 
-        if updated in content and updated:
-            result += f"""Are you sure you need this SEARCH/REPLACE block?
+            if updated in content and updated:
+                result += f"""Are you sure you need this SEARCH/REPLACE block?
 The REPLACE lines are already in {path}!
 
 """
 
-    result += (
-        "The SEARCH section must exactly match an existing block of lines including all white"
-        " space, comments, indentation, docstrings, etc\n"
-    )
-    if passed:
-        passed_blocks = "block" if len(passed) == 1 else "blocks"
-        if dry_run:
-            result += f"""
+        result += (
+            "The SEARCH section must exactly match an existing block of lines"
+            " including all white space, comments, indentation, docstrings, etc\n"
+        )
+        if passed:
+            passed_blocks = "block" if len(passed) == 1 else "blocks"
+            if self.dry_run:
+                result += f"""
 # The other {len(passed)} SEARCH/REPLACE {passed_blocks} would apply successfully.
 """
-        else:
-            result += f"""
+            else:
+                result += f"""
 # The other {len(passed)} SEARCH/REPLACE {passed_blocks} were applied successfully.
 Don't re-send them.
 Just reply with fixed versions of the {blocks} above that failed to match.
 """
-
-    raise ApplyError(
-        message=result, failed=failed, passed=passed, updated_edits=updated_edits
-    )
+        return result
 
 
-def _resolve_path(root_path: Path, path: str | Path) -> Path:
-    resolved_root = root_path.resolve()
+def _resolve_path(
+    root_path: Path, path: str | Path, storage: Storage = LOCAL_STORAGE
+) -> Path:
+    resolved_root = storage.resolve(root_path)
     file_path = Path(path)
     if file_path.is_absolute():
-        resolved_path = file_path.resolve()
+        resolved_path = storage.resolve(file_path)
     else:
-        resolved_path = (resolved_root / file_path).resolve()
+        resolved_path = storage.resolve(resolved_root / file_path)
 
     try:
         resolved_path.relative_to(resolved_root)
@@ -400,13 +1123,14 @@ def _resolve_path(root_path: Path, path: str | Path) -> Path:
 def _resolve_chat_files(
     root_path: Path,
     chat_files: Sequence[str | Path] | None,
+    storage: Storage = LOCAL_STORAGE,
 ) -> list[Path]:
     if chat_files is None:
         return []
 
     resolved_paths: list[Path] = []
     for chat_file in chat_files:
-        resolved_paths.append(_resolve_path(root_path, chat_file))
+        resolved_paths.append(_resolve_path(root_path, chat_file, storage))
     return resolved_paths
 
 
@@ -421,15 +1145,122 @@ def apply_diff(
     llm_response: str,
     root: str | Path,
     chat_files: Sequence[str | Path] | None = None,
-    fence: Fence = DEFAULT_FENCE,
+    fence: FenceOption = DEFAULT_FENCE,
+    deadline: float | None = None,
+    budget_ms: float | None = None,
+    strategy_budgets_ms: Mapping[str, float] | None = None,
+    max_workers: int | None = None,
+    storage: Storage | None = None,
+    cache: FileCache | None = None,
+    fallback_top_k: int = 3,
+    repo_index: RepoIndex | None = None,
 ) -> ApplyResult:
     """Parse SEARCH/REPLACE blocks from an LLM response and apply them to disk.
 
     Convenience wrapper around ``parse_edit_blocks`` + ``apply_edits``.
     Raises ``ParseError`` if the response contains no valid blocks or has
     malformed syntax, and ``ApplyError`` if one or more blocks fail to match.
+    ``fence="auto"`` detects the fence from the response with ``detect_fence``.
+    See ``apply_edits`` for the time budget, ``max_workers``, ``storage``,
+    ``cache``, ``fallback_top_k`` and ``repo_index`` options.
     """
+    if fence == "auto":
+        fence = detect_fence(llm_response)
     result = parse_edit_blocks(llm_response, fence=fence)
     if not result.edits:
         raise ParseError("No SEARCH/REPLACE blocks found in the LLM response.")
-    return apply_edits(result.edits, root=root, chat_files=chat_files, fence=fence)
+    return apply_edits(
+        result.edits,
+        root=root,
+        chat_files=chat_files,
+        fence=fence,
+        deadline=deadline,
+        budget_ms=budget_ms,
+        strategy_budgets_ms=strategy_budgets_ms,
+        max_workers=max_workers,
+        storage=storage,
+        cache=cache,
+        fallback_top_k=fallback_top_k,
+        repo_index=repo_index,
+    )
+
+
+def apply_stream(
+    chunks: Iterable[str],
+    root: str | Path,
+    chat_files: Sequence[str | Path] | None = None,
+    fence: Fence = DEFAULT_FENCE,
+    dry_run: bool = False,
+    on_block: Callable[[BlockResult], None] | None = None,
+    storage: Storage | None = None,
+    cache: FileCache | None = None,
+) -> ApplyResult:
+    """Parse and apply SEARCH/REPLACE blocks while the LLM response streams in.
+
+    Each block is applied as soon as its ``>>>>>>> REPLACE`` line arrives and
+    ``on_block`` is called with its ``BlockResult``. Once the stream ends the
+    outcome is reported exactly like ``apply_diff``: an ``ApplyResult``, or an
+    ``ApplyError`` listing the blocks that failed to match.
+
+    A ``ParseError`` part-way through the stream is raised as soon as it is
+    detected; blocks that completed before it have already been applied.
+    """
+    parser = StreamingBlockParser(fence=fence)
+    session = _ApplySession(
+        root, chat_files, fence, dry_run, storage=storage, cache=cache
+    )
+
+    for chunk in chunks:
+        for edit in parser.feed(chunk):
+            _apply_streamed_edit(session, edit, on_block)
+    for edit in parser.close():
+        _apply_streamed_edit(session, edit, on_block)
+
+    if not session.updated_edits:
+        raise ParseError("No SEARCH/REPLACE blocks found in the LLM response.")
+    return session.finish()
+
+
+async def apply_stream_async(
+    chunks: AsyncIterable[str],
+    root: str | Path,
+    chat_files: Sequence[str | Path] | None = None,
+    fence: Fence = DEFAULT_FENCE,
+    dry_run: bool = False,
+    on_block: Callable[[BlockResult], None] | None = None,
+    storage: Storage | None = None,
+    cache: FileCache | None = None,
+) -> ApplyResult:
+    """Async-iterator version of ``apply_stream``.
+
+    Matching and file I/O run in a worker thread so the event loop keeps
+    receiving chunks while a block is being applied.
+    """
+    parser = StreamingBlockParser(fence=fence)
+    session = _ApplySession(
+        root, chat_files, fence, dry_run, storage=storage, cache=cache
+    )
+
+    async for chunk in chunks:
+        for edit in parser.feed(chunk):
+            block_result = await asyncio.to_thread(session.apply_now, edit)
+            if on_block is not None:
+                on_block(block_result)
+    for edit in parser.close():
+        block_result = await asyncio.to_thread(session.apply_now, edit)
+        if on_block is not None:
+            on_block(block_result)
+
+    if not session.updated_edits:
+        raise ParseError("No SEARCH/REPLACE blocks found in the LLM response.")
+    return session.finish()
+
+
+def _apply_streamed_edit(
+    session: _ApplySession,
+    edit: EditBlock,
+    on_block: Callable[[BlockResult], None] | None,
+) -> None:
+    block_result = session.apply_now(edit)
+    if on_block is not None:
+        on_block(block_result)
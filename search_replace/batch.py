@@ -0,0 +1,148 @@
+import itertools
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Iterable, Iterator, TextIO
+
+from .errors import ParseError
+from .filenames import FilenameIndex
+from .parser import ValidFilenames, _filename_index, parse_edit_blocks
+from .types import DEFAULT_FENCE, EditBlock, FenceOption
+
+
+@dataclass(frozen=True, slots=True)
+class ParseOutcome:
+    """What ``parse_many`` got out of one response."""
+
+    edits: list[EditBlock]
+    error: ParseError | None = None
+
+
+@dataclass(slots=True)
+class ParseStats:
+    """Running totals of a ``parse_many`` run, updated as results are yielded."""
+
+    responses: int = 0
+    blocks: int = 0
+    errors: int = 0
+    elapsed: float = 0.0
+    _started: float = field(default_factory=time.perf_counter, repr=False)
+
+    @property
+    def blocks_per_second(self) -> float:
+        return self.blocks / self.elapsed if self.elapsed else 0.0
+
+    def _record(self, outcome: ParseOutcome) -> None:
+        self.responses += 1
+        self.blocks += len(outcome.edits)
+        if outcome.error is not None:
+            self.errors += 1
+        self.elapsed = time.perf_counter() - self._started
+
+
+# Set once per worker process, so valid_fnames is pickled once per worker
+# rather than once per chunk.
+_worker_fence: FenceOption = DEFAULT_FENCE
+_worker_fnames: FilenameIndex | None = None
+
+
+def _init_worker(fence: FenceOption, valid_fnames: FilenameIndex | None) -> None:
+    global _worker_fence, _worker_fnames
+    _worker_fence = fence
+    _worker_fnames = valid_fnames
+
+
+def _parse_chunk(responses: tuple[str, ...]) -> list[ParseOutcome]:
+    return [
+        _parse_one(response, _worker_fence, _worker_fnames) for response in responses
+    ]
+
+
+def _parse_one(
+    response: str, fence: FenceOption, valid_fnames: FilenameIndex | None
+) -> ParseOutcome:
+    try:
+        result = parse_edit_blocks(response, fence=fence, valid_fnames=valid_fnames)
+    except ParseError as exc:
+        return ParseOutcome(edits=[], error=exc)
+    return ParseOutcome(edits=result.edits)
+
+
+def parse_many(
+    responses: Iterable[str],
+    fence: FenceOption = DEFAULT_FENCE,
+    valid_fnames: ValidFilenames | None = None,
+    workers: int | None = None,
+    chunksize: int = 64,
+    stats: ParseStats | None = None,
+) -> Iterator[ParseOutcome]:
+    """Parse many responses on a process pool, yielding outcomes in input order.
+
+    A response that fails to parse yields a ``ParseOutcome`` carrying its
+    ``ParseError`` instead of stopping the batch. ``responses`` is consumed
+    lazily, ``chunksize`` responses per task, with at most two tasks per
+    worker in flight. ``workers=1`` parses in the calling process. Pass a
+    ``ParseStats`` to follow the totals and throughput.
+    """
+    index = _filename_index(valid_fnames)
+    if stats is None:
+        stats = ParseStats()
+    if workers is None:
+        workers = os.process_cpu_count() or 1
+
+    if workers == 1:
+        for response in responses:
+            outcome = _parse_one(response, fence, index)
+            stats._record(outcome)
+            yield outcome
+        return
+
+    pool = ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(fence, index)
+    )
+    pending: deque[Future[list[ParseOutcome]]] = deque()
+    try:
+        for chunk in itertools.batched(responses, chunksize):
+            pending.append(pool.submit(_parse_chunk, chunk))
+            if len(pending) < 2 * workers:
+                continue
+            for outcome in pending.popleft().result():
+                stats._record(outcome)
+                yield outcome
+        while pending:
+            for outcome in pending.popleft().result():
+                stats._record(outcome)
+                yield outcome
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def parse_jsonl(
+    infile: TextIO,
+    outfile: TextIO,
+    key: str = "response",
+    fence: FenceOption = DEFAULT_FENCE,
+    valid_fnames: ValidFilenames | None = None,
+    workers: int | None = None,
+    chunksize: int = 64,
+) -> ParseStats:
+    """Parse the ``key`` field of every JSON object in ``infile``.
+
+    Writes one JSON object per input line to ``outfile``, in the same order:
+    ``{"index": ..., "edits": [{"path", "original", "updated"}, ...],
+    "error": <message or null>}``. Blank input lines are skipped.
+    """
+    stats = ParseStats()
+    responses = (json.loads(line)[key] for line in infile if line.strip())
+    outcomes = parse_many(responses, fence, valid_fnames, workers, chunksize, stats)
+    for index, outcome in enumerate(outcomes):
+        record = {
+            "index": index,
+            "edits": [asdict(edit) for edit in outcome.edits],
+            "error": None if outcome.error is None else str(outcome.error),
+        }
+        outfile.write(json.dumps(record) + "\n")
+    return stats
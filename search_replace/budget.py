@@ -0,0 +1,68 @@
+import time
+from typing import Mapping
+
+from .errors import BudgetExceededError
+
+# Stages that stop cooperatively once their budget runs out.
+STRATEGY_NAMES = ("fuzzy", "did_you_mean")
+
+
+class Deadline:
+    """Point in ``time.monotonic()`` time after which expensive matching stops.
+
+    ``strategy_budgets_ms`` caps how long a single run of one of the
+    ``STRATEGY_NAMES`` stages may take, on top of the overall deadline.
+    """
+
+    __slots__ = ("expires_at", "strategy_budgets_ms")
+
+    def __init__(
+        self,
+        expires_at: float | None = None,
+        strategy_budgets_ms: Mapping[str, float] | None = None,
+    ) -> None:
+        budgets = dict(strategy_budgets_ms or {})
+        unknown = sorted(set(budgets) - set(STRATEGY_NAMES))
+        if unknown:
+            raise ValueError(
+                f"Unknown strategy budget(s) {', '.join(unknown)};"
+                f" expected one of {', '.join(STRATEGY_NAMES)}."
+            )
+        self.expires_at = expires_at
+        self.strategy_budgets_ms = budgets
+
+    @classmethod
+    def create(
+        cls,
+        deadline: float | None = None,
+        budget_ms: float | None = None,
+        strategy_budgets_ms: Mapping[str, float] | None = None,
+    ) -> "Deadline | None":
+        """Combine an absolute deadline and a relative budget, keeping the earlier."""
+        if deadline is None and budget_ms is None and not strategy_budgets_ms:
+            return None
+
+        expires_at = deadline
+        if budget_ms is not None:
+            budget_end = time.monotonic() + budget_ms / 1000
+            if expires_at is None or budget_end < expires_at:
+                expires_at = budget_end
+        return cls(expires_at, strategy_budgets_ms)
+
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def check(self) -> None:
+        if self.expired():
+            raise BudgetExceededError("Time budget exhausted.")
+
+    def for_strategy(self, name: str) -> "Deadline":
+        """Deadline for one run of ``name``, starting now."""
+        budget_ms = self.strategy_budgets_ms.get(name)
+        if budget_ms is None:
+            return self
+
+        expires_at = time.monotonic() + budget_ms / 1000
+        if self.expires_at is not None and self.expires_at < expires_at:
+            expires_at = self.expires_at
+        return Deadline(expires_at, self.strategy_budgets_ms)
@@ -0,0 +1,124 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .document import Document
+from .storage import Storage
+
+
+@dataclass(slots=True)
+class _Entry:
+    fingerprint: tuple[int, int]
+    content: str
+    # Bytes charged against max_bytes: the encoded content, plus the
+    # estimated size of the document once one is attached.
+    size: int
+    document: Document | None = field(default=None)
+
+
+class FileCache:
+    """Decoded file contents and their line indexes, shared across apply calls.
+
+    An entry is reused while the file's ``(mtime_ns, size)`` fingerprint is
+    unchanged. Entries are evicted least-recently-used first once they exceed
+    ``max_bytes``: each counts its content as UTF-8 bytes plus, once its line
+    indexes are cached, ``Document.estimated_size``. A document that would not
+    fit on its own is returned without being cached. Safe to share between
+    threads.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Path, _Entry] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def read(self, path: Path, storage: Storage) -> str | None:
+        """Return the content of ``path``, or ``None`` if it does not exist."""
+        try:
+            fingerprint = storage.fingerprint(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._discard(path)
+            return None
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.fingerprint == fingerprint:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry.content
+            self.misses += 1
+
+        content = storage.read(path)
+        self.store(path, content, fingerprint)
+        return content
+
+    def document(self, path: Path, content: str) -> Document | None:
+        """The cached ``Document`` of ``path`` if ``content`` is what is cached."""
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry.content != content:
+                return None
+            self._entries.move_to_end(path)
+            if entry.document is not None:
+                return entry.document
+            document = Document(content)
+            self._attach(entry, document)
+            return document
+
+    def store(
+        self,
+        path: Path,
+        content: str,
+        fingerprint: tuple[int, int],
+        document: Document | None = None,
+    ) -> None:
+        with self._lock:
+            self._discard(path)
+            size = len(content.encode("utf-8", "surrogatepass"))
+            if size > self.max_bytes:
+                return
+            entry = self._entries[path] = _Entry(fingerprint, content, size)
+            self._size += size
+            if document is not None:
+                self._attach(entry, document)
+            self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _attach(self, entry: _Entry, document: Document) -> None:
+        """Cache ``document`` with ``entry`` if both fit in ``max_bytes``."""
+        document_size = document.estimated_size()
+        if entry.size + document_size > self.max_bytes:
+            return
+        entry.document = document
+        entry.size += document_size
+        self._size += document_size
+        self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache fits ``max_bytes``."""
+        while self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= evicted.size
+            self.evictions += 1
+
+    def _discard(self, path: Path) -> None:
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._size -= entry.size
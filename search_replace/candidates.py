@@ -0,0 +1,149 @@
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Sequence
+
+from .apply import apply_edits
+from .cache import FileCache
+from .errors import ApplyError, ParseError, PathEscapeError, SearchReplaceError
+from .parser import detect_fence, parse_edit_blocks
+from .preview import DiffPreview
+from .storage import LOCAL_STORAGE, Storage
+from .types import DEFAULT_FENCE, EditBlock, EditBlockLike, FenceOption, Match
+
+
+@dataclass(frozen=True, slots=True)
+class CandidateResult:
+    """How one response of ``evaluate_candidates`` would apply."""
+
+    # Position of the response in the ``responses`` given.
+    index: int
+    edits: list[EditBlock]
+    matches: list[Match] = field(default_factory=list)
+    failed: list[EditBlockLike] = field(default_factory=list)
+    # ParseError, PathEscapeError or ApplyError; None if every block applies.
+    error: SearchReplaceError | None = None
+    preview: DiffPreview | None = None
+
+    @property
+    def applies(self) -> bool:
+        return self.error is None
+
+    @property
+    def matched(self) -> int:
+        return len(self.matches)
+
+    @property
+    def strategies(self) -> Counter[str]:
+        return Counter(match.strategy for match in self.matches)
+
+    @property
+    def similarity(self) -> float:
+        """The lowest similarity of the matched blocks; 0.0 if none matched."""
+        return min((match.similarity for match in self.matches), default=0.0)
+
+
+class _Snapshot:
+    """Read-only view of ``storage`` in which each file is read at most once.
+
+    The first read of a path, or the first check that it exists, fixes what
+    every later caller sees, so all candidates work on the same contents.
+    """
+
+    def __init__(self, storage: Storage) -> None:
+        self.storage = storage
+        self._files: dict[Path, str | None] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, path: Path) -> Path:
+        return self.storage.resolve(path)
+
+    def fingerprint(self, path: Path) -> tuple[int, int]:
+        # Contents never change, so their length is enough.
+        return 0, len(self.read(path))
+
+    def exists(self, path: Path) -> bool:
+        return self._load(path) is not None
+
+    def read(self, path: Path) -> str:
+        content = self._load(path)
+        if content is None:
+            raise FileNotFoundError(str(path))
+        return content
+
+    def write(self, path: Path, content: str) -> None:
+        raise PermissionError(f"{path} is part of a read-only snapshot")
+
+    def create(self, path: Path) -> None:
+        raise PermissionError(f"{path} is part of a read-only snapshot")
+
+    def _load(self, path: Path) -> str | None:
+        with self._lock:
+            if path in self._files:
+                return self._files[path]
+        content = self.storage.read(path) if self.storage.exists(path) else None
+        with self._lock:
+            return self._files.setdefault(path, content)
+
+
+def evaluate_candidates(
+    responses: Sequence[str],
+    root: str | Path,
+    chat_files: Sequence[str | Path] | None = None,
+    fence: FenceOption = DEFAULT_FENCE,
+    storage: Storage | None = None,
+    max_workers: int | None = None,
+    fallback_top_k: int = 3,
+) -> list[CandidateResult]:
+    """Dry-run several LLM responses against the same files; best first.
+
+    The candidates run on a thread pool against one read-only snapshot of
+    ``storage``: each file is read once, by whichever candidate needs it
+    first, and its line indexes are built once in a ``FileCache`` they all
+    share. Nothing is written and no candidate sees another's changes.
+    Candidates that apply cleanly come first, then those matching more
+    blocks, then those whose worst match is most similar; ties keep the
+    order of ``responses``. ``fence="auto"`` detects the fence of each
+    response separately.
+    """
+    snapshot = _Snapshot(storage or LOCAL_STORAGE)
+    cache = FileCache()
+
+    def evaluate(index: int) -> CandidateResult:
+        response = responses[index]
+        response_fence = detect_fence(response) if fence == "auto" else fence
+        try:
+            edits = parse_edit_blocks(response, fence=response_fence).edits
+            if not edits:
+                raise ParseError("No SEARCH/REPLACE blocks found in the LLM response.")
+        except ParseError as exc:
+            return CandidateResult(index, [], error=exc)
+        try:
+            result = apply_edits(
+                edits,
+                root,
+                chat_files=chat_files,
+                fence=response_fence,
+                dry_run=True,
+                storage=snapshot,
+                cache=cache,
+                fallback_top_k=fallback_top_k,
+            )
+        except ApplyError as exc:
+            return CandidateResult(
+                index, edits, exc.matches, exc.failed, exc, exc.preview
+            )
+        except PathEscapeError as exc:
+            return CandidateResult(index, edits, error=exc)
+        return CandidateResult(index, edits, result.matches, preview=result.preview)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(evaluate, range(len(responses))))
+
+    def rank(result: CandidateResult) -> tuple[bool, int, float]:
+        return result.applies, result.matched, result.similarity
+
+    # sorted() is stable in reverse too, so ties keep the order of responses.
+    return sorted(results, key=rank, reverse=True)
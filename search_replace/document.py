@@ -0,0 +1,139 @@
+from bisect import bisect_left, bisect_right
+from functools import cached_property
+from itertools import accumulate
+from typing import Iterator
+
+from .types import Span
+
+
+def prep(content: str) -> tuple[str, list[str]]:
+    if content and not content.endswith("\n"):
+        content += "\n"
+    lines = content.splitlines(keepends=True)
+    return content, lines
+
+
+def _index_lines(lines: list[str]) -> dict[str, list[int]]:
+    positions: dict[str, list[int]] = {}
+    for index, line in enumerate(lines):
+        positions.setdefault(line, []).append(index)
+    return positions
+
+
+def _iter_windows(
+    lines: list[str], positions: dict[str, list[int]], part_lines: list[str]
+) -> Iterator[int]:
+    """Yield, in ascending order, every offset where ``part_lines`` occur in ``lines``.
+
+    Only the offsets of the rarest line of ``part_lines`` are considered, and
+    each of them is verified against the full window.
+    """
+    part_len = len(part_lines)
+    anchor = 0
+    anchor_hits: list[int] | None = None
+    for offset, line in enumerate(part_lines):
+        hits = positions.get(line)
+        if hits is None:
+            return
+        if anchor_hits is None or len(hits) < len(anchor_hits):
+            anchor = offset
+            anchor_hits = hits
+            if len(hits) == 1:
+                break
+
+    if anchor_hits is None:
+        return
+
+    last_start = len(lines) - part_len
+    for hit in anchor_hits:
+        start = hit - anchor
+        if start < 0:
+            continue
+        if start > last_start:
+            break
+        if lines[start : start + part_len] == part_lines:
+            yield start
+
+
+class LineIndex:
+    """Maps every distinct line of a file to the offsets where it occurs.
+
+    Finding a block only has to look at the offsets of its rarest line instead
+    of sliding a window over the whole file.
+    """
+
+    __slots__ = ("lines", "positions")
+
+    def __init__(self, lines: list[str]) -> None:
+        self.lines = lines
+        self.positions = _index_lines(lines)
+
+    def find(self, part_lines: list[str]) -> int:
+        """Return the first offset where ``part_lines`` occur verbatim, or -1."""
+        if not part_lines:
+            return 0
+        return next(_iter_windows(self.lines, self.positions, part_lines), -1)
+
+
+class NormalizedLines:
+    """Whitespace-insensitive view of a file's lines.
+
+    Holds every line without its leading whitespace and an index of the
+    stripped lines, both computed once per file.
+    """
+
+    __slots__ = ("positions", "stripped")
+
+    def __init__(self, lines: list[str]) -> None:
+        self.stripped = [line.lstrip() for line in lines]
+        self.positions = _index_lines(self.stripped)
+
+    def iter_matches(self, part_lines: list[str]) -> Iterator[int]:
+        """Yield every offset whose lines equal ``part_lines`` but for indentation."""
+        part_stripped = [line.lstrip() for line in part_lines]
+        return _iter_windows(self.stripped, self.positions, part_stripped)
+
+
+# Rough memory per line of a fully indexed Document beyond the characters
+# themselves: the line and stripped-line objects, both indexes and the offsets.
+_LINE_OVERHEAD = 320
+
+
+class Document:
+    """A file's content split into lines, plus lookup indexes built on demand.
+
+    Every search against the same content reuses the indexes, so repeated
+    edits, retries and fallback scans of one file only pay for them once.
+    """
+
+    def __init__(self, content: str) -> None:
+        self.text, self.lines = prep(content)
+
+    def estimated_size(self) -> int:
+        """Approximate bytes held once every index is built, built yet or not.
+
+        The lines and their stripped copies hold the text twice over, plus a
+        fixed overhead per line; the text itself is not counted.
+        """
+        return 2 * len(self.text) + _LINE_OVERHEAD * len(self.lines)
+
+    @cached_property
+    def line_index(self) -> LineIndex:
+        return LineIndex(self.lines)
+
+    @cached_property
+    def normalized(self) -> NormalizedLines:
+        return NormalizedLines(self.lines)
+
+    @cached_property
+    def offsets(self) -> list[int]:
+        """Character offset of every line start, plus the length of the text."""
+        return list(accumulate(map(len, self.lines), initial=0))
+
+    def line_span(self, start: int, end: int) -> Span:
+        """The ``(first, last + 1)`` lines covered by ``text[start:end]``."""
+        offsets = self.offsets
+        first = bisect_right(offsets, start) - 1
+        if end <= start:
+            return first, first
+        return first, bisect_left(offsets, end)
@@ -1,6 +1,8 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Callable
 
-from .types import EditBlock
+from .preview import DiffPreview
+from .types import ApplyStats, EditBlock, EditBlockLike, Match
 
 
 class SearchReplaceError(ValueError):
@@ -19,12 +21,65 @@ class PathEscapeError(SearchReplaceError):
     pass
 
 
-@dataclass(slots=True)
+class BudgetExceededError(SearchReplaceError):
+    pass
+
+
+@dataclass(slots=True, init=False)
 class ApplyError(SearchReplaceError):
-    message: str
-    failed: list[EditBlock]
-    passed: list[EditBlock]
+    """One or more edit blocks failed to match.
+
+    The edit lists and ``stats`` are filled in straight away. ``message`` may
+    be passed as a callable instead of a string, in which case the report is
+    only built the first time ``message`` or ``str()`` is read, and then
+    cached, so callers that only look at ``failed`` never pay for it.
+    """
+
+    _message: str | Callable[[], str] = field(repr=False, compare=False)
+    failed: list[EditBlockLike]
+    passed: list[EditBlockLike]
     updated_edits: list[EditBlock]
+    # Failed edits whose expensive matching stages were cut short by the budget.
+    timed_out: list[EditBlockLike]
+    stats: ApplyStats
+    # How each passed edit matched, and for a dry run the diffs they make.
+    matches: list[Match]
+    preview: DiffPreview | None
+    _hints: Callable[[EditBlockLike], str] | None = field(repr=False, compare=False)
+
+    def __init__(
+        self,
+        message: str | Callable[[], str],
+        failed: list[EditBlockLike],
+        passed: list[EditBlockLike],
+        updated_edits: list[EditBlock],
+        timed_out: list[EditBlockLike] | None = None,
+        stats: ApplyStats | None = None,
+        hints: Callable[[EditBlockLike], str] | None = None,
+        matches: list[Match] | None = None,
+        preview: DiffPreview | None = None,
+    ) -> None:
+        self._message = message
+        self.failed = failed
+        self.passed = passed
+        self.updated_edits = updated_edits
+        self.timed_out = timed_out if timed_out is not None else []
+        self.stats = stats if stats is not None else ApplyStats()
+        self._hints = hints
+        self.matches = matches if matches is not None else []
+        self.preview = preview
+
+    @property
+    def message(self) -> str:
+        if not isinstance(self._message, str):
+            self._message = self._message()
+        return self._message
+
+    def did_you_mean(self, edit: EditBlockLike) -> str:
+        """Lines of ``edit``'s file resembling its SEARCH text, or ``""``."""
+        if self._hints is None:
+            return ""
+        return self._hints(edit)
 
     def __str__(self) -> str:
         return self.message
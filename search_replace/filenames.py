@@ -0,0 +1,98 @@
+import bisect
+import difflib
+from collections import Counter
+from functools import cached_property
+from pathlib import Path
+from typing import Iterable
+
+
+class FilenameIndex:
+    """Lookup structures over ``valid_fnames`` for resolving block filenames.
+
+    Built once and reused across blocks and responses. Every lookup returns
+    exactly what the corresponding linear scan over the original list would:
+    the exact name, the first name with a matching basename, or the single
+    best ``difflib.get_close_matches`` hit.
+    """
+
+    def __init__(self, valid_fnames: Iterable[str]) -> None:
+        self.names = list(valid_fnames)
+        self._names = set(self.names)
+        self._basenames: dict[str, str] = {}
+        for name in self.names:
+            self._basenames.setdefault(Path(name).name, name)
+        # Names ordered by length, so the candidates that can pass
+        # get_close_matches' length-only ratio bound are one slice.
+        self._by_length = sorted(self.names, key=len)
+        self._lengths = [len(name) for name in self._by_length]
+        self._close: dict[tuple[str, float], str | None] = {}
+
+    @cached_property
+    def _char_counts(self) -> list[Counter[str]]:
+        # Only needed by close_match, so built on its first use.
+        return [Counter(name) for name in self._by_length]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._names
+
+    def by_basename(self, name: str) -> str | None:
+        return self._basenames.get(name)
+
+    def close_match(self, name: str, cutoff: float = 0.8) -> str | None:
+        key = (name, cutoff)
+        if key not in self._close:
+            self._close[key] = self._find_close_match(name, cutoff)
+        return self._close[key]
+
+    def _find_close_match(self, name: str, cutoff: float) -> str | None:
+        # ratio() <= 2 * min(la, lb) / (la + lb), so lengths outside
+        # [cutoff / (2 - cutoff), (2 - cutoff) / cutoff] * len(name) can never
+        # reach the cutoff. The band is widened by one on each side to stay
+        # clear of rounding; every candidate is still checked exactly.
+        if cutoff <= 0:
+            start, end = 0, len(self._by_length)
+        else:
+            size = len(name)
+            low = int(size * cutoff / (2 - cutoff)) - 1
+            high = int(size * (2 - cutoff) / cutoff) + 1
+            start = bisect.bisect_left(self._lengths, low)
+            end = bisect.bisect_right(self._lengths, high)
+
+        # Same checks as difflib.get_close_matches(n=1): real_quick_ratio,
+        # quick_ratio (computed from precomputed character counts, with the
+        # same formula) and ratio. Candidates are scored best bound first, so
+        # the search stops once no remaining bound can reach the best ratio.
+        size = len(name)
+        name_counts = Counter(name).items()
+        char_counts = self._char_counts
+        bounded: list[tuple[float, str]] = []
+        for position in range(start, end):
+            candidate = self._by_length[position]
+            length = size + len(candidate)
+            if not length:
+                bounded.append((1.0, candidate))
+                continue
+            if 2.0 * min(size, len(candidate)) / length < cutoff:
+                continue
+            counts = char_counts[position]
+            matches = sum(min(n, counts[char]) for char, n in name_counts)
+            bound = 2.0 * matches / length
+            if bound >= cutoff:
+                bounded.append((bound, candidate))
+        bounded.sort(reverse=True)
+
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(name)
+
+        best: tuple[float, str] | None = None
+        for bound, candidate in bounded:
+            if best is not None and bound < best[0]:
+                break
+            matcher.set_seq1(candidate)
+            score = matcher.ratio()
+            if score >= cutoff and (best is None or (score, candidate) > best):
+                best = (score, candidate)
+        return best[1] if best is not None else None
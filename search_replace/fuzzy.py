@@ -1,80 +1,306 @@
 import math
+from collections import Counter
+from dataclasses import dataclass
 from difflib import SequenceMatcher
+from itertools import accumulate
 
+from .budget import Deadline
+from .types import ApplyStats, Match
 
-def replace_closest_edit_distance(
+
+@dataclass(frozen=True, slots=True)
+class ClosestChunk:
+    """Best fuzzy window found by ``find_closest_chunk``.
+
+    ``start``/``end`` are line offsets into the searched lines, or ``-1`` when
+    no window reaches the similarity threshold. ``pruned`` counts windows
+    rejected by a cheap upper bound and ``scored`` those that needed a full
+    ``SequenceMatcher.ratio``; ``apply_edits`` adds both up in ``ApplyStats``.
+    """
+
+    start: int
+    end: int
+    similarity: float
+    pruned: int
+    scored: int
+
+
+def find_closest_chunk(
     whole_lines: list[str],
     part: str,
     part_lines: list[str],
-    replace_lines: list[str],
-) -> str | None:
-    similarity_thresh = 0.8
+    similarity_thresh: float = 0.8,
+    deadline: Deadline | None = None,
+) -> ClosestChunk:
+    """Find the window of ``whole_lines`` most similar to ``part``.
 
-    max_similarity = 0.0
-    most_similar_chunk_start = -1
-    most_similar_chunk_end = -1
+    Considers the same windows as the original exhaustive scan (every offset,
+    for every length within 10% of the block) and returns the same best window,
+    but only computes the exact ratio for windows whose character-multiset
+    bound (``quick_ratio``) could still beat the best match so far and reach
+    ``similarity_thresh``.
 
+    Raises ``BudgetExceededError`` if ``deadline`` passes before the search ends.
+    """
     scale = 0.1
-    min_len = math.floor(len(part_lines) * (1 - scale))
+    min_len = max(1, math.floor(len(part_lines) * (1 - scale)))
     max_len = math.ceil(len(part_lines) * (1 + scale))
 
+    if deadline is not None:
+        deadline.check()
+    num_lines = len(whole_lines)
+    part_len = len(part)
+    part_counts = Counter(part)
+    line_counts: list[Counter[str]] = []
+    for number, line in enumerate(whole_lines, start=1):
+        if deadline is not None and not number % 256:
+            deadline.check()
+        line_counts.append(Counter(line))
+    offsets = list(accumulate(map(len, whole_lines), initial=0))
+
+    # Upper bound of every window, computed with a sliding character count.
+    candidates: list[tuple[float, int, int]] = []
+    pruned = 0
     for length in range(min_len, max_len):
-        for i in range(len(whole_lines) - length + 1):
-            chunk_lines = whole_lines[i : i + length]
-            chunk = "".join(chunk_lines)
+        if length > num_lines:
+            break
+
+        window: dict[str, int] = {}
+        matches = 0
+        for counts in line_counts[:length]:
+            matches += _add_counts(window, counts, part_counts)
+
+        for i in range(num_lines - length + 1):
+            if deadline is not None and not i % 256:
+                deadline.check()
+            if i:
+                matches -= _remove_counts(window, line_counts[i - 1], part_counts)
+                matches += _add_counts(window, line_counts[i + length - 1], part_counts)
+
+            chunk_len = offsets[i + length] - offsets[i]
+            bound = 2.0 * matches / (chunk_len + part_len)
+            if bound < similarity_thresh:
+                pruned += 1
+            else:
+                candidates.append((bound, length, i))
+
+    # Score the most promising windows first so the bound prunes the rest.
+    candidates.sort(key=lambda candidate: -candidate[0])
+
+    text = "".join(whole_lines)
+    matcher = SequenceMatcher(None)
+    matcher.set_seq2(part)
+
+    best_similarity = 0.0
+    best_order = (0, 0)
+    best_start = -1
+    best_end = -1
+    scored = 0
+    for position, (bound, length, i) in enumerate(candidates):
+        if bound < best_similarity:
+            pruned += len(candidates) - position
+            break
+        # A tie only wins if it comes first in the original scan order.
+        if bound == best_similarity and (length, i) > best_order:
+            pruned += 1
+            continue
+
+        if deadline is not None:
+            deadline.check()
+        matcher.set_seq1(text[offsets[i] : offsets[i + length]])
+        similarity = matcher.ratio()
+        scored += 1
+
+        if similarity > best_similarity or (
+            similarity == best_similarity and (length, i) < best_order
+        ):
+            best_similarity = similarity
+            best_order = (length, i)
+            best_start = i
+            best_end = i + length
+
+    if best_similarity < similarity_thresh:
+        best_start = best_end = -1
+
+    return ClosestChunk(
+        start=best_start,
+        end=best_end,
+        similarity=best_similarity,
+        pruned=pruned,
+        scored=scored,
+    )
+
+
+def _add_counts(
+    window: dict[str, int], counts: Counter[str], part_counts: Counter[str]
+) -> int:
+    """Add a line's characters to the window; return the gain in shared chars."""
+    gained = 0
+    for char, count in counts.items():
+        have = window.get(char, 0)
+        window[char] = have + count
+        need = part_counts[char]
+        if have < need:
+            gained += min(have + count, need) - have
+    return gained
+
 
-            similarity = SequenceMatcher(None, chunk, part).ratio()
+def _remove_counts(
+    window: dict[str, int], counts: Counter[str], part_counts: Counter[str]
+) -> int:
+    """Remove a line's characters from the window; return the loss in shared chars."""
+    lost = 0
+    for char, count in counts.items():
+        have = window[char]
+        window[char] = have - count
+        need = part_counts[char]
+        if have - count < need:
+            lost += min(have, need) - (have - count)
+    return lost
 
-            if similarity > max_similarity and similarity:
-                max_similarity = similarity
-                most_similar_chunk_start = i
-                most_similar_chunk_end = i + length
 
-    if max_similarity < similarity_thresh:
+def replace_closest_edit_distance(
+    whole_lines: list[str],
+    part: str,
+    part_lines: list[str],
+    replace_lines: list[str],
+    deadline: Deadline | None = None,
+    stats: ApplyStats | None = None,
+) -> Match | None:
+    similarity_thresh = 0.8
+
+    closest = find_closest_chunk(
+        whole_lines, part, part_lines, similarity_thresh, deadline
+    )
+    if stats is not None:
+        stats.fuzzy_scored += closest.scored
+        stats.fuzzy_pruned += closest.pruned
+    if closest.start < 0:
         return None
 
-    modified_whole = (
-        whole_lines[:most_similar_chunk_start]
-        + replace_lines
-        + whole_lines[most_similar_chunk_end:]
+    return Match.from_lines(
+        "fuzzy",
+        whole_lines,
+        closest.start,
+        closest.end,
+        replace_lines,
+        closest.similarity,
     )
-    return "".join(modified_whole)
 
 
 def find_similar_lines(
-    search_lines: str, content_lines: str, threshold: float = 0.6
+    search_lines: str,
+    content_lines: str,
+    threshold: float = 0.6,
+    deadline: Deadline | None = None,
+    max_windows: int = 1000,
 ) -> str:
+    """Show the lines of ``content_lines`` most similar to ``search_lines``.
+
+    Windows are compared line by line, so a window that shares no line with
+    the search has a ratio of 0 and can never be the answer. Only windows
+    around exact line hits are considered, ranked by how many lines they could
+    share at most, and at most ``max_windows`` of them are scored. Ties go to
+    the first window, as in a full left-to-right scan.
+    """
     search_lines_list = search_lines.splitlines()
     content_lines_list = content_lines.splitlines()
+    num_search = len(search_lines_list)
+    if not num_search:
+        return "\n".join(content_lines_list[:5])
 
-    best_ratio = 0.0
-    best_match: list[str] | None = None
-    best_match_i = -1
-
-    for i in range(len(content_lines_list) - len(search_lines_list) + 1):
-        chunk = content_lines_list[i : i + len(search_lines_list)]
-        ratio = SequenceMatcher(None, search_lines_list, chunk).ratio()
-        if ratio > best_ratio:
-            best_ratio = ratio
-            best_match = chunk
-            best_match_i = i
-
-    if best_ratio < threshold or best_match is None:
+    best_match_i = _best_similar_window(
+        search_lines_list, content_lines_list, threshold, deadline, max_windows
+    )
+    if best_match_i < 0:
         return ""
 
+    best_match = content_lines_list[best_match_i : best_match_i + num_search]
     if (
-        best_match
-        and search_lines_list
-        and best_match[0] == search_lines_list[0]
+        best_match[0] == search_lines_list[0]
         and best_match[-1] == search_lines_list[-1]
     ):
         return "\n".join(best_match)
 
     context_lines = 5
     best_match_end = min(
-        len(content_lines_list), best_match_i + len(search_lines_list) + context_lines
+        len(content_lines_list), best_match_i + num_search + context_lines
     )
     best_match_i = max(0, best_match_i - context_lines)
 
     best = content_lines_list[best_match_i:best_match_end]
     return "\n".join(best)
+
+
+def _best_similar_window(
+    search: list[str],
+    content: list[str],
+    threshold: float,
+    deadline: Deadline | None,
+    max_windows: int,
+) -> int:
+    """Start of the best window of ``content``, or -1 if none reaches ``threshold``."""
+    size = len(search)
+    last_start = len(content) - size
+    if last_start < 0:
+        return -1
+    wanted = Counter(search)
+
+    # Every window holding an exact hit, merged into runs of window starts.
+    runs: list[list[int]] = []
+    for number, line in enumerate(content):
+        if line not in wanted:
+            continue
+        first, last = max(0, number - size + 1), min(number, last_start)
+        if first > last:
+            continue
+        if runs and first <= runs[-1][1] + 1:
+            runs[-1][1] = max(runs[-1][1], last)
+        else:
+            runs.append([first, last])
+
+    # Upper bound of every seeded window: the lines it shares with the search.
+    candidates: list[tuple[float, int]] = []
+    steps = 0
+    for first, last in runs:
+        window: Counter[str] = Counter()
+        shared = 0
+        for line in content[first : first + size]:
+            if window[line] < wanted[line]:
+                shared += 1
+            window[line] += 1
+        for i in range(first, last + 1):
+            if deadline is not None and not steps % 256:
+                deadline.check()
+            steps += 1
+            if i > first:
+                dropped = content[i - 1]
+                window[dropped] -= 1
+                if window[dropped] < wanted[dropped]:
+                    shared -= 1
+                added = content[i + size - 1]
+                if window[added] < wanted[added]:
+                    shared += 1
+                window[added] += 1
+            bound = 2.0 * shared / (2 * size)
+            if shared and bound >= threshold:
+                candidates.append((bound, i))
+
+    # Score the most promising windows first so the bound prunes the rest.
+    candidates.sort(key=lambda candidate: (-candidate[0], candidate[1]))
+
+    best_ratio = 0.0
+    best_i = -1
+    for scored, (bound, i) in enumerate(candidates[:max_windows]):
+        if bound < best_ratio:
+            break
+        if deadline is not None and not scored % 64:
+            deadline.check()
+        ratio = SequenceMatcher(None, search, content[i : i + size]).ratio()
+        if ratio > best_ratio or (ratio == best_ratio and i < best_i):
+            best_ratio = ratio
+            best_i = i
+
+    if best_ratio < threshold or not best_ratio:
+        return -1
+    return best_i
@@ -0,0 +1,121 @@
+from dataclasses import dataclass
+from typing import Sequence
+
+from .document import Document, prep
+
+
+@dataclass(frozen=True, slots=True)
+class BlockLocation:
+    """Where one SEARCH text occurs in a file, as line offsets in ascending order.
+
+    ``normalized`` holds every offset whose lines agree with the SEARCH text
+    but for leading whitespace, and ``exact`` the subset that agrees verbatim.
+    """
+
+    length: int
+    exact: tuple[int, ...]
+    normalized: tuple[int, ...]
+
+    @property
+    def start(self) -> int:
+        """The first verbatim offset, else the first normalized one, else -1."""
+        if self.exact:
+            return self.exact[0]
+        if self.normalized:
+            return self.normalized[0]
+        return -1
+
+    @property
+    def missing(self) -> bool:
+        return not self.normalized
+
+    @property
+    def ambiguous(self) -> bool:
+        hits = self.exact or self.normalized
+        return len(hits) > 1
+
+
+class BlockLocator:
+    """Aho-Corasick automaton over the lines of many SEARCH texts.
+
+    Every distinct line, without its leading whitespace, is mapped to a small
+    integer and the automaton runs over those symbols, so ``locate`` finds all
+    occurrences of every block in a single pass over a file's lines. Lines
+    that appear in no block reset the automaton without a dictionary walk.
+    Build it once for all the blocks aimed at one file.
+    """
+
+    __slots__ = ("_fail", "_goto", "_out", "_symbols", "patterns")
+
+    def __init__(self, originals: Sequence[str]) -> None:
+        self.patterns = [prep(original)[1] for original in originals]
+        self._symbols: dict[str, int] = {}
+        self._goto: list[dict[int, int]] = [{}]
+        self._out: list[list[int]] = [[]]
+
+        for number, part_lines in enumerate(self.patterns):
+            if not part_lines:
+                continue
+            state = 0
+            for line in part_lines:
+                symbol = self._symbols.setdefault(line.lstrip(), len(self._symbols))
+                next_state = self._goto[state].get(symbol)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][symbol] = next_state
+                    self._goto.append({})
+                    self._out.append([])
+                state = next_state
+            self._out[state].append(number)
+
+        # Breadth-first, so a state's failure link is known before its children's.
+        self._fail = [0] * len(self._goto)
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for symbol, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and symbol not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(symbol, 0)
+                self._out[next_state].extend(self._out[self._fail[next_state]])
+
+    def locate(self, document: Document) -> list[BlockLocation]:
+        """Locate every block in ``document``, in the order they were given."""
+        lines = document.lines
+        stripped = document.normalized.stripped
+        hits: list[list[int]] = [[] for _ in self.patterns]
+
+        symbols, goto, fail, out = self._symbols, self._goto, self._fail, self._out
+        state = 0
+        for end, line in enumerate(stripped, start=1):
+            symbol = symbols.get(line)
+            if symbol is None:
+                state = 0
+                continue
+            while state and symbol not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(symbol, 0)
+            for number in out[state]:
+                hits[number].append(end - len(self.patterns[number]))
+
+        locations = []
+        for part_lines, starts in zip(self.patterns, hits):
+            if not part_lines:
+                # An empty SEARCH text matches at the top, as in LineIndex.find.
+                locations.append(BlockLocation(0, (0,), (0,)))
+                continue
+            length = len(part_lines)
+            exact = tuple(
+                start for start in starts if lines[start : start + length] == part_lines
+            )
+            locations.append(BlockLocation(length, exact, tuple(starts)))
+        return locations
+
+
+def locate_blocks(
+    content: str | Document, originals: Sequence[str]
+) -> list[BlockLocation]:
+    """Locate every SEARCH text of ``originals`` in ``content`` in one pass."""
+    document = content if isinstance(content, Document) else Document(content)
+    return BlockLocator(originals).locate(document)
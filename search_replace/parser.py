@@ -1,10 +1,19 @@
-import difflib
+import itertools
 import re
-from pathlib import Path
-from typing import Iterator, Sequence, TypeAlias
+from collections import deque
+from typing import Iterable, Iterator, NoReturn, Sequence, TypeAlias
 
 from .errors import MissingFilenameError, ParseError
-from .types import DEFAULT_FENCE, EditBlock, Fence, ParseResult
+from .filenames import FilenameIndex
+from .types import (
+    DEFAULT_FENCE,
+    EditBlock,
+    EditBlockView,
+    Fence,
+    FenceOption,
+    ParseResult,
+    Span,
+)
 
 
 def wrap_fence(name: str) -> Fence:
@@ -22,6 +31,34 @@ all_fences = [
 ]
 
 
+def detect_fence(content: str) -> Fence:
+    """Return the fence ``content`` uses, in one scan for all known openers.
+
+    The first entry of ``all_fences[1:]`` whose opener starts a line wins;
+    otherwise triple backticks are assumed.
+    """
+    priority = all_fences[1:] + all_fences[:1]
+    ranks: dict[str, int] = {}
+    for rank, fence in enumerate(priority):
+        ranks.setdefault(fence[0], rank)
+    # Longest openers first, so "````" is not reported as "```".
+    openers = sorted(ranks, key=len, reverse=True)
+    pattern = re.compile("\n(" + "|".join(map(re.escape, openers)) + ")")
+
+    best = len(priority) - 1
+    for match in pattern.finditer(content):
+        best = min(best, ranks[match.group(1)])
+        if best == 0:
+            break
+    return priority[best]
+
+
+def _resolve_fence(fence: FenceOption, content: str) -> Fence:
+    if fence == "auto":
+        return detect_fence(content)
+    return fence
+
+
 HEAD = r"^<{5,9} SEARCH>?\s*$"
 DIVIDER = r"^={5,9}\s*$"
 UPDATED = r"^>{5,9} REPLACE\s*$"
@@ -30,8 +67,22 @@ HEAD_ERR = "<<<<<<< SEARCH"
 DIVIDER_ERR = "======="
 UPDATED_ERR = ">>>>>>> REPLACE"
 
-separators = "|".join([HEAD, DIVIDER, UPDATED])
-split_re = re.compile(r"^((?:" + separators + r")[ ]*\n)", re.MULTILINE | re.DOTALL)
+head_re = re.compile(HEAD)
+divider_re = re.compile(DIVIDER)
+updated_re = re.compile(UPDATED)
+
+# Line kinds produced by the lexer.
+_TEXT = 0
+_HEAD_LINE = 1
+_DIVIDER_LINE = 2
+_UPDATED_LINE = 3
+
+# A marker line can only start, once stripped, with one of these characters;
+# every other line is text without running a regex.
+_MARKER_STARTS = {"<": head_re, "=": divider_re, ">": updated_re}
+_MARKER_KINDS = {"<": _HEAD_LINE, "=": _DIVIDER_LINE, ">": _UPDATED_LINE}
+# ...repeated at least five times.
+_MARKER_PREFIXES = frozenset(start * 5 for start in _MARKER_STARTS)
 
 missing_filename_err = (
     "Bad/missing filename. The filename must be alone on the line before the opening fence"
@@ -42,6 +93,34 @@ missing_filename_err = (
 triple_backticks = "`" * 3
 
 ParsedEditBlock: TypeAlias = tuple[str, str, str]
+ValidFilenames: TypeAlias = Sequence[str] | FilenameIndex
+
+
+def _classify_line(line: str) -> int:
+    """Return the kind of ``line``: a HEAD, DIVIDER or UPDATED marker, or text."""
+    first = line[:1]
+    if first.isspace():
+        first = line.lstrip()[:1]
+    pattern = _MARKER_STARTS.get(first)
+    if pattern is not None and pattern.match(line.strip()):
+        return _MARKER_KINDS[first]
+    return _TEXT
+
+
+def _tokenize(lines: list[str]) -> list[tuple[int, int]]:
+    """Return ``(line number, kind)`` for every marker line, in order."""
+    return [
+        (index, kind)
+        for index, line in enumerate(lines)
+        if line.lstrip()[:5] in _MARKER_PREFIXES
+        and (kind := _classify_line(line)) != _TEXT
+    ]
+
+
+def _filename_index(valid_fnames: ValidFilenames | None) -> FilenameIndex | None:
+    if valid_fnames is None or isinstance(valid_fnames, FilenameIndex):
+        return valid_fnames
+    return FilenameIndex(valid_fnames)
 
 
 def strip_filename(filename: str, fence: Fence) -> str | None:
@@ -75,7 +154,7 @@ def strip_filename(filename: str, fence: Fence) -> str | None:
 
 
 def find_filename(
-    lines: list[str], fence: Fence, valid_fnames: Sequence[str] | None
+    lines: list[str], fence: Fence, valid_fnames: ValidFilenames | None
 ) -> str | None:
     """
     Deepseek Coder v2 has been doing this:
@@ -88,9 +167,11 @@ def find_filename(
     ...
 
     This is a more flexible search back for filenames.
+
+    ``valid_fnames`` may be a prebuilt ``FilenameIndex``; a plain sequence is
+    indexed on every call.
     """
-    if valid_fnames is None:
-        valid_fnames = []
+    index = _filename_index(valid_fnames) or FilenameIndex(())
 
     # Go back through the 3 preceding lines.
     lines.reverse()
@@ -111,20 +192,20 @@ def find_filename(
 
     # Check for exact match first.
     for fname in filenames:
-        if fname in valid_fnames:
+        if fname in index:
             return fname
 
     # Check for partial match (basename match).
     for fname in filenames:
-        for valid_name in valid_fnames:
-            if fname == Path(valid_name).name:
-                return valid_name
+        valid_name = index.by_basename(fname)
+        if valid_name is not None:
+            return valid_name
 
     # Perform fuzzy matching with valid_fnames.
     for fname in filenames:
-        close_matches = difflib.get_close_matches(fname, valid_fnames, n=1, cutoff=0.8)
-        if len(close_matches) == 1:
-            return close_matches[0]
+        close_match = index.close_match(fname, cutoff=0.8)
+        if close_match is not None:
+            return close_match
 
     # If no fuzzy match, look for a file w/extension.
     for fname in filenames:
@@ -139,77 +220,80 @@ def find_filename(
 
 def find_original_update_blocks(
     content: str,
-    fence: Fence = DEFAULT_FENCE,
-    valid_fnames: Sequence[str] | None = None,
+    fence: FenceOption = DEFAULT_FENCE,
+    valid_fnames: ValidFilenames | None = None,
 ) -> Iterator[ParsedEditBlock]:
-    lines = content.splitlines(keepends=True)
-    i = 0
-    current_filename: str | None = None
+    fence = _resolve_fence(fence, content)
+    for filename, original, updated in _iter_block_spans(content, fence, valid_fnames):
+        yield filename, content[slice(*original)], content[slice(*updated)]
 
-    head_pattern = re.compile(HEAD)
-    divider_pattern = re.compile(DIVIDER)
-    updated_pattern = re.compile(UPDATED)
 
-    while i < len(lines):
-        line = lines[i]
+def _iter_block_spans(
+    content: str, fence: Fence, valid_fnames: ValidFilenames | None
+) -> Iterator[tuple[str, Span, Span]]:
+    """Yield each block's filename and the spans of its texts in ``content``."""
+    valid_fnames = _filename_index(valid_fnames)
+    lines = content.splitlines(keepends=True)
+    tokens = _tokenize(lines)
+    # offsets[n] is where line n starts; the lines partition ``content``.
+    offsets = [0, *itertools.accumulate(map(len, lines))]
+    current_filename: str | None = None
 
-        if head_pattern.match(line.strip()):
-            try:
-                # If next line after HEAD exists and is DIVIDER, it's a new file.
-                if i + 1 < len(lines) and divider_pattern.match(lines[i + 1].strip()):
-                    filename = find_filename(lines[max(0, i - 3) : i], fence, None)
+    # Walk the marker lines only; text between them is sliced out of ``content``.
+    pos = 0
+    while pos < len(tokens):
+        i, kind = tokens[pos]
+        pos += 1
+        if kind != _HEAD_LINE:
+            continue
+
+        try:
+            # If next line after HEAD exists and is DIVIDER, it's a new file.
+            if pos < len(tokens) and tokens[pos] == (i + 1, _DIVIDER_LINE):
+                filename = find_filename(lines[max(0, i - 3) : i], fence, None)
+            else:
+                filename = find_filename(lines[max(0, i - 3) : i], fence, valid_fnames)
+
+            if not filename:
+                if current_filename:
+                    filename = current_filename
                 else:
-                    filename = find_filename(
-                        lines[max(0, i - 3) : i], fence, valid_fnames
-                    )
-
-                if not filename:
-                    if current_filename:
-                        filename = current_filename
-                    else:
-                        raise MissingFilenameError(
-                            missing_filename_err.format(fence=fence)
-                        )
-
-                current_filename = filename
-
-                original_text: list[str] = []
-                i += 1
-                while i < len(lines) and not divider_pattern.match(lines[i].strip()):
-                    original_text.append(lines[i])
-                    i += 1
-
-                if i >= len(lines) or not divider_pattern.match(lines[i].strip()):
-                    raise ParseError(f"Expected `{DIVIDER_ERR}`")
-
-                updated_text: list[str] = []
-                i += 1
-                while i < len(lines) and not (
-                    updated_pattern.match(lines[i].strip())
-                    or divider_pattern.match(lines[i].strip())
-                ):
-                    updated_text.append(lines[i])
-                    i += 1
-
-                if i >= len(lines) or not (
-                    updated_pattern.match(lines[i].strip())
-                    or divider_pattern.match(lines[i].strip())
-                ):
-                    raise ParseError(f"Expected `{UPDATED_ERR}` or `{DIVIDER_ERR}`")
-
-                yield filename, "".join(original_text), "".join(updated_text)
-            except ValueError as exc:
-                processed = "".join(lines[: i + 1])
-                err = exc.args[0]
-                raise ParseError(f"{processed}\n^^^ {err}") from exc
-
-        i += 1
+                    raise MissingFilenameError(missing_filename_err.format(fence=fence))
+
+            current_filename = filename
+
+            while pos < len(tokens) and tokens[pos][1] != _DIVIDER_LINE:
+                pos += 1
+            if pos >= len(tokens):
+                i = len(lines)
+                raise ParseError(f"Expected `{DIVIDER_ERR}`")
+            divider = tokens[pos][0]
+            pos += 1
+
+            # Another HEAD before the closing marker is part of the updated text.
+            while pos < len(tokens) and tokens[pos][1] == _HEAD_LINE:
+                pos += 1
+            if pos >= len(tokens):
+                i = len(lines)
+                raise ParseError(f"Expected `{UPDATED_ERR}` or `{DIVIDER_ERR}`")
+            end = tokens[pos][0]
+            pos += 1
+
+            yield (
+                filename,
+                (offsets[i + 1], offsets[divider]),
+                (offsets[divider + 1], offsets[end]),
+            )
+        except ValueError as exc:
+            processed = content[: offsets[min(i + 1, len(lines))]]
+            err = exc.args[0]
+            raise ParseError(f"{processed}\n^^^ {err}") from exc
 
 
 def parse_edit_blocks(
     content: str,
-    fence: Fence = DEFAULT_FENCE,
-    valid_fnames: Sequence[str] | None = None,
+    fence: FenceOption = DEFAULT_FENCE,
+    valid_fnames: ValidFilenames | None = None,
 ) -> ParseResult:
     edits = [
         EditBlock(path=block[0], original=block[1], updated=block[2])
@@ -218,3 +302,205 @@ def parse_edit_blocks(
         )
     ]
     return ParseResult(edits=edits)
+
+
+def parse_edit_block_spans(
+    content: str,
+    fence: FenceOption = DEFAULT_FENCE,
+    valid_fnames: ValidFilenames | None = None,
+) -> list[EditBlockView]:
+    """Like ``parse_edit_blocks``, but without copying the blocks' texts.
+
+    Each ``EditBlockView`` keeps character offsets into ``content`` and slices
+    ``original``/``updated`` out of it only when they are read.
+    """
+    return [
+        EditBlockView(filename, content, original, updated)
+        for filename, original, updated in _iter_block_spans(
+            content, _resolve_fence(fence, content), valid_fnames
+        )
+    ]
+
+
+# Characters that ``str.splitlines`` treats as line boundaries.
+line_break_re = re.compile("[\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+
+_SCAN = 0
+_HEAD = 1
+_ORIGINAL = 2
+_UPDATED = 3
+
+
+class StreamingBlockParser:
+    """Incremental counterpart of ``find_original_update_blocks``.
+
+    Feed the response as it arrives; each block is returned by the ``feed``
+    call that delivers its closing ``>>>>>>> REPLACE`` line. Call ``close`` once
+    the stream ends to flush the last line and surface unterminated blocks.
+    Results and error messages are identical to the batch parser.
+    """
+
+    def __init__(
+        self,
+        fence: Fence = DEFAULT_FENCE,
+        valid_fnames: ValidFilenames | None = None,
+    ) -> None:
+        self.fence = fence
+        self.valid_fnames = _filename_index(valid_fnames)
+
+        # Everything fed so far; only joined to build error messages.
+        self._chunks: list[str] = []
+        # Trailing text not yet known to be a complete line.
+        self._partial: list[str] = []
+        self._consumed = 0
+        self._recent: deque[str] = deque(maxlen=3)
+        self._state = _SCAN
+        self._closed = False
+
+        self._current_filename: str | None = None
+        self._head_context: list[str] = []
+        self._head_end = 0
+        self._filename = ""
+        self._original: list[str] = []
+        self._updated: list[str] = []
+
+    def feed(self, chunk: str) -> list[EditBlock]:
+        """Consume the next piece of the response and return completed blocks."""
+        self._check_usable()
+        if not chunk:
+            return []
+
+        self._chunks.append(chunk)
+        self._partial.append(chunk)
+        if not line_break_re.search(chunk):
+            return []
+
+        lines = "".join(self._partial).splitlines(keepends=True)
+        last = lines[-1]
+        # A trailing "\r" may still be followed by "\n" in the next chunk.
+        if last[-1] == "\r" or not line_break_re.match(last[-1]):
+            self._partial = [lines.pop()]
+        else:
+            self._partial = []
+
+        return self._process(lines)
+
+    def close(self) -> list[EditBlock]:
+        """Signal the end of the response and return any remaining blocks."""
+        self._check_usable()
+        self._closed = True
+
+        # At most one line is left over, so it can either close a block or
+        # leave one unterminated, never both.
+        lines = "".join(self._partial).splitlines(keepends=True)
+        self._partial = []
+        blocks = self._process(lines)
+
+        try:
+            if self._state == _HEAD:
+                # The HEAD line was the last line of the response.
+                self._start_block(is_new_file=False)
+                self._state = _ORIGINAL
+            if self._state == _ORIGINAL:
+                raise ParseError(f"Expected `{DIVIDER_ERR}`")
+            if self._state == _UPDATED:
+                raise ParseError(f"Expected `{UPDATED_ERR}` or `{DIVIDER_ERR}`")
+        except ValueError as exc:
+            self._fail(exc)
+
+        return blocks
+
+    def _check_usable(self) -> None:
+        if self._closed:
+            raise RuntimeError("StreamingBlockParser is already closed.")
+
+    def _process(self, lines: list[str]) -> list[EditBlock]:
+        blocks: list[EditBlock] = []
+        for line in lines:
+            self._consumed += len(line)
+            try:
+                block = self._process_line(line)
+            except ValueError as exc:
+                self._fail(exc)
+            if block is not None:
+                blocks.append(block)
+            self._recent.append(line)
+        return blocks
+
+    def _process_line(self, line: str) -> EditBlock | None:
+        kind = _classify_line(line)
+        state = self._state
+
+        if state == _SCAN:
+            if kind == _HEAD_LINE:
+                self._state = _HEAD
+                self._head_context = list(self._recent)
+                self._head_end = self._consumed
+            return None
+
+        is_divider = kind == _DIVIDER_LINE
+
+        if state == _HEAD:
+            # The line after HEAD decides whether this is a new file.
+            self._start_block(is_new_file=is_divider)
+            state = self._state = _ORIGINAL
+
+        if state == _ORIGINAL:
+            if is_divider:
+                self._state = _UPDATED
+            else:
+                self._original.append(line)
+            return None
+
+        if is_divider or kind == _UPDATED_LINE:
+            block = EditBlock(
+                path=self._filename,
+                original="".join(self._original),
+                updated="".join(self._updated),
+            )
+            self._original = []
+            self._updated = []
+            self._state = _SCAN
+            return block
+
+        self._updated.append(line)
+        return None
+
+    def _start_block(self, is_new_file: bool) -> None:
+        valid_fnames = None if is_new_file else self.valid_fnames
+        filename = find_filename(self._head_context, self.fence, valid_fnames)
+
+        if not filename:
+            if self._current_filename:
+                filename = self._current_filename
+            else:
+                raise MissingFilenameError(
+                    missing_filename_err.format(fence=self.fence)
+                )
+
+        self._current_filename = filename
+        self._filename = filename
+
+    def _fail(self, exc: ValueError) -> NoReturn:
+        # A missing filename can only occur before the first block completes,
+        # so raising never discards blocks parsed from the same chunk.
+        self._closed = True
+        if isinstance(exc, MissingFilenameError):
+            end = self._head_end
+        else:
+            end = self._consumed
+        processed = "".join(self._chunks)[:end]
+        err = exc.args[0]
+        raise ParseError(f"{processed}\n^^^ {err}") from exc
+
+
+def iter_edit_blocks(
+    chunks: Iterable[str],
+    fence: Fence = DEFAULT_FENCE,
+    valid_fnames: ValidFilenames | None = None,
+) -> Iterator[EditBlock]:
+    """Yield edit blocks from a stream of response chunks as soon as they close."""
+    parser = StreamingBlockParser(fence=fence, valid_fnames=valid_fnames)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
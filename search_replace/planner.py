@@ -0,0 +1,166 @@
+from bisect import bisect_left
+from dataclasses import dataclass
+
+from .document import Document
+from .types import Hunk, Match
+
+
+@dataclass(frozen=True, slots=True)
+class PlannedEdit:
+    """Replace ``lines[start:end]`` of the planned file with ``replace_lines``."""
+
+    start: int
+    end: int
+    replace_lines: list[str]
+
+
+class FilePlan:
+    """Replacements located against one version of a file, spliced in one pass.
+
+    Applying blocks one after another re-indexes and rebuilds the file for
+    every block. A plan instead places every block in the original content,
+    where a ``BlockLocator`` or the line index finds it, and records its
+    range. ``add`` only accepts a block when applying it after the blocks
+    planned so far would replace that same range: it must not overlap an
+    earlier range, and no earlier replacement may create a new occurrence of
+    it in front of that range, whether within its REPLACE lines or across the
+    lines it joins. ``splice`` then builds the content every accepted block
+    would have produced in order.
+
+    The ``Match`` returned for each block is expressed against the content as
+    the blocks accepted before it would have left it, as if applied in order.
+    """
+
+    __slots__ = ("_size", "_starts", "document", "edits")
+
+    def __init__(self, document: Document) -> None:
+        self.document = document
+        # Sorted by start; ranges never overlap.
+        self.edits: list[PlannedEdit] = []
+        self._starts: list[int] = []
+        self._size = len(document.lines)
+
+    def __len__(self) -> int:
+        return len(self.edits)
+
+    def add(
+        self,
+        part_lines: list[str],
+        replace_lines: list[str],
+        start: int | None = None,
+    ) -> Match | None:
+        """Plan replacing the first verbatim ``part_lines``; None if it must wait.
+
+        ``start`` is that first occurrence, or -1 if there is none, when the
+        caller has already located the block; otherwise the line index is
+        searched.
+        """
+        if not part_lines:
+            return None
+        if start is None:
+            start = self.document.line_index.find(part_lines)
+        if start < 0:
+            return None
+        end = start + len(part_lines)
+
+        position = bisect_left(self._starts, start)
+        if position and self.edits[position - 1].end > start:
+            return None
+        if position < len(self.edits) and self.edits[position].start < end:
+            return None
+
+        # An edit leaving the file empty counts as a failed match.
+        size = self._size - len(part_lines) + len(replace_lines)
+        if not size:
+            return None
+
+        # New occurrences can only touch ranges replaced in front of this one.
+        for index in range(position):
+            if self._creates_match(index, part_lines):
+                return None
+
+        self.edits.insert(position, PlannedEdit(start, end, replace_lines))
+        self._starts.insert(position, start)
+        self._size = size
+        return self._match(position)
+
+    def splice(self) -> str:
+        """The planned file's content with every planned edit applied."""
+        lines = self.document.lines
+        pieces: list[str] = []
+        position = 0
+        for edit in self.edits:
+            pieces.extend(lines[position : edit.start])
+            pieces.extend(edit.replace_lines)
+            position = edit.end
+        pieces.extend(lines[position:])
+        return "".join(pieces)
+
+    def _match(self, position: int) -> Match:
+        """The match of ``edits[position]``, shifted by the edits in front of it."""
+        offsets = self.document.offsets
+        line_shift = 0
+        char_shift = 0
+        for edit in self.edits[:position]:
+            line_shift += len(edit.replace_lines) - (edit.end - edit.start)
+            char_shift += sum(map(len, edit.replace_lines)) - (
+                offsets[edit.end] - offsets[edit.start]
+            )
+        edit = self.edits[position]
+        hunk = Hunk(
+            offsets[edit.start] + char_shift,
+            offsets[edit.end] + char_shift,
+            edit.start + line_shift,
+            edit.end + line_shift,
+            "".join(edit.replace_lines),
+        )
+        return Match("exact", (hunk,))
+
+    def _creates_match(self, index: int, part_lines: list[str]) -> bool:
+        """Does ``part_lines`` occur touching the replacement of ``edits[index]``?"""
+        reach = len(part_lines) - 1
+        window = (
+            self._lines_before(index, reach)
+            + self.edits[index].replace_lines
+            + self._lines_after(index, reach)
+        )
+        first = part_lines[0]
+        for offset in range(len(window) - reach):
+            if window[offset] == first and window[offset : offset + reach + 1] == (
+                part_lines
+            ):
+                return True
+        return False
+
+    def _lines_before(self, index: int, reach: int) -> list[str]:
+        """Up to ``reach`` planned-content lines in front of ``edits[index]``."""
+        chunks: list[list[str]] = []
+        wanted = reach
+        lines = self.document.lines
+        while wanted > 0:
+            gap_start = self.edits[index - 1].end if index else 0
+            gap = lines[gap_start : self.edits[index].start]
+            chunks.append(gap[max(0, len(gap) - wanted) :])
+            wanted -= len(chunks[-1])
+            if wanted <= 0 or not index:
+                break
+            index -= 1
+            replaced = self.edits[index].replace_lines
+            chunks.append(replaced[max(0, len(replaced) - wanted) :])
+            wanted -= len(chunks[-1])
+        return [line for chunk in reversed(chunks) for line in chunk]
+
+    def _lines_after(self, index: int, reach: int) -> list[str]:
+        """Up to ``reach`` planned-content lines after ``edits[index]``."""
+        collected: list[str] = []
+        lines = self.document.lines
+        last = len(self.edits) - 1
+        while len(collected) < reach:
+            gap_end = self.edits[index + 1].start if index < last else len(lines)
+            gap = lines[self.edits[index].end : gap_end]
+            collected.extend(gap[: reach - len(collected)])
+            if len(collected) >= reach or index == last:
+                break
+            index += 1
+            collected.extend(self.edits[index].replace_lines[: reach - len(collected)])
+        return collected
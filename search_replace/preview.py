@@ -0,0 +1,284 @@
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from itertools import accumulate
+from typing import Iterable, Iterator, Mapping, Sequence, TypeAlias
+
+from .types import Hunk, Match
+
+# Replace lines ``[start, end)`` of a file's current content with ``lines``.
+LineEdit: TypeAlias = tuple[int, int, list[str]]
+
+# Strategies whose hunks always cover whole lines.
+_LINE_STRATEGIES = frozenset({"exact", "whitespace", "fuzzy"})
+_NO_NEWLINE = "\\ No newline at end of file\n"
+
+
+def match_line_edits(match: Match, text: str) -> list[LineEdit]:
+    """``match`` as whole-line replacements of the lines of ``text``, in order.
+
+    The hunks of a match are all placed against ``text``, while line edits
+    apply one after another, so each edit is shifted by the lines the edits
+    before it added or removed. Only the ``...`` and append strategies can
+    start or end a hunk inside a line; for those the touched lines are
+    rebuilt from ``text``, and hunks sharing a line are merged.
+    """
+    if match.strategy in _LINE_STRATEGIES or (
+        match.strategy == "append" and (not text or text.endswith("\n"))
+    ):
+        return _shifted(
+            (hunk.start_line, hunk.end_line, hunk.replacement.splitlines(keepends=True))
+            for hunk in match.hunks
+        )
+
+    lines = text.splitlines(keepends=True)
+    offsets = list(accumulate(map(len, lines), initial=0))
+    # Text past an unterminated last line still belongs to that line.
+    last_open = bool(lines) and lines[-1].splitlines()[0] == lines[-1]
+
+    def first_line(hunk: Hunk) -> int:
+        line = bisect_right(offsets, hunk.start) - 1
+        if line == len(lines) and last_open:
+            line -= 1
+        return line
+
+    def end_line(hunk: Hunk) -> int:
+        return max(first_line(hunk), bisect_left(offsets, hunk.end))
+
+    edits: list[LineEdit] = []
+    hunks = match.hunks
+    index = 0
+    while index < len(hunks):
+        first, last = first_line(hunks[index]), end_line(hunks[index])
+        group = [hunks[index]]
+        index += 1
+        while True:
+            while index < len(hunks) and first_line(hunks[index]) < last:
+                last = max(last, end_line(hunks[index]))
+                group.append(hunks[index])
+                index += 1
+            new_lines = _merge(text, offsets, first, last, group)
+            # A replacement ending inside a line joins it to the next one.
+            if new_lines and not new_lines[-1].endswith("\n") and last < len(lines):
+                last += 1
+                continue
+            break
+        edits.append((first, last, new_lines))
+    return _shifted(edits)
+
+
+def _shifted(edits: Iterable[LineEdit]) -> list[LineEdit]:
+    """Edits placed against one text, shifted to apply one after another."""
+    shifted: list[LineEdit] = []
+    shift = 0
+    for start, end, new_lines in edits:
+        shifted.append((start + shift, end + shift, new_lines))
+        shift += len(new_lines) - (end - start)
+    return shifted
+
+
+def _merge(
+    text: str, offsets: list[int], first: int, last: int, group: list[Hunk]
+) -> list[str]:
+    """Lines ``first`` to ``last`` of ``text`` with the hunks of ``group`` applied."""
+    pieces: list[str] = []
+    position = offsets[first]
+    for hunk in group:
+        pieces.append(text[position : hunk.start])
+        pieces.append(hunk.replacement)
+        position = hunk.end
+    pieces.append(text[position : offsets[last]])
+    return "".join(pieces).splitlines(keepends=True)
+
+
+@dataclass(frozen=True, slots=True)
+class DiffHunk:
+    """One ``@@`` hunk of a unified diff; starts are 0-based line offsets."""
+
+    old_start: int
+    old_count: int
+    new_start: int
+    new_count: int
+    # Prefixed with " ", "-" or "+", each ending in a newline.
+    lines: list[str]
+
+    @property
+    def header(self) -> str:
+        old = _format_range(self.old_start, self.old_count)
+        new = _format_range(self.new_start, self.new_count)
+        return f"@@ -{old} +{new} @@\n"
+
+    def __str__(self) -> str:
+        return self.header + "".join(self.lines)
+
+
+def _format_range(start: int, count: int) -> str:
+    # Same conventions as difflib.unified_diff.
+    if count == 1:
+        return str(start + 1)
+    if not count:
+        return f"{start},0"
+    return f"{start + 1},{count}"
+
+
+class DiffPreview:
+    """Unified diffs of a dry run, built from the line ranges the blocks replaced.
+
+    Holds each touched file's content from before the call (None for a file
+    the call would create) and the line edits applied to it, in order. Diffs
+    are built one file at a time, and one hunk at a time, from those ranges
+    alone, without re-diffing whole files.
+    """
+
+    def __init__(
+        self,
+        originals: Mapping[str, str | None],
+        edits: Mapping[str, Sequence[LineEdit]],
+        context: int = 3,
+    ) -> None:
+        self.originals = originals
+        self.edits = edits
+        self.context = context
+
+    @property
+    def paths(self) -> list[str]:
+        return list(self.edits)
+
+    def iter_hunks(self) -> Iterator[tuple[str, DiffHunk]]:
+        """Yield ``(path, hunk)`` for every changed region, file by file."""
+        for path in self.edits:
+            for hunk in self.file_hunks(path):
+                yield path, hunk
+
+    def file_hunks(self, path: str) -> Iterator[DiffHunk]:
+        original = self.originals[path] or ""
+        old_lines = original.splitlines(keepends=True)
+        changes = _compose(old_lines, self.edits[path])
+        context = self.context
+
+        shift = 0
+        position = 0
+        while position < len(changes):
+            # Changes closer than two contexts apart share a hunk.
+            group_end = position + 1
+            while (
+                group_end < len(changes)
+                and changes[group_end][0] - changes[group_end - 1][1] <= 2 * context
+            ):
+                group_end += 1
+            group = changes[position:group_end]
+
+            old_start = max(0, group[0][0] - context)
+            old_end = min(len(old_lines), group[-1][1] + context)
+            new_start = old_start + shift
+            lines: list[str] = []
+            cursor = old_start
+            for start, end, new_lines in group:
+                lines.extend(_prefixed(" ", old_lines[cursor:start]))
+                lines.extend(_prefixed("-", old_lines[start:end]))
+                lines.extend(_prefixed("+", new_lines))
+                shift += len(new_lines) - (end - start)
+                cursor = end
+            lines.extend(_prefixed(" ", old_lines[cursor:old_end]))
+
+            old_count = old_end - old_start
+            new_count = old_count + sum(
+                len(new_lines) - (end - start) for start, end, new_lines in group
+            )
+            yield DiffHunk(old_start, old_count, new_start, new_count, lines)
+            position = group_end
+
+    def unified_diff(self) -> Iterator[str]:
+        """Yield the lines of a unified diff of every file, hunk by hunk."""
+        for path in self.edits:
+            headed = False
+            for hunk in self.file_hunks(path):
+                if not headed:
+                    created = self.originals[path] is None
+                    yield "--- /dev/null\n" if created else f"--- a/{path}\n"
+                    yield f"+++ b/{path}\n"
+                    headed = True
+                yield hunk.header
+                yield from hunk.lines
+
+    def __str__(self) -> str:
+        return "".join(self.unified_diff())
+
+
+def _prefixed(prefix: str, lines: list[str]) -> Iterator[str]:
+    for line in lines:
+        if line.endswith("\n"):
+            yield prefix + line
+        else:
+            yield prefix + line + "\n"
+            yield _NO_NEWLINE
+
+
+def _compose(
+    old_lines: list[str], edits: Sequence[LineEdit]
+) -> list[tuple[int, int, list[str]]]:
+    """Fold line edits, applied in order, into changes to ``old_lines``.
+
+    The file is tracked as pieces: ranges of the original lines and lists of
+    new lines. Each change replaces ``old_lines[start:end]``; changes come
+    sorted, without overlaps, and trimmed of lines they leave as they were.
+    """
+    pieces: list[tuple[int, int] | list[str]] = [(0, len(old_lines))]
+    for start, end, new_lines in edits:
+        before, rest = _split_pieces(pieces, start)
+        _, after = _split_pieces(rest, end - start)
+        pieces = before + ([new_lines] if new_lines else []) + after
+
+    changes: list[tuple[int, int, list[str]]] = []
+    cursor = 0
+    pending: list[str] = []
+    for piece in pieces:
+        if isinstance(piece, list):
+            pending.extend(piece)
+            continue
+        if piece[0] > cursor or pending:
+            changes.append((cursor, piece[0], pending))
+            pending = []
+        cursor = piece[1]
+    if cursor < len(old_lines) or pending:
+        changes.append((cursor, len(old_lines), pending))
+
+    trimmed = []
+    for start, end, new_lines in changes:
+        head = 0
+        while (
+            start + head < end
+            and head < len(new_lines)
+            and old_lines[start + head] == new_lines[head]
+        ):
+            head += 1
+        tail = 0
+        while (
+            end - tail > start + head
+            and len(new_lines) - tail > head
+            and old_lines[end - tail - 1] == new_lines[-tail - 1]
+        ):
+            tail += 1
+        if end - start - head - tail or len(new_lines) - head - tail:
+            trimmed.append(
+                (start + head, end - tail, new_lines[head : len(new_lines) - tail])
+            )
+    return trimmed
+
+
+def _split_pieces(
+    pieces: list[tuple[int, int] | list[str]], at: int
+) -> tuple[list[tuple[int, int] | list[str]], list[tuple[int, int] | list[str]]]:
+    """Split ``pieces`` after their first ``at`` lines."""
+    for index, piece in enumerate(pieces):
+        size = len(piece) if isinstance(piece, list) else piece[1] - piece[0]
+        if at < size:
+            if not at:
+                return pieces[:index], pieces[index:]
+            if isinstance(piece, list):
+                head: tuple[int, int] | list[str] = piece[:at]
+                tail: tuple[int, int] | list[str] = piece[at:]
+            else:
+                head, tail = (piece[0], piece[0] + at), (piece[0] + at, piece[1])
+            return pieces[:index] + [head], [tail] + pieces[index + 1 :]
+        at -= size
+    return pieces, []
@@ -0,0 +1,197 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import Counter
+from pathlib import Path
+from types import TracebackType
+from typing import Iterable, Iterator, Self
+
+DEFAULT_INDEX_NAME = ".search-replace-index.sqlite3"
+DEFAULT_EXCLUDE_DIRS = frozenset(
+    {".git", ".hg", ".svn", "__pycache__", "node_modules", ".venv", "venv"}
+)
+
+# Bump when the schema or the line hashing changes; older indexes are rebuilt.
+_SCHEMA_VERSION = 1
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    hash INTEGER NOT NULL,
+    file_id INTEGER NOT NULL,
+    line INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS postings_hash ON postings (hash);
+CREATE INDEX IF NOT EXISTS postings_file ON postings (file_id);
+"""
+# Stay well below SQLite's limit on bound parameters per statement.
+_QUERY_BATCH = 500
+
+
+def line_hash(line: str) -> int:
+    """64-bit blake2b hash of ``line`` without surrounding whitespace."""
+    digest = hashlib.blake2b(line.strip().encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def _text_hashes(text: str) -> set[int]:
+    return {line_hash(line) for line in text.splitlines() if line.strip()}
+
+
+class RepoIndex:
+    """On-disk index from line hashes to the ``(file, line)`` postings under ``root``.
+
+    Lines are hashed without surrounding whitespace, and blank lines are
+    skipped. ``update`` re-reads only the files whose ``(mtime_ns, size)``
+    changed since the last update, and drops deleted ones. ``find_files``
+    then names the files that contain the lines of a SEARCH text without
+    scanning the tree. The index is stored in SQLite, by default in
+    ``root/.search-replace-index.sqlite3``. Files that are not UTF-8, or that
+    are larger than ``max_file_bytes``, are not indexed.
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        db_path: str | Path | None = None,
+        exclude_dirs: Iterable[str] = DEFAULT_EXCLUDE_DIRS,
+        max_file_bytes: int = 1024 * 1024,
+    ) -> None:
+        self.root = Path(root).resolve()
+        self.db_path = Path(db_path) if db_path else self.root / DEFAULT_INDEX_NAME
+        self.exclude_dirs = frozenset(exclude_dirs)
+        self.max_file_bytes = max_file_bytes
+
+        # apply_stream_async applies edits on worker threads.
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        (version,) = self._db.execute("PRAGMA user_version").fetchone()
+        if version != _SCHEMA_VERSION:
+            self._db.executescript(
+                "DROP TABLE IF EXISTS postings; DROP TABLE IF EXISTS files;"
+            )
+            self._db.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        self._db.executescript(_SCHEMA)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def update(self) -> int:
+        """Re-index the files changed since the last update; return their count."""
+        with self._lock, self._db:
+            known = {
+                path: (file_id, mtime_ns, size)
+                for file_id, path, mtime_ns, size in self._db.execute(
+                    "SELECT id, path, mtime_ns, size FROM files"
+                )
+            }
+            reindexed = 0
+            seen: set[str] = set()
+            for full_path, stat in self._iter_files():
+                path = full_path.relative_to(self.root).as_posix()
+                seen.add(path)
+                entry = known.get(path)
+                if entry is not None and entry[1:] == (stat.st_mtime_ns, stat.st_size):
+                    continue
+                if entry is not None:
+                    self._forget(entry[0])
+                try:
+                    text = full_path.read_text(encoding="utf-8")
+                except (OSError, UnicodeDecodeError):
+                    continue
+                self._add(path, text, stat.st_mtime_ns, stat.st_size)
+                reindexed += 1
+
+            for path, entry in known.items():
+                if path not in seen:
+                    self._forget(entry[0])
+        return reindexed
+
+    def find_files(
+        self, text: str, limit: int = 5, exclude: Iterable[Path] = ()
+    ) -> list[Path]:
+        """Up to ``limit`` files, by path, holding every non-blank line of ``text``.
+
+        Files in ``exclude`` are left out before the limit applies. A hit
+        still has to be verified against the file itself, since the lines may
+        be spread over the file or it may have changed since the last
+        ``update``.
+        """
+        hashes = list(_text_hashes(text))
+        if not hashes:
+            return []
+
+        counts: Counter[int] = Counter()
+        with self._lock:
+            for start in range(0, len(hashes), _QUERY_BATCH):
+                batch = hashes[start : start + _QUERY_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                counts.update(
+                    file_id
+                    for file_id, _ in self._db.execute(
+                        "SELECT DISTINCT file_id, hash FROM postings"
+                        f" WHERE hash IN ({placeholders})",
+                        batch,
+                    )
+                )
+            paths = sorted(
+                self._db.execute(
+                    "SELECT path FROM files WHERE id = ?", (file_id,)
+                ).fetchone()[0]
+                for file_id, count in counts.items()
+                if count == len(hashes)
+            )
+        excluded = set(exclude)
+        found = [self.root / path for path in paths]
+        return [path for path in found if path not in excluded][:limit]
+
+    def _iter_files(self) -> Iterator[tuple[Path, os.stat_result]]:
+        db_name = self.db_path.name
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = sorted(d for d in dirnames if d not in self.exclude_dirs)
+            for filename in sorted(filenames):
+                # Skip the index itself and its journal files.
+                if filename.startswith(db_name):
+                    continue
+                full_path = Path(dirpath, filename)
+                try:
+                    stat = full_path.stat()
+                except OSError:
+                    continue
+                if stat.st_size <= self.max_file_bytes:
+                    yield full_path, stat
+
+    def _add(self, path: str, text: str, mtime_ns: int, size: int) -> None:
+        cursor = self._db.execute(
+            "INSERT INTO files (path, mtime_ns, size) VALUES (?, ?, ?)",
+            (path, mtime_ns, size),
+        )
+        file_id = cursor.lastrowid
+        self._db.executemany(
+            "INSERT INTO postings (hash, file_id, line) VALUES (?, ?, ?)",
+            (
+                (line_hash(line), file_id, number)
+                for number, line in enumerate(text.splitlines())
+                if line.strip()
+            ),
+        )
+
+    def _forget(self, file_id: int) -> None:
+        self._db.execute("DELETE FROM postings WHERE file_id = ?", (file_id,))
+        self._db.execute("DELETE FROM files WHERE id = ?", (file_id,))
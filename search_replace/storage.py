@@ -0,0 +1,92 @@
+import os
+from pathlib import Path
+from typing import Mapping, Protocol
+
+
+class Storage(Protocol):
+    """Where ``apply_edits`` reads and writes files.
+
+    Paths passed to the other methods have already gone through ``resolve``.
+    ``fingerprint`` returns a ``(mtime_ns, size)``-like pair that changes
+    whenever the file does; it raises ``FileNotFoundError`` for missing files.
+    """
+
+    def resolve(self, path: Path) -> Path: ...
+
+    def fingerprint(self, path: Path) -> tuple[int, int]: ...
+
+    def exists(self, path: Path) -> bool: ...
+
+    def read(self, path: Path) -> str: ...
+
+    def write(self, path: Path, content: str) -> None: ...
+
+    def create(self, path: Path) -> None: ...
+
+
+class LocalStorage:
+    """Files on the local disk, read and written as UTF-8."""
+
+    def resolve(self, path: Path) -> Path:
+        return path.resolve()
+
+    def fingerprint(self, path: Path) -> tuple[int, int]:
+        stat = path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def exists(self, path: Path) -> bool:
+        return path.exists()
+
+    def read(self, path: Path) -> str:
+        return path.read_text(encoding="utf-8")
+
+    def write(self, path: Path, content: str) -> None:
+        path.write_text(content, encoding="utf-8")
+
+    def create(self, path: Path) -> None:
+        path.touch()
+
+
+class MemoryStorage:
+    """An in-memory filesystem: no syscalls, nothing touches the disk.
+
+    Paths are normalised lexically against a virtual ``/`` working directory,
+    so ``MemoryStorage({"src/app.py": ...})`` with ``root="."`` and
+    ``root="/"`` address the same file.
+    """
+
+    def __init__(self, files: Mapping[str | Path, str] | None = None) -> None:
+        self.files: dict[Path, str] = {}
+        # Bumped on every write; stands in for the mtime of a real file.
+        self._versions: dict[Path, int] = {}
+        self._clock = 0
+        for path, content in (files or {}).items():
+            self.write(self.resolve(Path(path)), content)
+
+    def resolve(self, path: Path) -> Path:
+        return Path(os.path.normpath(os.path.join(os.sep, path)))
+
+    def fingerprint(self, path: Path) -> tuple[int, int]:
+        content = self.read(path)
+        return self._versions[path], len(content)
+
+    def exists(self, path: Path) -> bool:
+        return path in self.files
+
+    def read(self, path: Path) -> str:
+        try:
+            return self.files[path]
+        except KeyError:
+            raise FileNotFoundError(str(path)) from None
+
+    def write(self, path: Path, content: str) -> None:
+        self._clock += 1
+        self.files[path] = content
+        self._versions[path] = self._clock
+
+    def create(self, path: Path) -> None:
+        if path not in self.files:
+            self.write(path, "")
+
+
+LOCAL_STORAGE = LocalStorage()
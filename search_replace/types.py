@@ -1,7 +1,13 @@
-from dataclasses import dataclass
-from typing import TypeAlias
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Literal, Protocol, TypeAlias
+
+if TYPE_CHECKING:
+    from .preview import DiffPreview
 
 Fence: TypeAlias = tuple[str, str]
+# A fence, or "auto" to detect it from the response with ``detect_fence``.
+FenceOption: TypeAlias = Fence | Literal["auto"]
+Span: TypeAlias = tuple[int, int]
 DEFAULT_FENCE: Fence = ("`" * 3, "`" * 3)
 
 
@@ -12,11 +18,156 @@ class EditBlock:
     updated: str
 
 
+class EditBlockLike(Protocol):
+    """What applying needs of a block: an ``EditBlock`` or an ``EditBlockView``."""
+
+    @property
+    def path(self) -> str: ...
+
+    @property
+    def original(self) -> str: ...
+
+    @property
+    def updated(self) -> str: ...
+
+
+@dataclass(frozen=True, slots=True)
+class EditBlockView:
+    """An ``EditBlock`` whose texts are ``(start, end)`` offsets into ``source``.
+
+    ``original`` and ``updated`` are sliced from the response on every access,
+    so storing many views keeps only the response itself in memory.
+    """
+
+    path: str
+    source: str = field(repr=False)
+    original_span: Span
+    updated_span: Span
+
+    @property
+    def original(self) -> str:
+        return self.source[self.original_span[0] : self.original_span[1]]
+
+    @property
+    def updated(self) -> str:
+        return self.source[self.updated_span[0] : self.updated_span[1]]
+
+    def to_edit_block(self) -> EditBlock:
+        return EditBlock(path=self.path, original=self.original, updated=self.updated)
+
+
+@dataclass(frozen=True, slots=True)
+class Hunk:
+    """Replace ``text[start:end]`` with ``replacement``.
+
+    Offsets are characters into the content the block was matched against;
+    ``start_line``/``end_line`` are the lines of that content the span covers
+    (equal for a pure insertion).
+    """
+
+    start: int
+    end: int
+    start_line: int
+    end_line: int
+    replacement: str
+
+
+@dataclass(frozen=True, slots=True)
+class Match:
+    """How a matching strategy placed one block in a file's content.
+
+    ``strategy`` is one of ``"exact"``, ``"whitespace"``, ``"dotdotdots"``,
+    ``"fuzzy"`` or ``"append"``; ``similarity`` is 1.0 except for fuzzy
+    matches. ``hunks`` are sorted and do not overlap, so ``apply`` builds the
+    new content in one pass.
+    """
+
+    strategy: str
+    hunks: tuple[Hunk, ...]
+    similarity: float = 1.0
+
+    @classmethod
+    def from_lines(
+        cls,
+        strategy: str,
+        whole_lines: list[str],
+        start: int,
+        end: int,
+        replace_lines: list[str],
+        similarity: float = 1.0,
+    ) -> "Match":
+        """A one-hunk match replacing ``whole_lines[start:end]``."""
+        char_start = sum(map(len, whole_lines[:start]))
+        char_end = char_start + sum(map(len, whole_lines[start:end]))
+        hunk = Hunk(char_start, char_end, start, end, "".join(replace_lines))
+        return cls(strategy, (hunk,), similarity)
+
+    @property
+    def size_change(self) -> int:
+        """How many characters longer the content gets."""
+        return sum(
+            len(hunk.replacement) - (hunk.end - hunk.start) for hunk in self.hunks
+        )
+
+    def apply(self, text: str) -> str:
+        pieces: list[str] = []
+        position = 0
+        for hunk in self.hunks:
+            pieces.append(text[position : hunk.start])
+            pieces.append(hunk.replacement)
+            position = hunk.end
+        pieces.append(text[position:])
+        return "".join(pieces)
+
+
 @dataclass(frozen=True, slots=True)
 class ParseResult:
     edits: list[EditBlock]
 
 
+@dataclass(slots=True)
+class ApplyStats:
+    """How much matching work one call did."""
+
+    # Edits spliced by a FilePlan instead of being applied one at a time.
+    planned_edits: int = 0
+    # Blocks a BlockLocator placed in their file before planning, and those it
+    # found at several places or nowhere, even ignoring indentation.
+    located_blocks: int = 0
+    ambiguous_blocks: int = 0
+    missing_blocks: int = 0
+
+    # Edits retried against chat_files after missing their own file.
+    fallback_edits: int = 0
+    # Candidate files considered across those edits.
+    fallback_candidates: int = 0
+    # Candidates that ran the full cascade, fuzzy matching included.
+    fallback_fuzzy: int = 0
+    # Candidates ranked out of the fuzzy stage.
+    fallback_pruned: int = 0
+    # Edits looked up in the repo index, and those it found a home for.
+    index_lookups: int = 0
+    index_recovered: int = 0
+
+    # Fuzzy windows scored with a full ratio, and those a cheap bound ruled out.
+    fuzzy_scored: int = 0
+    fuzzy_pruned: int = 0
+
+
 @dataclass(frozen=True, slots=True)
 class ApplyResult:
     updated_edits: list[EditBlock]
+    stats: ApplyStats = field(default_factory=ApplyStats)
+    # How each of updated_edits matched, against its file's content just
+    # before that edit was applied.
+    matches: list[Match] = field(default_factory=list)
+    # Unified diffs of what a dry run would change; None otherwise.
+    preview: "DiffPreview | None" = None
+
+
+@dataclass(frozen=True, slots=True)
+class BlockResult:
+    edit: EditBlockLike
+    updated_edit: EditBlock
+    applied: bool
+    match: Match | None = None
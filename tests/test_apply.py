@@ -1,14 +1,28 @@
+import asyncio
 import tempfile
+import time
 import unittest
 from pathlib import Path
-
-from search_replace import EditBlock
+from typing import AsyncIterator, Iterator
+from unittest import mock
+
+from search_replace import (
+    DEFAULT_FENCE,
+    BlockResult,
+    EditBlock,
+    MemoryStorage,
+    parse_edit_block_spans,
+)
 from search_replace.apply import (
+    _ApplySession,
     apply_edits,
+    apply_stream,
+    apply_stream_async,
     replace_most_similar_chunk,
     strip_quoted_wrapping,
+    try_dotdotdots,
 )
-from search_replace.errors import ApplyError, PathEscapeError
+from search_replace.errors import ApplyError, ParseError, PathEscapeError
 
 
 class TestApply(unittest.TestCase):
@@ -102,6 +116,39 @@ class TestApply(unittest.TestCase):
 
         self.assertEqual(result, expected_output)
 
+    def test_fuzzy_window_counts_reach_apply_stats(self) -> None:
+        files = {"a.txt": "alpha = 1\nbeta = 2\ngamma = 3\n", "b.txt": "b\n"}
+        edits = [
+            EditBlock("a.txt", "beta = 22\n", "beta = 200\n"),
+            EditBlock("b.txt", "b\n", "B\n"),
+        ]
+        for max_workers in (None, 2):
+            result = apply_edits(
+                edits, "/", storage=MemoryStorage(files), max_workers=max_workers
+            )
+
+            stats = result.stats
+            self.assertGreaterEqual(stats.fuzzy_scored, 1)
+            self.assertEqual(stats.fuzzy_scored + stats.fuzzy_pruned, 3)
+            self.assertEqual(stats.planned_edits, 1)
+
+    def test_applies_edit_block_views(self) -> None:
+        response = (
+            "a.txt\n```\n<<<<<<< SEARCH\none\n=======\nONE\n>>>>>>> REPLACE\n```\n"
+            "a.txt\n```\n<<<<<<< SEARCH\nzzz\n=======\nx\n>>>>>>> REPLACE\n```\n"
+        )
+        storage = MemoryStorage({"a.txt": "one\ntwo\n"})
+        views = parse_edit_block_spans(response)
+
+        with self.assertRaises(ApplyError) as ctx:
+            apply_edits(views, "/", storage=storage)
+
+        self.assertEqual(storage.files[Path("/a.txt")], "ONE\ntwo\n")
+        self.assertEqual(
+            (ctx.exception.passed, ctx.exception.failed), ([views[0]], [views[1]])
+        )
+        self.assertEqual(ctx.exception.updated_edits[0], views[0].to_edit_block())
+
     def test_replace_with_fuzzy_matching_below_threshold_returns_none(self) -> None:
         whole = "alpha = 1\nbeta = 2\ngamma = 3\n"
         part = "totally unrelated sentence here\n"
@@ -193,6 +240,58 @@ class TestApply(unittest.TestCase):
             self.assertIn("would apply successfully", text)
             self.assertNotIn("were applied successfully", text)
 
+    def test_each_file_is_read_and_written_once(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = Path(tmp_dir)
+            file1 = root / "file.txt"
+            file1.write_text("one\ntwo\nthree\n", encoding="utf-8")
+
+            edits = [
+                EditBlock(path="file.txt", original="one\n", updated="1\n"),
+                EditBlock(path="file.txt", original="1\ntwo\n", updated="1\n2\n"),
+                EditBlock(path="file.txt", original="three\n", updated="3\n"),
+            ]
+            read_text = Path.read_text
+            write_text = Path.write_text
+            with (
+                mock.patch.object(
+                    Path, "read_text", autospec=True, side_effect=read_text
+                ) as reads,
+                mock.patch.object(
+                    Path, "write_text", autospec=True, side_effect=write_text
+                ) as writes,
+            ):
+                apply_edits(edits, root=root)
+
+            self.assertEqual(reads.call_count, 1)
+            self.assertEqual(writes.call_count, 1)
+            self.assertEqual(file1.read_text(encoding="utf-8"), "1\n2\n3\n")
+
+    def test_passed_blocks_are_written_when_another_block_fails(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = Path(tmp_dir)
+            file1 = root / "file.txt"
+            file1.write_text("one\ntwo\n", encoding="utf-8")
+
+            edits = [
+                EditBlock(path="file.txt", original="one\n", updated="1\n"),
+                EditBlock(path="file.txt", original="does-not-exist\n", updated="x\n"),
+            ]
+            with self.assertRaises(ApplyError) as ctx:
+                apply_edits(edits, root=root)
+
+            self.assertIn("were applied successfully", str(ctx.exception))
+            self.assertEqual(file1.read_text(encoding="utf-8"), "1\ntwo\n")
+
+    def test_dry_run_does_not_create_new_files(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = Path(tmp_dir)
+            edits = [EditBlock(path="new.txt", original="", updated="hello\n")]
+
+            apply_edits(edits, root=root, dry_run=True)
+
+            self.assertFalse((root / "new.txt").exists())
+
     def test_rejects_relative_path_escape(self) -> None:
         with tempfile.TemporaryDirectory() as tmp_dir:
             temp_path = Path(tmp_dir)
@@ -251,5 +350,482 @@ class TestApply(unittest.TestCase):
             self.assertIn("The SEARCH section must exactly match", text)
 
 
+class TestTryDotdotdots(unittest.TestCase):
+    whole = "def f():\n    a = 1\n    b = 2\n    c = 3\n    return a\n"
+
+    def test_replaces_each_piece(self) -> None:
+        part = "    a = 1\n...\n    return a\n"
+        replace = "    a = 10\n...\n    return a + 1\n"
+        match = try_dotdotdots(self.whole, part, replace)
+
+        assert match is not None
+        self.assertEqual(
+            match.apply(self.whole),
+            "def f():\n    a = 10\n    b = 2\n    c = 3\n    return a + 1\n",
+        )
+        self.assertEqual(
+            [(hunk.start_line, hunk.end_line) for hunk in match.hunks], [(1, 2), (4, 5)]
+        )
+
+    def test_without_dots_returns_none(self) -> None:
+        self.assertIsNone(try_dotdotdots(self.whole, "    a = 1\n", "    a = 2\n"))
+
+    def test_empty_piece_appends(self) -> None:
+        match = try_dotdotdots("x = 1\nz", "x = 1\n...\n", "x = 1\n...\ny = 2\n")
+
+        assert match is not None
+        self.assertEqual(match.apply("x = 1\nz"), "x = 1\nz\ny = 2\n")
+
+    def test_unpaired_and_unmatched_dots(self) -> None:
+        with self.assertRaisesRegex(ValueError, "Unpaired"):
+            try_dotdotdots(self.whole, "    a = 1\n...\n", "    a = 2\n")
+        with self.assertRaisesRegex(ValueError, "Unmatched"):
+            try_dotdotdots(self.whole, "a\n...\nb\n", "a\n    ...\nb\n")
+
+    def test_missing_duplicate_or_overlapping_piece(self) -> None:
+        for part in (
+            "    a = 1\n...\n    d = 4\n",
+            "    a = 1\n...\n    = ",
+            "    a = 1\n    b = 2\n...\n    b = 2\n",
+        ):
+            with self.subTest(part=part), self.assertRaises(ValueError):
+                try_dotdotdots(self.whole, part, part)
+
+
+class TestApplyPlanned(unittest.TestCase):
+    def edits(self) -> list[EditBlock]:
+        return [
+            EditBlock("a.txt", "one\n", "ONE\n"),
+            EditBlock("b.txt", "beta\n", "BETA\n"),
+            EditBlock("a.txt", "three\n", "two\n"),
+            # Depends on the previous edit, so it is applied on its own.
+            EditBlock("a.txt", "two\n", "TWO\n"),
+            EditBlock("a.txt", "four\n", "FOUR\n"),
+            EditBlock("a.txt", "five\n", "FIVE\n"),
+        ]
+
+    def files(self) -> dict[str, str]:
+        return {"a.txt": "one\nthree\n  four\nfive\ntwo\n", "b.txt": "beta\n"}
+
+    def test_matches_one_at_a_time(self) -> None:
+        planned_storage = MemoryStorage(self.files())
+        result = apply_edits(self.edits(), root="/", storage=planned_storage)
+
+        sequential_storage = MemoryStorage(self.files())
+        session = _ApplySession(
+            "/", None, DEFAULT_FENCE, False, storage=sequential_storage
+        )
+        for edit in self.edits():
+            session.apply(edit)
+        session.flush()
+
+        self.assertEqual(planned_storage.files, sequential_storage.files)
+        self.assertEqual(
+            planned_storage.files[Path("/a.txt")], "ONE\nTWO\n  FOUR\nFIVE\ntwo\n"
+        )
+        self.assertEqual(result.updated_edits, session.updated_edits)
+        # The dependent edit and the whitespace-tolerant one are not planned.
+        self.assertEqual(result.stats.planned_edits, 4)
+        self.assertEqual(result.stats.located_blocks, 6)
+
+    def test_parallel_matches_sequential(self) -> None:
+        planned_storage = MemoryStorage(self.files())
+        parallel_storage = MemoryStorage(self.files())
+
+        apply_edits(self.edits(), root="/", storage=planned_storage)
+        apply_edits(self.edits(), root="/", storage=parallel_storage, max_workers=2)
+
+        self.assertEqual(planned_storage.files, parallel_storage.files)
+
+    def test_counts_ambiguous_and_missing_blocks(self) -> None:
+        edits = [
+            EditBlock("a.txt", "x = 1\n", "x = 0\n"),
+            EditBlock("a.txt", "z = 3\n", "z = 4\n"),
+        ]
+        for max_workers in (None, 2):
+            storage = MemoryStorage({"a.txt": "x = 1\ny = 2\nx = 1\n"})
+
+            with self.assertRaises(ApplyError) as ctx:
+                apply_edits(edits, "/", storage=storage, max_workers=max_workers)
+
+            stats = ctx.exception.stats
+            self.assertEqual(
+                (stats.located_blocks, stats.ambiguous_blocks, stats.missing_blocks),
+                (2, 1, 1),
+            )
+            self.assertEqual(storage.files[Path("/a.txt")], "x = 0\ny = 2\nx = 1\n")
+
+
+class TestApplyMatches(unittest.TestCase):
+    def test_matches_replay_the_edits(self) -> None:
+        files = {"a.txt": "one\n  two\nthree\nfour\n", "b.txt": "alpha\nbeta\n"}
+        edits = [
+            EditBlock("a.txt", "one\n", "ONE\n"),
+            EditBlock("a.txt", "two\n", "TWO\n"),
+            EditBlock("b.txt", "", "gamma\n"),
+            EditBlock("a.txt", "three\n...\nfour\n", "3\n...\n4\n"),
+        ]
+        storage = MemoryStorage(files)
+
+        result = apply_edits(edits, root="/", storage=storage)
+
+        self.assertEqual(
+            [match.strategy for match in result.matches],
+            ["exact", "whitespace", "append", "dotdotdots"],
+        )
+        contents = {Path("/", name): text for name, text in files.items()}
+        for edit, match in zip(result.updated_edits, result.matches):
+            path = Path("/", edit.path)
+            contents[path] = match.apply(contents[path])
+        self.assertEqual(contents, storage.files)
+
+        (hunk,) = result.matches[1].hunks
+        self.assertEqual((hunk.start_line, hunk.end_line), (1, 2))
+        self.assertEqual(hunk.replacement, "  TWO\n")
+
+    def test_block_result_carries_the_match(self) -> None:
+        storage = MemoryStorage({"a.txt": "one\n"})
+        results: list[BlockResult] = []
+
+        apply_stream(
+            ["a.txt\n```\n<<<<<<< SEARCH\none\n=======\n1\n>>>>>>> REPLACE\n```\n"],
+            root="/",
+            storage=storage,
+            on_block=results.append,
+        )
+
+        (result,) = results
+        assert result.match is not None
+        self.assertEqual(result.match.strategy, "exact")
+
+
+class TestApplyParallel(unittest.TestCase):
+    def write_files(self, root: Path, count: int) -> None:
+        for index in range(count):
+            (root / f"f{index}.txt").write_text(
+                f"a{index}\nb{index}\nc{index}\n", encoding="utf-8"
+            )
+
+    def test_matches_sequential_results(self) -> None:
+        edits = []
+        for index in range(6):
+            edits.append(EditBlock(f"f{index}.txt", f"a{index}\n", f"A{index}\n"))
+        for index in range(6):
+            edits.append(
+                EditBlock(f"f{index}.txt", f"A{index}\nb{index}\n", f"AB{index}\n")
+            )
+        edits.append(EditBlock("f2.txt", "missing\n", "x\n"))
+        edits.append(EditBlock("new.txt", "", "created\n"))
+
+        results = []
+        for max_workers in (None, 4):
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                root = Path(tmp_dir)
+                self.write_files(root, 6)
+                with self.assertRaises(ApplyError) as ctx:
+                    apply_edits(edits, root=root, max_workers=max_workers)
+                contents = {
+                    path.name: path.read_text(encoding="utf-8")
+                    for path in sorted(root.iterdir())
+                }
+                error = ctx.exception
+                results.append(
+                    (error.passed, error.failed, error.updated_edits, contents)
+                )
+
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[1][3]["f3.txt"], "AB3\nc3\n")
+        self.assertEqual(results[1][3]["new.txt"], "created\n")
+
+    def test_fallback_keeps_sequential_order(self) -> None:
+        # The first edit misses f0 and lands in f1, so the second one misses.
+        edits = [
+            EditBlock("f0.txt", "b1\n", "B\n"),
+            EditBlock("f1.txt", "b1\n", "Z\n"),
+        ]
+        outcomes = []
+        for max_workers in (None, 2):
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                root = Path(tmp_dir)
+                self.write_files(root, 2)
+                with self.assertRaises(ApplyError) as ctx:
+                    apply_edits(
+                        edits, root=root, chat_files=["f1.txt"], max_workers=max_workers
+                    )
+                outcomes.append(
+                    (
+                        [e.path for e in ctx.exception.updated_edits],
+                        ctx.exception.failed,
+                        (root / "f1.txt").read_text(encoding="utf-8"),
+                    )
+                )
+
+        self.assertEqual(outcomes[0], outcomes[1])
+        self.assertEqual(outcomes[1][2], "a1\nB\nc1\n")
+
+    def test_path_escape_applies_earlier_edits(self) -> None:
+        edits = [
+            EditBlock("f0.txt", "a0\n", "A0\n"),
+            EditBlock("../outside.txt", "", "x\n"),
+            EditBlock("f1.txt", "a1\n", "A1\n"),
+        ]
+        for max_workers in (None, 2):
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                root = Path(tmp_dir)
+                self.write_files(root, 2)
+                with self.assertRaises(PathEscapeError):
+                    apply_edits(edits, root=root, max_workers=max_workers)
+                self.assertEqual(
+                    (root / "f0.txt").read_text(encoding="utf-8"), "A0\nb0\nc0\n"
+                )
+                self.assertEqual(
+                    (root / "f1.txt").read_text(encoding="utf-8"), "a1\nb1\nc1\n"
+                )
+
+
+class TestApplyErrorReport(unittest.TestCase):
+    def test_report_is_built_on_first_access(self) -> None:
+        storage = MemoryStorage({"a.txt": "one\ntwo\nthree\n"})
+        edits = [
+            EditBlock("a.txt", "tw0\n", "2\n"),
+            EditBlock("a.txt", "one\n", "1\n"),
+        ]
+
+        with mock.patch(
+            "search_replace.apply.find_similar_lines", return_value="two"
+        ) as find_similar_lines:
+            with self.assertRaises(ApplyError) as ctx:
+                apply_edits(edits, root="/", storage=storage)
+            error = ctx.exception
+
+            self.assertEqual(error.failed, [edits[0]])
+            self.assertEqual(error.passed, [edits[1]])
+            find_similar_lines.assert_not_called()
+
+            self.assertEqual(error.did_you_mean(edits[0]), "two")
+            self.assertIn("Did you mean", str(error))
+            self.assertIs(error.message, str(error))
+            find_similar_lines.assert_called_once()
+
+    def test_message_can_still_be_a_string(self) -> None:
+        error = ApplyError(message="boom", failed=[], passed=[], updated_edits=[])
+
+        self.assertEqual(str(error), "boom")
+        self.assertEqual(error.timed_out, [])
+        self.assertEqual(error.did_you_mean(EditBlock("a", "b", "c")), "")
+
+
+class TestApplyFallback(unittest.TestCase):
+    def test_exact_match_in_any_chat_file_beats_fuzzy(self) -> None:
+        storage = MemoryStorage(
+            {
+                "a.txt": "alpha\nbeta\ngamma_\n",
+                "b.txt": "x\nalpha\nbeta\ngamma\n",
+            }
+        )
+        edits = [EditBlock("missing.txt", "alpha\nbeta\ngamma\n", "changed\n")]
+
+        result = apply_edits(
+            edits, root="/", chat_files=["a.txt", "b.txt"], storage=storage
+        )
+
+        self.assertEqual(result.updated_edits[0].path, "b.txt")
+        self.assertEqual(storage.files[Path("/b.txt")], "x\nchanged\n")
+        self.assertEqual(result.stats.fallback_fuzzy, 0)
+
+    def test_fuzzy_runs_only_on_top_candidates(self) -> None:
+        body = "".join(f"line number {index} of the body\n" for index in range(10))
+        files = {f"other{index}.txt": f"unrelated {index}\n" * 10 for index in range(4)}
+        files["target.txt"] = body
+        storage = MemoryStorage(files)
+        search = body.replace("line number 3 ", "line numbr 3 ")
+        edits = [EditBlock("missing.txt", search, "replaced\n")]
+
+        result = apply_edits(
+            edits,
+            root="/",
+            chat_files=sorted(files),
+            storage=storage,
+            fallback_top_k=1,
+        )
+
+        self.assertEqual(result.updated_edits[0].path, "target.txt")
+        self.assertEqual(storage.files[Path("/target.txt")], "replaced\n")
+        stats = result.stats
+        self.assertEqual(
+            (
+                stats.fallback_edits,
+                stats.fallback_candidates,
+                stats.fallback_fuzzy,
+                stats.fallback_pruned,
+            ),
+            (1, 5, 1, 4),
+        )
+
+    def test_failure_reports_stats(self) -> None:
+        storage = MemoryStorage({"a.txt": "a\n", "b.txt": "b\n", "c.txt": "c\n"})
+        edits = [EditBlock("a.txt", "zzz\n", "x\n")]
+
+        with self.assertRaises(ApplyError) as ctx:
+            apply_edits(
+                edits,
+                root="/",
+                chat_files=["a.txt", "b.txt", "c.txt"],
+                storage=storage,
+                fallback_top_k=1,
+            )
+
+        self.assertEqual(ctx.exception.stats.fallback_candidates, 2)
+        self.assertEqual(ctx.exception.stats.fallback_fuzzy, 1)
+        self.assertEqual(ctx.exception.stats.fallback_pruned, 1)
+
+    def test_skips_the_edits_own_file(self) -> None:
+        storage = MemoryStorage({"a.py": "a = 1\n", "b.py": "b = 2\n"})
+        edits = [EditBlock("a.py", "zzz\n", "x\n")]
+
+        with self.assertRaises(ApplyError) as ctx:
+            apply_edits(edits, root="/", chat_files=["a.py", "b.py"], storage=storage)
+
+        stats = ctx.exception.stats
+        self.assertEqual((stats.fallback_candidates, stats.fallback_fuzzy), (1, 1))
+
+
+class TestApplyBudget(unittest.TestCase):
+    def test_expired_deadline_stops_fuzzy_matching(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = Path(tmp_dir)
+            file1 = root / "file.txt"
+            file1.write_text("alpha = 1\nbeta = 2\ngamma = 3\n", encoding="utf-8")
+
+            exact = EditBlock(path="file.txt", original="alpha = 1\n", updated="a\n")
+            fuzzy = EditBlock(path="file.txt", original="beta = 22\n", updated="b\n")
+
+            with self.assertRaises(ApplyError) as ctx:
+                apply_edits([exact, fuzzy], root=root, deadline=time.monotonic())
+
+            self.assertEqual(ctx.exception.passed, [exact])
+            self.assertEqual(ctx.exception.failed, [fuzzy])
+            self.assertEqual(ctx.exception.timed_out, [fuzzy])
+            self.assertNotIn("Did you mean", str(ctx.exception))
+            self.assertEqual(
+                file1.read_text(encoding="utf-8"), "a\nbeta = 2\ngamma = 3\n"
+            )
+
+    def test_generous_budget_still_matches(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = Path(tmp_dir)
+            file1 = root / "file.txt"
+            file1.write_text("alpha = 1\nbeta = 2\ngamma = 3\n", encoding="utf-8")
+
+            edits = [EditBlock(path="file.txt", original="beta = 22\n", updated="b\n")]
+            apply_edits(edits, root=root, budget_ms=60_000)
+
+            self.assertEqual(
+                file1.read_text(encoding="utf-8"), "alpha = 1\nb\ngamma = 3\n"
+            )
+
+    def test_strategy_budget_only_limits_that_stage(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = Path(tmp_dir)
+            (root / "file.txt").write_text("one\ntwo\nthree\n", encoding="utf-8")
+
+            missing = EditBlock(path="file.txt", original="tw0\n", updated="2\n")
+            with self.assertRaises(ApplyError) as ctx:
+                apply_edits(
+                    [missing], root=root, strategy_budgets_ms={"did_you_mean": 0}
+                )
+
+            self.assertEqual(ctx.exception.timed_out, [])
+            self.assertNotIn("Did you mean", str(ctx.exception))
+
+    def test_unknown_strategy_budget_is_rejected(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir, self.assertRaises(ValueError):
+            apply_edits([], root=tmp_dir, strategy_budgets_ms={"exact": 10})
+
+
+STREAMED_RESPONSE = """Here you go:
+
+a.txt
+```text
+<<<<<<< SEARCH
+one
+=======
+ONE
+>>>>>>> REPLACE
+```
+
+b.txt
+```text
+<<<<<<< SEARCH
+two
+=======
+TWO
+>>>>>>> REPLACE
+```
+"""
+
+
+class TestApplyStream(unittest.TestCase):
+    def test_blocks_are_applied_before_stream_ends(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = Path(tmp_dir)
+            (root / "a.txt").write_text("one\n", encoding="utf-8")
+            (root / "b.txt").write_text("two\n", encoding="utf-8")
+
+            seen_before_b: list[str] = []
+
+            def chunks() -> Iterator[str]:
+                head, tail = STREAMED_RESPONSE.split("b.txt\n")
+                yield head
+                seen_before_b.append((root / "a.txt").read_text(encoding="utf-8"))
+                yield "b.txt\n" + tail
+
+            results: list[BlockResult] = []
+            result = apply_stream(chunks(), root=root, on_block=results.append)
+
+            self.assertEqual(seen_before_b, ["ONE\n"])
+            self.assertEqual([r.edit.path for r in results], ["a.txt", "b.txt"])
+            self.assertTrue(all(r.applied for r in results))
+            self.assertEqual(len(result.updated_edits), 2)
+            self.assertEqual((root / "b.txt").read_text(encoding="utf-8"), "TWO\n")
+
+    def test_failed_block_raises_apply_error_at_end(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = Path(tmp_dir)
+            (root / "a.txt").write_text("one\n", encoding="utf-8")
+            (root / "b.txt").write_text("something else\n", encoding="utf-8")
+
+            results: list[BlockResult] = []
+            with self.assertRaises(ApplyError) as ctx:
+                apply_stream([STREAMED_RESPONSE], root=root, on_block=results.append)
+
+            self.assertEqual([r.applied for r in results], [True, False])
+            self.assertEqual([e.path for e in ctx.exception.failed], ["b.txt"])
+            self.assertIn("were applied successfully", str(ctx.exception))
+
+    def test_no_blocks_raises_parse_error(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir, self.assertRaises(ParseError):
+            apply_stream(["no edits ", "here\n"], root=tmp_dir)
+
+    def test_async_iterator(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = Path(tmp_dir)
+            (root / "a.txt").write_text("one\n", encoding="utf-8")
+            (root / "b.txt").write_text("two\n", encoding="utf-8")
+
+            async def chunks() -> AsyncIterator[str]:
+                for index in range(0, len(STREAMED_RESPONSE), 16):
+                    yield STREAMED_RESPONSE[index : index + 16]
+
+            results: list[BlockResult] = []
+            result = asyncio.run(
+                apply_stream_async(chunks(), root=root, on_block=results.append)
+            )
+
+            self.assertEqual(len(results), 2)
+            self.assertEqual(len(result.updated_edits), 2)
+            self.assertEqual((root / "a.txt").read_text(encoding="utf-8"), "ONE\n")
+
+
 if __name__ == "__main__":
     unittest.main()
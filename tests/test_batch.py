@@ -0,0 +1,67 @@
+import io
+import json
+import unittest
+
+from search_replace import EditBlock, ParseStats, parse_jsonl, parse_many
+from search_replace.errors import ParseError
+
+GOOD = "a.py\n```\n<<<<<<< SEARCH\none\n=======\nONE\n>>>>>>> REPLACE\n```\n"
+TWO_BLOCKS = GOOD + GOOD.replace("a.py", "b.py")
+MISSING_FILENAME = "<<<<<<< SEARCH\none\n=======\nONE\n>>>>>>> REPLACE\n"
+
+
+class TestParseMany(unittest.TestCase):
+    def test_in_process(self) -> None:
+        stats = ParseStats()
+
+        outcomes = list(
+            parse_many([GOOD, MISSING_FILENAME, "no blocks"], workers=1, stats=stats)
+        )
+
+        self.assertEqual(outcomes[0].edits, [EditBlock("a.py", "one\n", "ONE\n")])
+        self.assertIsInstance(outcomes[1].error, ParseError)
+        self.assertEqual(outcomes[2].edits, [])
+        self.assertIsNone(outcomes[2].error)
+        self.assertEqual((stats.responses, stats.blocks, stats.errors), (3, 1, 1))
+
+    def test_process_pool_keeps_input_order(self) -> None:
+        responses = [GOOD, TWO_BLOCKS, MISSING_FILENAME] * 20
+        stats = ParseStats()
+
+        outcomes = list(parse_many(responses, workers=2, chunksize=4, stats=stats))
+
+        expected = list(parse_many(responses, workers=1))
+        self.assertEqual([o.edits for o in outcomes], [o.edits for o in expected])
+        self.assertEqual(
+            [str(o.error) for o in outcomes], [str(o.error) for o in expected]
+        )
+        self.assertEqual((stats.responses, stats.blocks, stats.errors), (60, 60, 20))
+        self.assertGreater(stats.blocks_per_second, 0)
+
+    def test_jsonl(self) -> None:
+        infile = io.StringIO(
+            json.dumps({"response": GOOD})
+            + "\n\n"
+            + json.dumps({"response": MISSING_FILENAME})
+            + "\n"
+        )
+        outfile = io.StringIO()
+
+        stats = parse_jsonl(infile, outfile, workers=1)
+
+        records = [json.loads(line) for line in outfile.getvalue().splitlines()]
+        self.assertEqual(
+            records[0],
+            {
+                "index": 0,
+                "edits": [{"path": "a.py", "original": "one\n", "updated": "ONE\n"}],
+                "error": None,
+            },
+        )
+        self.assertEqual(records[1]["index"], 1)
+        self.assertIn("Bad/missing filename", records[1]["error"])
+        self.assertEqual(stats.responses, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from search_replace import EditBlock, FileCache, MemoryStorage
+from search_replace.apply import apply_edits
+from search_replace.document import Document
+from search_replace.storage import LocalStorage
+
+
+class TestFileCache(unittest.TestCase):
+    def test_hit_until_file_changes(self) -> None:
+        storage = MemoryStorage({"a.txt": "one\n"})
+        cache = FileCache()
+        path = Path("/a.txt")
+
+        self.assertEqual(cache.read(path, storage), "one\n")
+        self.assertEqual(cache.read(path, storage), "one\n")
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        storage.write(path, "two\n")
+        self.assertEqual(cache.read(path, storage), "two\n")
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_missing_file(self) -> None:
+        cache = FileCache()
+        self.assertIsNone(cache.read(Path("/nope.txt"), MemoryStorage()))
+        self.assertEqual(len(cache), 0)
+
+    def test_lru_eviction_by_size(self) -> None:
+        storage = MemoryStorage({"a": "a" * 4, "b": "b" * 4, "c": "c" * 4})
+        cache = FileCache(max_bytes=8)
+
+        cache.read(Path("/a"), storage)
+        cache.read(Path("/b"), storage)
+        cache.read(Path("/a"), storage)
+        cache.read(Path("/c"), storage)
+
+        self.assertEqual(cache.size, 8)
+        self.assertEqual(cache.evictions, 1)
+        cache.read(Path("/a"), storage)
+        cache.read(Path("/b"), storage)
+        self.assertEqual((cache.hits, cache.misses), (2, 4))
+
+    def test_oversized_file_not_cached(self) -> None:
+        storage = MemoryStorage({"big": "x" * 10})
+        cache = FileCache(max_bytes=5)
+
+        self.assertEqual(cache.read(Path("/big"), storage), "x" * 10)
+        self.assertEqual(len(cache), 0)
+
+    def test_document_reused_across_calls(self) -> None:
+        storage = MemoryStorage({"a.txt": "one\ntwo\nthree\n"})
+        cache = FileCache()
+        path = Path("/a.txt")
+        content = cache.read(path, storage)
+        assert content is not None
+
+        document = cache.document(path, content)
+        self.assertIs(cache.document(path, content), document)
+        self.assertIsNone(cache.document(path, "other\n"))
+
+    def test_size_counts_encoded_bytes(self) -> None:
+        storage = MemoryStorage({"a": "é" * 4})
+        cache = FileCache()
+
+        cache.read(Path("/a"), storage)
+
+        self.assertEqual(cache.size, 8)
+
+    def test_document_counts_toward_budget(self) -> None:
+        content = "line\n" * 100
+        storage = MemoryStorage({"a": content, "b": content})
+        estimate = Document(content).estimated_size()
+        cache = FileCache(max_bytes=len(content) + estimate + 10)
+        cache.read(Path("/a"), storage)
+        cache.read(Path("/b"), storage)
+
+        cache.document(Path("/b"), content)
+
+        self.assertEqual(cache.size, len(content) + estimate)
+        self.assertEqual(cache.evictions, 1)
+        self.assertEqual(len(cache), 1)
+
+    def test_oversized_document_not_cached(self) -> None:
+        content = "line\n" * 100
+        storage = MemoryStorage({"a": content})
+        cache = FileCache(max_bytes=len(content) + 1)
+        cache.read(Path("/a"), storage)
+
+        document = cache.document(Path("/a"), content)
+
+        self.assertIsNotNone(document)
+        self.assertIsNot(cache.document(Path("/a"), content), document)
+        self.assertEqual((cache.size, cache.evictions), (len(content), 0))
+
+
+class TestApplyWithCache(unittest.TestCase):
+    def test_repeated_calls_hit_cache(self) -> None:
+        storage = MemoryStorage({"a.txt": "one\ntwo\n"})
+        cache = FileCache()
+
+        apply_edits(
+            [EditBlock(path="a.txt", original="one\n", updated="ONE\n")],
+            root="/",
+            storage=storage,
+            cache=cache,
+        )
+        apply_edits(
+            [EditBlock(path="a.txt", original="two\n", updated="TWO\n")],
+            root="/",
+            storage=storage,
+            cache=cache,
+        )
+
+        self.assertEqual(storage.files[Path("/a.txt")], "ONE\nTWO\n")
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_external_change_is_seen(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            path = root / "a.txt"
+            path.write_text("one\n", encoding="utf-8")
+            cache = FileCache()
+            storage = LocalStorage()
+
+            apply_edits(
+                [EditBlock(path="a.txt", original="one\n", updated="two\n")],
+                root=root,
+                cache=cache,
+            )
+            path.write_text("three\n", encoding="utf-8")
+            stat = path.stat()
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+            apply_edits(
+                [EditBlock(path="a.txt", original="three\n", updated="four\n")],
+                root=root,
+                storage=storage,
+                cache=cache,
+            )
+
+            self.assertEqual(path.read_text(encoding="utf-8"), "four\n")
+            self.assertEqual(cache.hits, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import unittest
+
+from search_replace import (
+    ApplyError,
+    MemoryStorage,
+    ParseError,
+    PathEscapeError,
+    SearchReplaceError,
+    apply_edits,
+    evaluate_candidates,
+    parse_edit_blocks,
+)
+
+
+def _response(path: str, original: str, updated: str) -> str:
+    return (
+        f"{path}\n```python\n<<<<<<< SEARCH\n{original}=======\n"
+        f"{updated}>>>>>>> REPLACE\n```\n"
+    )
+
+
+FILES = {
+    "app.py": "def main():\n    run()\n    report()\n",
+    "util.py": "def run():\n    pass\n",
+}
+
+
+class TestEvaluateCandidates(unittest.TestCase):
+    def test_ranks_clean_candidates_first(self) -> None:
+        responses = [
+            _response("app.py", "missing()\n", "x\n"),
+            "no blocks here",
+            _response("app.py", "    run()\n", "    run(fast=True)\n")
+            + _response("util.py", "    pass\n", "    return 1\n"),
+            _response("app.py", "    report()\n", "    report(verbose=True)\n"),
+        ]
+        storage = MemoryStorage(FILES)
+
+        results = evaluate_candidates(responses, "/", storage=storage)
+
+        self.assertEqual([result.index for result in results], [2, 3, 0, 1])
+        best = results[0]
+        self.assertTrue(best.applies)
+        self.assertEqual(best.matched, 2)
+        self.assertEqual(best.strategies, {"exact": 2})
+        self.assertEqual(best.similarity, 1.0)
+        assert best.preview is not None
+        self.assertEqual(best.preview.paths, ["app.py", "util.py"])
+        self.assertIsInstance(results[2].error, ApplyError)
+        self.assertEqual(len(results[2].failed), 1)
+        self.assertIsInstance(results[3].error, ParseError)
+        # Nothing was written.
+        self.assertEqual(storage.files, MemoryStorage(FILES).files)
+
+    def test_candidates_do_not_see_each_other(self) -> None:
+        responses = [
+            _response("util.py", "    pass\n", "    return 1\n"),
+            _response("util.py", "    pass\n", "    return 2\n"),
+        ]
+
+        results = evaluate_candidates(
+            responses, "/", storage=MemoryStorage(FILES), max_workers=2
+        )
+
+        self.assertTrue(all(result.applies for result in results))
+        self.assertEqual([result.index for result in results], [0, 1])
+
+    def test_reports_fuzzy_similarity(self) -> None:
+        content = "".join(f"value_{n} = compute({n})\n" for n in range(10))
+        original = content.replace("compute(4)", "compte(4)")
+        responses = [
+            _response("big.py", original, "replaced\n"),
+            _response("big.py", content, "replaced\n"),
+        ]
+
+        results = evaluate_candidates(
+            responses, "/", storage=MemoryStorage({"big.py": content})
+        )
+
+        self.assertEqual([result.index for result in results], [1, 0])
+        self.assertEqual(results[1].strategies, {"fuzzy": 1})
+        self.assertLess(results[1].similarity, 1.0)
+
+    def test_previews_dotted_and_partly_failing_candidates(self) -> None:
+        responses = [
+            _response("app.py", "def main():\n...\n    report()\n", "def go():\n...\n")
+            + _response("app.py", "absent\n", "x\n"),
+        ]
+
+        (result,) = evaluate_candidates(responses, "/", storage=MemoryStorage(FILES))
+
+        self.assertIsInstance(result.error, ApplyError)
+        self.assertEqual(result.strategies, {"dotdotdots": 1})
+        self.assertEqual(
+            str(result.preview),
+            "--- a/app.py\n+++ b/app.py\n@@ -1,3 +1,2 @@\n"
+            "-def main():\n+def go():\n     run()\n-    report()\n",
+        )
+
+    def test_reports_paths_outside_root(self) -> None:
+        storage = MemoryStorage({"/repo/a.py": "a\n", "/b.py": "b\n"})
+
+        (result,) = evaluate_candidates(
+            [_response("../b.py", "b\n", "c\n")], "/repo", storage=storage
+        )
+
+        self.assertIsInstance(result.error, PathEscapeError)
+        self.assertEqual(result.matched, 0)
+
+    def test_matches_dry_run_of_each_response(self) -> None:
+        responses = [
+            _response("app.py", "    run()\n", "    go()\n"),
+            _response("new.py", "", "created\n"),
+            _response("app.py", "absent\n", "y\n"),
+        ]
+
+        results = evaluate_candidates(responses, "/", storage=MemoryStorage(FILES))
+
+        for result in results:
+            edits = parse_edit_blocks(responses[result.index]).edits
+            try:
+                expected = apply_edits(
+                    edits, "/", dry_run=True, storage=MemoryStorage(FILES)
+                )
+            except SearchReplaceError as exc:
+                self.assertIs(type(result.error), type(exc))
+                continue
+            self.assertEqual(result.matches, expected.matches)
+            self.assertEqual(str(result.preview), str(expected.preview))
+
+
+if __name__ == "__main__":
+    unittest.main()
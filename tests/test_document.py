@@ -0,0 +1,82 @@
+import unittest
+
+from search_replace.apply import (
+    perfect_replace,
+    replace_part_with_missing_leading_whitespace,
+)
+from search_replace.document import Document, LineIndex, NormalizedLines
+
+
+class TestLineIndex(unittest.TestCase):
+    def test_find_returns_first_occurrence(self) -> None:
+        index = LineIndex(["a\n", "b\n", "c\n", "a\n", "b\n", "c\n"])
+        self.assertEqual(index.find(["b\n", "c\n"]), 1)
+
+    def test_find_verifies_every_line_of_the_window(self) -> None:
+        index = LineIndex(["x\n", "a\n", "y\n", "a\n", "b\n"])
+        self.assertEqual(index.find(["a\n", "b\n"]), 3)
+
+    def test_find_ignores_windows_that_overrun_the_file(self) -> None:
+        index = LineIndex(["rare\n", "a\n", "a\n"])
+        self.assertEqual(index.find(["a\n", "rare\n"]), -1)
+        self.assertEqual(index.find(["a\n", "a\n", "a\n"]), -1)
+
+    def test_find_missing_line(self) -> None:
+        index = LineIndex(["a\n", "b\n"])
+        self.assertEqual(index.find(["a\n", "z\n"]), -1)
+
+    def test_empty_part_matches_at_start(self) -> None:
+        self.assertEqual(LineIndex(["a\n"]).find([]), 0)
+
+
+class TestNormalizedLines(unittest.TestCase):
+    def test_iter_matches_ignores_indentation(self) -> None:
+        normalized = NormalizedLines(["  a\n", "b\n", "\ta\n", "    b\n", "a\n"])
+        self.assertEqual(list(normalized.iter_matches(["a\n", "  b\n"])), [0, 2])
+
+    def test_whitespace_replace_skips_windows_with_uneven_indent(self) -> None:
+        document = Document("  a\nb\n    a\n    b\n")
+        result = replace_part_with_missing_leading_whitespace(
+            document.lines, ["a\n", "b\n"], ["A\n", "B\n"], document.normalized
+        )
+        assert result is not None
+        self.assertEqual(result.strategy, "whitespace")
+        self.assertEqual(result.apply(document.text), "  a\nb\n    A\n    B\n")
+
+
+class TestDocument(unittest.TestCase):
+    def test_adds_trailing_newline(self) -> None:
+        document = Document("one\ntwo")
+        self.assertEqual(document.text, "one\ntwo\n")
+        self.assertEqual(document.lines, ["one\n", "two\n"])
+
+    def test_line_index_is_built_once(self) -> None:
+        document = Document("one\ntwo\n")
+        self.assertIs(document.line_index, document.line_index)
+
+    def test_perfect_replace_with_shared_index(self) -> None:
+        document = Document("one\ntwo\nthree\ntwo\n")
+        result = perfect_replace(
+            document.lines, ["two\n"], ["TWO\n"], document.line_index
+        )
+        assert result is not None
+        self.assertEqual(result.apply(document.text), "one\nTWO\nthree\ntwo\n")
+        result = perfect_replace(
+            document.lines, ["three\n", "two\n"], ["3\n"], document.line_index
+        )
+        assert result is not None
+        self.assertEqual(result.apply(document.text), "one\ntwo\n3\n")
+        (hunk,) = result.hunks
+        self.assertEqual((hunk.start, hunk.end), (8, 18))
+        self.assertEqual((hunk.start_line, hunk.end_line), (2, 4))
+
+    def test_line_span(self) -> None:
+        document = Document("ab\ncd\nef")
+        self.assertEqual(document.offsets, [0, 3, 6, 9])
+        self.assertEqual(document.line_span(1, 4), (0, 2))
+        self.assertEqual(document.line_span(3, 6), (1, 2))
+        self.assertEqual(document.line_span(9, 9), (3, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
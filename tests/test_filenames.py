@@ -0,0 +1,65 @@
+import difflib
+import random
+import unittest
+from pathlib import Path
+
+from search_replace import FilenameIndex, parse_edit_blocks
+from search_replace.parser import find_filename
+
+
+def _linear_lookup(fname: str, valid_fnames: list[str]) -> str | None:
+    if fname in valid_fnames:
+        return fname
+    for valid_name in valid_fnames:
+        if fname == Path(valid_name).name:
+            return valid_name
+    close_matches = difflib.get_close_matches(fname, valid_fnames, n=1, cutoff=0.8)
+    return close_matches[0] if close_matches else None
+
+
+class TestFilenameIndex(unittest.TestCase):
+    def test_lookups(self) -> None:
+        index = FilenameIndex(["src/a.py", "lib/a.py", "src/b.py"])
+
+        self.assertIn("src/a.py", index)
+        self.assertNotIn("a.py", index)
+        self.assertEqual(index.by_basename("a.py"), "src/a.py")
+        self.assertEqual(index.close_match("src/c.py"), "src/b.py")
+        self.assertIsNone(index.close_match("docs/readme.md"))
+
+    def test_matches_linear_scan(self) -> None:
+        rng = random.Random(1234)
+        alphabet = "abcdefgh_/."
+        valid_fnames = [
+            "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 24)))
+            for _ in range(400)
+        ]
+        index = FilenameIndex(valid_fnames)
+        queries = valid_fnames[:20] + [Path(name).name for name in valid_fnames[:20]]
+        for name in valid_fnames[:200]:
+            chars = list(name)
+            chars[rng.randrange(len(chars))] = rng.choice(alphabet)
+            queries.append("".join(chars))
+
+        for query in queries:
+            expected = _linear_lookup(query, valid_fnames)
+            if query in index:
+                actual: str | None = query
+            else:
+                actual = index.by_basename(query) or index.close_match(query)
+            self.assertEqual(actual, expected, query)
+
+    def test_prebuilt_index_accepted_by_parser(self) -> None:
+        index = FilenameIndex(["path/to/app.py"])
+        response = "app.py\n```\n<<<<<<< SEARCH\na\n=======\nb\n>>>>>>> REPLACE\n```\n"
+
+        result = parse_edit_blocks(response, valid_fnames=index)
+
+        self.assertEqual(result.edits[0].path, "path/to/app.py")
+        self.assertEqual(
+            find_filename(["app.py\n"], ("```", "```"), index), "path/to/app.py"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
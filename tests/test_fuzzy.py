@@ -0,0 +1,85 @@
+import time
+import unittest
+
+from search_replace.budget import Deadline
+from search_replace.errors import BudgetExceededError
+from search_replace.fuzzy import find_closest_chunk, find_similar_lines
+
+
+class TestFindClosestChunk(unittest.TestCase):
+    def test_finds_most_similar_window(self) -> None:
+        whole_lines = ["alpha = 1\n", "beta = 2\n", "gamma = 3\n"]
+        part_lines = ["beta = 22\n"]
+        closest = find_closest_chunk(whole_lines, "".join(part_lines), part_lines)
+
+        self.assertEqual((closest.start, closest.end), (1, 2))
+        self.assertGreaterEqual(closest.similarity, 0.8)
+
+    def test_ties_resolve_to_first_window(self) -> None:
+        whole_lines = ["x = 10\n", "y = 2\n", "x = 10\n"]
+        part_lines = ["x = 1\n"]
+        closest = find_closest_chunk(whole_lines, "".join(part_lines), part_lines)
+
+        self.assertEqual((closest.start, closest.end), (0, 1))
+
+    def test_reports_pruned_and_scored_windows(self) -> None:
+        whole_lines = [f"unrelated_{i} = object()\n" for i in range(50)]
+        whole_lines[30] = "target = compute(1)\n"
+        part_lines = ["target = compute(2)\n"]
+        closest = find_closest_chunk(whole_lines, "".join(part_lines), part_lines)
+
+        self.assertEqual(closest.start, 30)
+        self.assertEqual(closest.pruned + closest.scored, 50)
+        self.assertLess(closest.scored, 5)
+
+    def test_no_window_above_threshold(self) -> None:
+        whole_lines = ["alpha = 1\n", "beta = 2\n"]
+        part_lines = ["totally unrelated sentence here\n"]
+        closest = find_closest_chunk(whole_lines, "".join(part_lines), part_lines)
+
+        self.assertEqual((closest.start, closest.end), (-1, -1))
+
+    def test_expired_deadline_stops_before_counting_lines(self) -> None:
+        whole_lines = [f"value_{i} = compute({i})\n" for i in range(200_000)]
+        part_lines = ["value_7 = compute(8)\n"]
+        expired = Deadline(time.monotonic() - 1)
+
+        began = time.monotonic()
+        with self.assertRaises(BudgetExceededError):
+            find_closest_chunk(
+                whole_lines, "".join(part_lines), part_lines, deadline=expired
+            )
+        self.assertLess(time.monotonic() - began, 0.05)
+
+
+class TestFindSimilarLines(unittest.TestCase):
+    content = "\n".join(f"line {i}" for i in range(40))
+
+    def test_returns_exact_window_when_ends_match(self) -> None:
+        search = "line 10\nline eleven\nline 12"
+        self.assertEqual(
+            find_similar_lines(search, self.content, threshold=0.5),
+            "line 10\nline 11\nline 12",
+        )
+
+    def test_adds_context_when_ends_differ(self) -> None:
+        search = "line twenty\nline 21\nline 22\nline 23"
+        expected = "\n".join(f"line {i}" for i in range(15, 29))
+        self.assertEqual(find_similar_lines(search, self.content), expected)
+
+    def test_no_shared_line_returns_empty(self) -> None:
+        self.assertEqual(find_similar_lines("other\nlines", self.content), "")
+
+    def test_ties_resolve_to_first_window(self) -> None:
+        content = "a\nb\nx\na\nb\ny"
+        self.assertEqual(find_similar_lines("a\nb\nz", content), "a\nb\nx\na\nb\ny")
+
+    def test_max_windows_limits_scoring(self) -> None:
+        # Both windows share every line, but the first is in the wrong order.
+        content = "c\nb\na\nx\na\nb\nc"
+        self.assertEqual(find_similar_lines("a\nb\nc", content, max_windows=1), "")
+        self.assertEqual(find_similar_lines("a\nb\nc", content), "a\nb\nc")
+
+
+if __name__ == "__main__":
+    unittest.main()
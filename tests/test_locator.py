@@ -0,0 +1,63 @@
+import random
+import unittest
+
+from search_replace import BlockLocator, locate_blocks
+from search_replace.document import Document, prep
+
+
+class TestLocateBlocks(unittest.TestCase):
+    content = "def f():\n    x = 1\n    return x\n\ndef g():\n    x = 1\n    return y\n"
+
+    def test_exact_and_normalized_hits(self) -> None:
+        unique, indented, missing = locate_blocks(
+            self.content, ["def g():\n", "x = 1\nreturn x\n", "absent\n"]
+        )
+
+        self.assertEqual((unique.exact, unique.normalized), ((4,), (4,)))
+        self.assertEqual((indented.exact, indented.normalized), ((), (1,)))
+        self.assertEqual(indented.start, 1)
+        self.assertFalse(unique.missing or unique.ambiguous)
+        self.assertTrue(missing.missing)
+        self.assertEqual(missing.start, -1)
+
+    def test_reports_ambiguous_blocks(self) -> None:
+        (repeated,) = locate_blocks(self.content, ["    x = 1\n"])
+
+        self.assertEqual(repeated.exact, (1, 5))
+        self.assertTrue(repeated.ambiguous)
+
+    def test_overlapping_and_nested_blocks(self) -> None:
+        content = "a\na\na\nb\n"
+        outer, inner = locate_blocks(content, ["a\na\n", "a\nb\n"])
+
+        self.assertEqual(outer.exact, (0, 1))
+        self.assertEqual(inner.exact, (2,))
+
+    def test_empty_search_matches_at_top(self) -> None:
+        (empty,) = locate_blocks(self.content, [""])
+
+        self.assertEqual(empty.exact, (0,))
+
+    def test_matches_per_block_search(self) -> None:
+        rng = random.Random(0)
+        lines = ["a\n", "  a\n", "b\n", " b\n", "c\n", "\n"]
+        for _ in range(300):
+            document = Document("".join(rng.choices(lines, k=rng.randint(0, 20))))
+            originals = [
+                "".join(rng.choices(lines, k=rng.randint(1, 4))) for _ in range(4)
+            ]
+            locator = BlockLocator(originals)
+            for original, location in zip(originals, locator.locate(document)):
+                part_lines = prep(original)[1]
+                normalized = tuple(document.normalized.iter_matches(part_lines))
+                self.assertEqual(location.normalized, normalized)
+                exact = tuple(
+                    start
+                    for start in normalized
+                    if document.lines[start : start + len(part_lines)] == part_lines
+                )
+                self.assertEqual(location.exact, exact)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,13 +1,40 @@
 import difflib
 import io
+import itertools
 import re
 import unittest
 from pathlib import Path
+from typing import Callable, Iterator
 
-from search_replace.parser import all_fences, find_original_update_blocks
+from search_replace.parser import (
+    detect_fence,
+    find_original_update_blocks,
+    iter_edit_blocks,
+)
+from search_replace.types import Fence
 
+FindBlocks = Callable[[str, Fence], Iterator[tuple[str, str, str]]]
 
-def process_markdown(filename: str, fh: io.StringIO) -> None:
+
+def find_blocks_streaming(content: str, fence: Fence) -> Iterator[tuple[str, str, str]]:
+    # Deterministic, uneven chunk sizes so block markers straddle chunk borders.
+    sizes = itertools.cycle([1, 7, 64, 3, 509, 2, 31])
+    chunks = []
+    pos = 0
+    while pos < len(content):
+        size = next(sizes)
+        chunks.append(content[pos : pos + size])
+        pos += size
+
+    for block in iter_edit_blocks(chunks, fence):
+        yield block.path, block.original, block.updated
+
+
+def process_markdown(
+    filename: str,
+    fh: io.StringIO,
+    find_blocks: FindBlocks = find_original_update_blocks,
+) -> None:
     file_path = Path(filename)
     if not file_path.exists():
         print(f"@@@ File '{filename}' not found.", "@" * 20, file=fh, flush=True)
@@ -28,12 +55,10 @@ def process_markdown(filename: str, fh: io.StringIO) -> None:
         header = section.split("\n")[0].strip()
         section_content = "".join(section.splitlines(keepends=True)[1:])
 
-        for fence in all_fences[1:] + all_fences[:1]:
-            if "\n" + fence[0] in section_content:
-                break
+        fence = detect_fence(section_content)
 
         try:
-            blocks = list(find_original_update_blocks(section_content, fence))
+            blocks = list(find_blocks(section_content, fence))
         except ValueError as exc:
             print("\n\n@@@", header, "@" * 20, file=fh, flush=True)
             print(str(exc), file=fh, flush=True)
@@ -52,12 +77,26 @@ def process_markdown(filename: str, fh: io.StringIO) -> None:
 
 class TestParityHarness(unittest.TestCase):
     def test_process_markdown_matches_frozen_output(self) -> None:
+        self.assert_matches_frozen_output(find_original_update_blocks)
+
+    def test_streaming_parser_matches_frozen_output(self) -> None:
+        self.assert_matches_frozen_output(find_blocks_streaming)
+
+    def test_auto_fence_matches_frozen_output(self) -> None:
+        def find_blocks_auto(
+            content: str, fence: Fence
+        ) -> Iterator[tuple[str, str, str]]:
+            return find_original_update_blocks(content, fence="auto")
+
+        self.assert_matches_frozen_output(find_blocks_auto)
+
+    def assert_matches_frozen_output(self, find_blocks: FindBlocks) -> None:
         fixture_dir = Path(__file__).parent / "fixtures"
         input_file = fixture_dir / "chat-history.md"
         expected_output_file = fixture_dir / "chat-history-search-replace-gold.txt"
 
         output = io.StringIO()
-        process_markdown(str(input_file), output)
+        process_markdown(str(input_file), output, find_blocks)
         actual_output = output.getvalue()
         expected_output = expected_output_file.read_text(encoding="utf-8")
 
@@ -1,6 +1,16 @@
 import unittest
 
-from search_replace.parser import find_filename, find_original_update_blocks
+from search_replace import EditBlock, EditBlockView
+from search_replace.errors import ParseError
+from search_replace.parser import (
+    StreamingBlockParser,
+    all_fences,
+    detect_fence,
+    find_filename,
+    find_original_update_blocks,
+    parse_edit_block_spans,
+    parse_edit_blocks,
+)
 
 
 class TestParser(unittest.TestCase):
@@ -273,6 +283,141 @@ Console.WriteLine("Hello, C# World!");
         replace_text = 'Console.WriteLine("Hello, C# World!");\n'
         self.assertEqual(edits, [("Program.cs", search_text, replace_text)])
 
+    def test_marker_lines_with_surrounding_whitespace(self) -> None:
+        edit = (
+            "app.py\n```\n  <<<<<<< SEARCH  \n"
+            "==== not a divider\n"
+            "<<<<<<< SEARCH again\n"
+            "\t=======\n"
+            "<<<<<<< SEARCH\n"
+            " >>>>>>>>> REPLACE\n```\n"
+        )
+        edits = list(find_original_update_blocks(edit))
+        self.assertEqual(
+            edits,
+            [
+                (
+                    "app.py",
+                    "==== not a divider\n<<<<<<< SEARCH again\n",
+                    "<<<<<<< SEARCH\n",
+                )
+            ],
+        )
+
+
+class TestDetectFence(unittest.TestCase):
+    def test_priority_and_default(self) -> None:
+        self.assertEqual(detect_fence("no fences at all"), all_fences[0])
+        self.assertEqual(detect_fence("x\n```py\ny\n```\n"), all_fences[0])
+        self.assertEqual(detect_fence("x\n````\ny\n````\n"), all_fences[1])
+        self.assertEqual(
+            detect_fence("x\n<code>\n```\n<source>\n"), ("<source>", "</source>")
+        )
+        # Openers only count at the start of a line.
+        self.assertEqual(detect_fence("see <source> here"), all_fences[0])
+
+    def test_auto_fence_parsing(self) -> None:
+        response = (
+            "<source>app.py\n<<<<<<< SEARCH\na\n=======\nb\n>>>>>>> REPLACE\n"
+            "</source>\n"
+        )
+        self.assertEqual(
+            parse_edit_blocks("\n" + response, fence="auto").edits,
+            [EditBlock("app.py", "a\n", "b\n")],
+        )
+
+
+class TestParseEditBlockSpans(unittest.TestCase):
+    def test_views_match_parsed_blocks(self) -> None:
+        response = (
+            "a.py\n```\n<<<<<<< SEARCH\none\n=======\nONE\n>>>>>>> REPLACE\n```\n"
+            "b.py\n```\n<<<<<<< SEARCH\n=======\nnew\r\n>>>>>>> REPLACE\n```\n"
+        )
+
+        views = parse_edit_block_spans(response)
+
+        self.assertEqual(
+            [view.to_edit_block() for view in views],
+            parse_edit_blocks(response).edits,
+        )
+        self.assertIs(views[0].source, response)
+        self.assertEqual(response[slice(*views[0].original_span)], "one\n")
+
+    def test_view_texts_are_sliced_on_access(self) -> None:
+        view = EditBlockView("a.py", "xxhello\nworld\n", (2, 8), (8, 14))
+
+        self.assertEqual(view.original, "hello\n")
+        self.assertEqual(view.updated, "world\n")
+        self.assertNotIn("xxhello", repr(view))
+
+    def test_errors_match_batch_parser(self) -> None:
+        response = "a.py\n```\n<<<<<<< SEARCH\none\n"
+        with self.assertRaises(ParseError) as batch:
+            parse_edit_blocks(response)
+        with self.assertRaises(ParseError) as spans:
+            parse_edit_block_spans(response)
+        self.assertEqual(str(spans.exception), str(batch.exception))
+
+
+class TestStreamingBlockParser(unittest.TestCase):
+    def test_block_is_emitted_when_replace_line_arrives(self) -> None:
+        parser = StreamingBlockParser()
+        self.assertEqual(parser.feed("foo.txt\n<<<<<<< SEARCH\nTwo\n"), [])
+        self.assertEqual(parser.feed("=======\nTooooo\n>>>>>>> REP"), [])
+        self.assertEqual(
+            parser.feed("LACE\n"),
+            [EditBlock(path="foo.txt", original="Two\n", updated="Tooooo\n")],
+        )
+        self.assertEqual(parser.close(), [])
+
+    def test_final_line_without_newline_is_flushed_on_close(self) -> None:
+        parser = StreamingBlockParser()
+        blocks = parser.feed("aider/coder.py\n<<<<<<< SEARCH\nold\n=======\nnew\n")
+        blocks += parser.feed(">>>>>>> REPLACE")
+        self.assertEqual(blocks, [])
+        self.assertEqual(
+            parser.close(),
+            [EditBlock(path="aider/coder.py", original="old\n", updated="new\n")],
+        )
+
+    def test_crlf_split_across_chunks(self) -> None:
+        content = "foo.txt\r\n<<<<<<< SEARCH\r\nTwo\r\n=======\r\nThree\r\n>>>>>>> REPLACE\r\n"
+        parser = StreamingBlockParser()
+        blocks = []
+        for char in content:
+            blocks += parser.feed(char)
+        blocks += parser.close()
+
+        expected = [
+            EditBlock(path=path, original=original, updated=updated)
+            for path, original, updated in find_original_update_blocks(content)
+        ]
+        self.assertEqual(blocks, expected)
+
+    def test_missing_filename_matches_batch_error(self) -> None:
+        content = "\n```text\n<<<<<<< SEARCH\nTwo\n=======\nTooooo\n>>>>>>> REPLACE\n"
+        with self.assertRaises(ParseError) as batch_ctx:
+            _ = list(find_original_update_blocks(content))
+
+        parser = StreamingBlockParser()
+        with self.assertRaises(ParseError) as stream_ctx:
+            parser.feed(content)
+        self.assertEqual(str(stream_ctx.exception), str(batch_ctx.exception))
+
+    def test_error_is_raised_after_blocks_completed_in_same_chunk(self) -> None:
+        content = (
+            "foo.txt\n<<<<<<< SEARCH\none\n=======\ntwo\n>>>>>>> REPLACE\n"
+            "<<<<<<< SEARCH\nthree\n"
+        )
+        parser = StreamingBlockParser()
+        self.assertEqual(
+            parser.feed(content),
+            [EditBlock(path="foo.txt", original="one\n", updated="two\n")],
+        )
+        with self.assertRaises(ParseError) as ctx:
+            parser.close()
+        self.assertIn("Expected `=======`", str(ctx.exception))
+
 
 if __name__ == "__main__":
     unittest.main()
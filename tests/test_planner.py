@@ -0,0 +1,67 @@
+import random
+import unittest
+
+from search_replace.apply import perfect_replace
+from search_replace.document import Document
+from search_replace.planner import FilePlan
+
+
+class TestFilePlan(unittest.TestCase):
+    def test_splices_independent_edits(self) -> None:
+        plan = FilePlan(Document("a\nb\nc\nd\n"))
+
+        first = plan.add(["c\n"], ["C\n", "C2\n"])
+        second = plan.add(["a\n"], [])
+        self.assertEqual(len(plan), 2)
+        self.assertEqual(plan.splice(), "b\nC\nC2\nd\n")
+        assert first is not None and second is not None
+        self.assertEqual((first.hunks[0].start, first.hunks[0].start_line), (4, 2))
+        self.assertEqual((second.hunks[0].start, second.hunks[0].end), (0, 2))
+
+    def test_rejects_overlapping_edit(self) -> None:
+        plan = FilePlan(Document("a\nb\nc\n"))
+
+        self.assertIsNotNone(plan.add(["a\n", "b\n"], ["x\n"]))
+        self.assertIsNone(plan.add(["b\n", "c\n"], ["y\n"]))
+
+    def test_rejects_edit_matching_earlier_replacement(self) -> None:
+        plan = FilePlan(Document("a\nb\nc\nb\n"))
+
+        self.assertIsNotNone(plan.add(["a\n"], ["b\n"]))
+        # Applied in order, "b" would now match the new first line.
+        self.assertIsNone(plan.add(["b\n"], ["B\n"]))
+
+    def test_rejects_edit_matching_across_a_junction(self) -> None:
+        plan = FilePlan(Document("a\nx\nb\nq\na\nb\n"))
+
+        self.assertIsNotNone(plan.add(["x\n"], []))
+        self.assertIsNone(plan.add(["a\n", "b\n"], ["ab\n"]))
+
+    def test_rejects_edit_that_empties_the_file(self) -> None:
+        self.assertIsNone(FilePlan(Document("a\n")).add(["a\n"], []))
+
+    def test_matches_sequential_application(self) -> None:
+        rng = random.Random(0)
+        lines = ["a\n", "b\n", "c\n", "d\n"]
+        for _ in range(2000):
+            document = Document("".join(rng.choices(lines, k=rng.randint(0, 12))))
+            plan = FilePlan(document)
+            content = document.text
+            for _ in range(5):
+                part_lines = rng.choices(lines, k=rng.randint(1, 3))
+                replace_lines = rng.choices(lines, k=rng.randint(0, 3))
+                planned = plan.add(part_lines, replace_lines)
+                if planned is None:
+                    break
+                current = Document(content)
+                result = perfect_replace(
+                    current.lines, part_lines, replace_lines, current.line_index
+                )
+                self.assertEqual(planned, result)
+                assert result is not None
+                content = result.apply(current.text)
+                self.assertEqual(plan.splice(), content)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,226 @@
+import difflib
+import random
+import re
+import unittest
+from pathlib import Path
+
+from search_replace import (
+    ApplyError,
+    DiffPreview,
+    EditBlock,
+    MemoryStorage,
+    apply_edits,
+)
+from search_replace.preview import match_line_edits
+from search_replace.types import Hunk, Match
+
+_HEADER = re.compile(r"@@ -(\d+)(?:,(\d+))? \+")
+
+
+def _patch(original: str, diff: str) -> str:
+    """Apply the hunks of one file's unified diff to ``original``."""
+    old_lines = original.splitlines(keepends=True)
+    lines = diff.splitlines(keepends=True)
+    result: list[str] = []
+    position = 0
+    index = 0
+    while index < len(lines):
+        header = _HEADER.match(lines[index])
+        index += 1
+        if header is None:
+            continue
+        count = 1 if header.group(2) is None else int(header.group(2))
+        start = int(header.group(1)) - 1 if count else int(header.group(1))
+        result.extend(old_lines[position:start])
+        position = start
+        while index < len(lines) and lines[index][0] in " -+":
+            line = lines[index]
+            body = line[1:]
+            if index + 1 < len(lines) and lines[index + 1].startswith("\\"):
+                body = body[:-1]
+                index += 1
+            if line[0] != "+":
+                position += 1
+            if line[0] != "-":
+                result.append(body)
+            index += 1
+    result.extend(old_lines[position:])
+    return "".join(result)
+
+
+class TestDiffPreview(unittest.TestCase):
+    def test_matches_difflib_for_separate_edits(self) -> None:
+        original = "".join(f"line {n}\n" for n in range(30))
+        updated = original.replace("line 3\n", "three\n").replace(
+            "line 20\n", "twenty\nmore\n"
+        )
+        preview = DiffPreview(
+            {"f.py": original},
+            {"f.py": [(3, 4, ["three\n"]), (20, 21, ["twenty\n", "more\n"])]},
+        )
+
+        expected = difflib.unified_diff(
+            original.splitlines(keepends=True),
+            updated.splitlines(keepends=True),
+            "a/f.py",
+            "b/f.py",
+        )
+        self.assertEqual(str(preview), "".join(expected))
+        self.assertEqual(len(list(preview.iter_hunks())), 2)
+
+    def test_nearby_edits_share_a_hunk(self) -> None:
+        original = "".join(f"{n}\n" for n in range(20))
+        preview = DiffPreview(
+            {"f": original}, {"f": [(2, 3, ["x\n"]), (7, 8, ["y\n"])]}, context=2
+        )
+
+        (hunk,) = preview.file_hunks("f")
+        self.assertEqual(hunk.header, "@@ -1,10 +1,10 @@\n")
+
+    def test_folds_edits_to_the_same_lines(self) -> None:
+        preview = DiffPreview(
+            {"f": "a\nb\nc\n"}, {"f": [(1, 2, ["x\n", "y\n"]), (2, 3, ["b\n"])]}
+        )
+
+        self.assertEqual(
+            "".join(next(preview.file_hunks("f")).lines), " a\n+x\n b\n c\n"
+        )
+
+    def test_new_file_and_missing_final_newline(self) -> None:
+        preview = DiffPreview(
+            {"new.py": None, "old.py": "a\nb"},
+            {"new.py": [(0, 0, ["x\n"])], "old.py": [(1, 2, ["b\n", "c"])]},
+        )
+
+        self.assertEqual(
+            str(preview),
+            "--- /dev/null\n+++ b/new.py\n@@ -0,0 +1 @@\n+x\n"
+            "--- a/old.py\n+++ b/old.py\n@@ -1,2 +1,3 @@\n a\n-b\n"
+            "\\ No newline at end of file\n+b\n+c\n\\ No newline at end of file\n",
+        )
+
+    def test_unchanged_file_has_no_hunks(self) -> None:
+        preview = DiffPreview({"f": "a\n"}, {"f": [(0, 1, ["a\n"])]})
+
+        self.assertEqual(str(preview), "")
+
+    def test_match_line_edits_widen_partial_lines(self) -> None:
+        text = "one two\nthree\n"
+        match = Match("dotdotdots", (Hunk(4, 7, 0, 1, "2"), Hunk(8, 13, 1, 2, "3")))
+
+        self.assertEqual(
+            match_line_edits(match, text), [(0, 1, ["one 2\n"]), (1, 2, ["3\n"])]
+        )
+        append = Match("append", (Hunk(13, 13, 1, 1, "\nnew\n"),))
+        self.assertEqual(
+            match_line_edits(append, text[:-1]), [(1, 2, ["three\n", "new\n"])]
+        )
+
+
+class TestDryRunPreview(unittest.TestCase):
+    def test_dry_run_returns_preview(self) -> None:
+        storage = MemoryStorage({"a.py": "x = 1\ny = 2", "b.py": "keep\n"})
+        edits = [
+            EditBlock("a.py", "y = 2\n", "y = 3\n"),
+            EditBlock("c.py", "", "created\n"),
+            EditBlock("a.py", "x = 1\n", "x = 0\n"),
+        ]
+
+        result = apply_edits(edits, "/", dry_run=True, storage=storage)
+
+        assert result.preview is not None
+        self.assertEqual(result.preview.paths, ["a.py", "c.py"])
+        self.assertEqual(
+            str(result.preview),
+            "--- a/a.py\n+++ b/a.py\n@@ -1,2 +1,2 @@\n-x = 1\n-y = 2\n"
+            "\\ No newline at end of file\n+x = 0\n+y = 3\n"
+            "--- /dev/null\n+++ b/c.py\n@@ -0,0 +1 @@\n+created\n",
+        )
+        self.assertIsNone(apply_edits(edits, "/", storage=storage).preview)
+
+    def test_preview_rebuilds_applied_content(self) -> None:
+        rng = random.Random(7)
+        words = ["alpha\n", "beta\n", "  gamma\n", "delta\n", "eps\n"]
+        checked = 0
+        for _ in range(300):
+            files: dict[str, str] = {
+                name: "".join(rng.choices(words, k=rng.randint(1, 10)))
+                for name in ("a.py", "b.py")
+            }
+            if rng.random() < 0.3:
+                files["b.py"] = files["b.py"][:-1]
+            edits = []
+            for _ in range(rng.randint(1, 4)):
+                name = rng.choice(["a.py", "b.py"])
+                lines = files[name].splitlines(keepends=True)
+                if rng.random() < 0.3:
+                    edits.append(_dotted_edit(rng, name, lines))
+                    continue
+                start = rng.randrange(len(lines))
+                original = "".join(lines[start : start + rng.randint(1, 3)])
+                if rng.random() < 0.3:
+                    original = original.lstrip()
+                updated = "".join(rng.choices(words + ["new\n"], k=rng.randint(0, 3)))
+                edits.append(EditBlock(name, original, updated))
+
+            for max_workers in (None, 2):
+                dry = MemoryStorage(files)
+                real = MemoryStorage(files)
+                try:
+                    result = apply_edits(
+                        edits, "/", dry_run=True, storage=dry, max_workers=max_workers
+                    )
+                except (ApplyError, ValueError):
+                    continue
+                apply_edits(edits, "/", storage=real, max_workers=max_workers)
+                assert result.preview is not None
+                for name, original in files.items():
+                    diff = "".join(
+                        str(hunk)
+                        for path, hunk in result.preview.iter_hunks()
+                        if path == name
+                    )
+                    self.assertEqual(_patch(original, diff), real.read(Path("/", name)))
+                checked += 1
+        self.assertGreater(checked, 100)
+
+    def test_dotted_block_shifts_later_pieces(self) -> None:
+        storage = MemoryStorage({"f": "a\nb\nc\nd\n"})
+        edits = [EditBlock("f", "a\n...\nc\n", "A1\nA2\n...\nC\n")]
+
+        result = apply_edits(edits, "/", dry_run=True, storage=storage)
+
+        assert result.preview is not None
+        self.assertEqual(
+            "".join(next(result.preview.file_hunks("f")).lines),
+            "-a\n+A1\n+A2\n b\n-c\n+C\n d\n",
+        )
+
+
+def _dotted_edit(rng: random.Random, name: str, lines: list[str]) -> EditBlock:
+    """A ``...`` block of two or three pieces; an empty piece appends."""
+    parts = []
+    replacements = []
+    for _ in range(rng.randint(2, 3)):
+        start = rng.randrange(len(lines))
+        part = "".join(lines[start : start + rng.randint(1, 2)])
+        if rng.random() < 0.15:
+            part = ""
+        elif not part.endswith("\n"):
+            part += "\n"
+        parts.append(part)
+        replacements.append(
+            "".join(rng.choices(["X\n", "Y\n", "Z"], k=rng.randint(0, 2)))
+        )
+    replacements = [
+        piece if not piece or piece.endswith("\n") else piece + "\n"
+        for piece in replacements
+    ]
+    updated = "...\n".join(replacements)
+    if rng.random() < 0.5:
+        updated = updated.rstrip("\n")
+    return EditBlock(name, "...\n".join(parts), updated)
+
+
+if __name__ == "__main__":
+    unittest.main()
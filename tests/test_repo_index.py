@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from search_replace import EditBlock, RepoIndex
+from search_replace.apply import apply_edits
+from search_replace.errors import ApplyError
+
+
+def touch_later(path: Path) -> None:
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+class TestRepoIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        (self.root / "pkg").mkdir()
+        (self.root / "pkg" / "a.py").write_text(
+            "import os\n\nNAME = os.name\n", encoding="utf-8"
+        )
+        (self.root / "pkg" / "b.py").write_text(
+            "def b():\n    return 2\n", encoding="utf-8"
+        )
+        (self.root / ".git").mkdir()
+        (self.root / ".git" / "HEAD").write_text("def b():\n", encoding="utf-8")
+        (self.root / "blob.bin").write_bytes(b"\xff\xfe\x00")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_find_files(self) -> None:
+        with RepoIndex(self.root) as index:
+            self.assertEqual(index.update(), 2)
+            self.assertEqual(
+                index.find_files("def b():\n  return 2\n"), [self.root / "pkg/b.py"]
+            )
+            self.assertEqual(index.find_files("def b():\n    return 1\n"), [])
+            self.assertEqual(index.find_files("import os"), [self.root / "pkg/a.py"])
+            self.assertEqual(index.find_files("\n\n"), [])
+
+    def test_incremental_update(self) -> None:
+        with RepoIndex(self.root) as index:
+            index.update()
+            self.assertEqual(index.update(), 0)
+
+            b_path = self.root / "pkg" / "b.py"
+            b_path.write_text("def b():\n    return 3\n", encoding="utf-8")
+            touch_later(b_path)
+            (self.root / "pkg" / "a.py").unlink()
+
+            self.assertEqual(index.update(), 1)
+            self.assertEqual(index.find_files("return 3"), [b_path])
+            self.assertEqual(index.find_files("import os"), [])
+
+        # The index persists between sessions.
+        with RepoIndex(self.root) as index:
+            self.assertEqual(index.update(), 0)
+            self.assertEqual(index.find_files("return 3"), [b_path])
+
+    def test_apply_edits_recovers_misattributed_block(self) -> None:
+        edits = [EditBlock("pkg/a.py", "def b():\n    return 2\n", "def b():\n")]
+        with RepoIndex(self.root) as index:
+            index.update()
+            result = apply_edits(edits, root=self.root, repo_index=index)
+
+        self.assertEqual(result.updated_edits[0].path, "pkg/b.py")
+        self.assertEqual(
+            (self.root / "pkg" / "b.py").read_text(encoding="utf-8"), "def b():\n"
+        )
+        self.assertEqual(
+            (result.stats.index_lookups, result.stats.index_recovered), (1, 1)
+        )
+
+    def test_recovery_skips_tried_files_before_the_limit(self) -> None:
+        # Files named before the target, all holding the block's lines.
+        common = "x = 1\ny = 2\n"
+        for index in range(6):
+            (self.root / f"c{index}.py").write_text(common, encoding="utf-8")
+        target = self.root / "target.py"
+        target.write_text("y = 2\nx = 1\n", encoding="utf-8")
+        chat_files = [f"c{index}.py" for index in range(5)]
+        edits = [EditBlock("pkg/a.py", "y = 2\nx = 1\n", "z = 3\n")]
+        with RepoIndex(self.root) as index:
+            index.update()
+            self.assertEqual(
+                index.find_files(common, limit=2, exclude=[self.root / "c0.py"]),
+                [self.root / "c1.py", self.root / "c2.py"],
+            )
+            result = apply_edits(
+                edits, root=self.root, chat_files=chat_files, repo_index=index
+            )
+
+        self.assertEqual(result.updated_edits[0].path, "target.py")
+        self.assertEqual(target.read_text(encoding="utf-8"), "z = 3\n")
+
+    def test_apply_edits_still_fails_without_exact_match(self) -> None:
+        edits = [EditBlock("pkg/a.py", "return 2\ndef b():\n", "x\n")]
+        with RepoIndex(self.root) as index:
+            index.update()
+            with self.assertRaises(ApplyError) as ctx:
+                apply_edits(edits, root=self.root, repo_index=index)
+
+        self.assertEqual(ctx.exception.stats.index_lookups, 1)
+        self.assertEqual(ctx.exception.stats.index_recovered, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
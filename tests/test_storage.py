@@ -0,0 +1,78 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from search_replace import EditBlock, MemoryStorage
+from search_replace.apply import apply_diff, apply_edits, do_replace
+from search_replace.errors import ApplyError, PathEscapeError
+from search_replace.storage import LocalStorage
+
+
+class TestMemoryStorage(unittest.TestCase):
+    def test_apply_edits_in_memory(self) -> None:
+        storage = MemoryStorage({"src/app.py": "one\ntwo\n"})
+        edits = [
+            EditBlock(path="src/app.py", original="two\n", updated="TWO\n"),
+            EditBlock(path="src/new.py", original="", updated="created\n"),
+        ]
+
+        apply_edits(edits, root=".", storage=storage)
+
+        self.assertEqual(storage.read(Path("/src/app.py")), "one\nTWO\n")
+        self.assertEqual(storage.read(Path("/src/new.py")), "created\n")
+
+    def test_root_and_absolute_paths(self) -> None:
+        storage = MemoryStorage({"/repo/a.txt": "a\n"})
+        response = (
+            "/repo/a.txt\n```\n<<<<<<< SEARCH\na\n=======\nb\n>>>>>>> REPLACE\n```\n"
+        )
+
+        apply_diff(response, root="/repo", storage=storage)
+
+        self.assertEqual(storage.files, {Path("/repo/a.txt"): "b\n"})
+
+    def test_failure_report_and_dry_run(self) -> None:
+        storage = MemoryStorage({"a.txt": "alpha\nbeta\n"})
+        edits = [EditBlock(path="a.txt", original="gamma\n", updated="x\n")]
+
+        with self.assertRaises(ApplyError) as ctx:
+            apply_edits(edits, root="/", storage=storage, dry_run=True)
+
+        self.assertIn("failed to exactly match lines in a.txt", str(ctx.exception))
+        self.assertEqual(storage.files, {Path("/a.txt"): "alpha\nbeta\n"})
+
+    def test_rejects_path_escape(self) -> None:
+        storage = MemoryStorage()
+        edits = [EditBlock(path="../outside.txt", original="", updated="x\n")]
+
+        with self.assertRaises(PathEscapeError):
+            apply_edits(edits, root="/repo", storage=storage)
+
+        self.assertEqual(storage.files, {})
+
+    def test_do_replace_creates_file_through_storage(self) -> None:
+        storage = MemoryStorage()
+        path = storage.resolve(Path("new.txt"))
+
+        result = do_replace(path, None, "", "hello\n", storage=storage)
+
+        self.assertEqual(result, "hello\n")
+        self.assertEqual(storage.files, {path: ""})
+
+
+class TestLocalStorage(unittest.TestCase):
+    def test_round_trip(self) -> None:
+        storage = LocalStorage()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = storage.resolve(Path(tmp_dir) / "file.txt")
+            self.assertFalse(storage.exists(path))
+
+            storage.create(path)
+            self.assertEqual(storage.read(path), "")
+
+            storage.write(path, "héllo\n")
+            self.assertEqual(path.read_text(encoding="utf-8"), "héllo\n")
+
+
+if __name__ == "__main__":
+    unittest.main()